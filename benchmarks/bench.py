@@ -0,0 +1,544 @@
+# benchmarks/bench.py
+
+"""
+Замеры производительности команд базы данных на синтетических таблицах
+
+Таблица строится по схеме SCHEMA для каждого размера из --sizes. Функции
+core и utils вызываются напрямую, команды engine выполняются тем же путем,
+что и в диалоговом режиме и скриптах. Для каждого замера сохраняются
+пропускная способность, задержки p50 и p99 и пиковая память, результаты
+пишутся в JSON и сравниваются с предыдущим запуском через --compare.
+
+Запуск:
+    python -m benchmarks.bench --sizes 1000 100000 1000000
+    python -m benchmarks.bench --compare benchmarks/results/<файл>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from prettytable import PrettyTable
+
+from src.primitive_db import core, utils
+from src.primitive_db.constrants import (
+    DURABLE_WRITES,
+    PARALLEL_SCAN_ROWS,
+    PARALLEL_SCAN_WORKERS,
+    STORAGE_BACKEND,
+    STORAGE_BACKENDS,
+)
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import execute_command, run_batch
+from src.primitive_db.indexes import PrimaryKeyIndex
+from src.primitive_db.parallel import scan_workers, set_parallel_scan
+from src.primitive_db.predicates import parse_predicate
+from src.primitive_db.rows import to_rows
+from src.primitive_db.storage import close_backends, table_backend
+from src.primitive_db.table_manager import TableManager
+
+SCHEMA = ("name:str", "age:int", "active:bool")
+TABLE = "bench"
+DEFAULT_SIZES = (1000, 100000, 1000000)
+PATHS = ("core", "utils", "engine")
+
+# Количество замеров операций над одной записью
+POINT_OPS = 200
+# Количество записей, просматриваемых всеми замерами одной операции над
+# всей таблицей, и границы количества замеров
+SCAN_BUDGET = 2000000
+MIN_REPEAT = 3
+MAX_REPEAT = 50
+
+# Рост задержки p50 относительно прошлого запуска, считающийся регрессией
+REGRESSION_RATIO = 1.2
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    "results")
+
+
+def scan_repeat(size):
+    """
+    Функция для получения количества замеров операции над всей таблицей
+
+    Параметры:
+        size - целое число, количество записей таблицы
+    """
+    return max(MIN_REPEAT, min(MAX_REPEAT, SCAN_BUDGET // max(size, 1)))
+
+def generate_records(count, seed=0):
+    """
+    Функция для генерации записей таблицы по схеме SCHEMA
+
+    Параметры:
+        count - целое число, количество записей
+        seed - целое число, начальное значение генератора случайных чисел
+
+    Возвращает:
+        records - список, содержит словари записей с ID от 1 до count
+    """
+    rng = random.Random(seed)
+    return [{'ID': i, 'name': f"user{i}", 'age': rng.randrange(100),
+        'active': rng.random() < 0.5} for i in range(1, count + 1)]
+
+def generate_rows(count, seed=0):
+    """
+    Функция для генерации значений insert в том виде, в котором их
+    передает разбор команды
+
+    Параметры:
+        count - целое число, количество строк
+        seed - целое число, начальное значение генератора случайных чисел
+    """
+    rng = random.Random(seed)
+    return [[f'"new{i}"', str(rng.randrange(100)),
+        "true" if rng.random() < 0.5 else "false"] for i in range(count)]
+
+def percentile(samples, percent):
+    """
+    Функция для вычисления перцентиля методом ближайшего ранга
+
+    Параметры:
+        samples - список, содержит значения
+        percent - число, перцентиль от 0 до 100
+    """
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def measure(name, rows, ops, run_op, setup=None, items_per_op=1):
+    """
+    Функция для замера операции
+
+    Каждый запуск замеряется отдельно, подготовка в замер не входит.
+    Пиковая память замеряется дополнительным запуском под tracemalloc,
+    чтобы его накладные расходы не искажали задержки
+
+    Параметры:
+        name - строка, имя замера вида <путь>.<операция>
+        rows - целое число, количество записей таблицы
+        ops - целое число, количество замеряемых запусков
+        run_op - функция, выполняет операцию, получает номер запуска
+            или результат setup
+        setup - функция, готовит запуск по его номеру
+        items_per_op - целое число, количество записей, обрабатываемых
+            одним запуском
+
+    Возвращает:
+        result - словарь, содержит результаты замера
+    """
+    print(f"  {name} ({rows} записей, {ops} запусков)", file=sys.stderr)
+
+    latencies = []
+    for i in range(ops):
+        state = setup(i) if setup is not None else i
+        start = time.perf_counter_ns()
+        run_op(state)
+        latencies.append(time.perf_counter_ns() - start)
+
+    state = setup(ops) if setup is not None else ops
+    tracemalloc.start()
+    try:
+        run_op(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies) / 1e9
+    return {
+        'name': name,
+        'path': name.split('.', 1)[0],
+        'rows': rows,
+        'ops': ops,
+        'items_per_op': items_per_op,
+        'total_s': round(total, 6),
+        'ops_per_s': round(ops / total, 1) if total else None,
+        'items_per_s': round(ops * items_per_op / total, 1) if total else None,
+        'p50_ms': round(percentile(latencies, 50) / 1e6, 4),
+        'p99_ms': round(percentile(latencies, 99) / 1e6, 4),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def write_table(table_name, records, storage):
+    """
+    Функция для записи таблицы и ее метаданных на диск через хранилище
+
+    Параметры:
+        table_name - строка, содержит имя таблицы
+        records - список, содержит словари записей
+        storage - строка, хранилище таблицы
+
+    Возвращает:
+        metadata - словарь, содержит метаданные с записанной таблицей
+    """
+    metadata = utils.load_metadata()
+    core.create_table(metadata, table_name, list(SCHEMA), backend=storage)
+    table_meta = metadata[table_name]
+    table_meta['next_id'] = len(records) + 1
+
+    backend = table_backend(table_meta)
+    backend.write(table_name, table_meta, [{'op': 'insert',
+        'records': records}])
+    if not backend.in_place:
+        table_meta.update(backend.compact(table_name, table_meta, records))
+        backend.cleanup(table_name, table_meta)
+
+    utils.save_metadata(metadata)
+    return metadata
+
+def bench_core(size, records):
+    """
+    Функция для замеров функций core над таблицей в памяти
+
+    Параметры:
+        size - целое число, количество записей таблицы
+        records - список, содержит словари записей таблицы
+    """
+    metadata = {}
+    core.create_table(metadata, TABLE, list(SCHEMA))
+    columns = metadata[TABLE]['columns']
+    repeat = scan_repeat(size)
+    rng = random.Random(size)
+
+    # Таблица хранится записями схемы, как после загрузки, поэтому
+    # изменения не попадают в словари для замеров utils
+    table_data = to_rows(records, columns)
+    primary = PrimaryKeyIndex()
+    primary.build(table_data)
+    indexes = {'ID': primary}
+
+    def random_id(_):
+        return parse_predicate(f"ID = {rng.randint(1, size)}", columns)
+
+    rows = generate_rows(POINT_OPS + 1)
+    batch = generate_rows(size)
+    scan_where = parse_predicate("age > 97", columns)
+    update_where = parse_predicate("age = 42", columns)
+    delete_where = parse_predicate("age < 10", columns)
+
+    return [
+        measure("core.insert", size, POINT_OPS,
+            lambda i: core.insert(metadata, TABLE, [rows[i]])),
+        measure("core.insert_batch", size, repeat,
+            lambda _: core.insert(metadata, TABLE, batch), items_per_op=size),
+        measure("core.select_id", size, POINT_OPS,
+            lambda where: core.select(table_data, where, indexes),
+            setup=random_id),
+        measure("core.select_scan", size, repeat,
+            lambda _: core.select(table_data, scan_where, indexes),
+            items_per_op=size),
+        measure("core.update_id", size, POINT_OPS,
+            lambda where: core.update(table_data, {'active': True}, where,
+                indexes),
+            setup=random_id),
+        measure("core.update_scan", size, repeat,
+            lambda _: core.update(table_data, {'active': False}, update_where,
+                indexes),
+            items_per_op=size),
+        measure("core.delete_scan", size, repeat,
+            lambda _: core.delete(table_data, delete_where, indexes),
+            items_per_op=size),
+    ]
+
+def bench_tables(size, records, storage, paths):
+    """
+    Функция для замеров создания и удаления таблиц и работы с файлами
+
+    Параметры:
+        size - целое число, количество записей таблицы
+        records - список, содержит словари записей таблицы
+        storage - строка, хранилище таблиц
+        paths - список, содержит пути замеров
+    """
+    repeat = scan_repeat(size)
+    metadata = {}
+
+    def create_table(i):
+        core.create_table(metadata, f"t{i}", list(SCHEMA), backend=storage)
+
+    def written_table(i):
+        return write_table(f"drop{i}", records, storage), f"drop{i}"
+
+    def drop_table(state):
+        core.drop_table(*state)
+
+    results = []
+    if "core" in paths:
+        results += [
+            measure("core.create_table", size, POINT_OPS, create_table),
+            measure("core.drop_table", size, repeat, drop_table,
+                setup=written_table, items_per_op=size),
+        ]
+    if "utils" not in paths or storage != "files":
+        return results
+
+    # Снимок и журнал есть только у файлового хранилища
+    table_meta = write_table("snapshot", records, storage)["snapshot"]
+    entry = {'op': 'update', 'ids': [1], 'set': {'active': True}}
+    rows = to_rows(records, table_meta['columns'])
+    return results + [
+        measure("utils.save_table_data", size, repeat,
+            lambda _: utils.save_table_data("snapshot", rows, table_meta),
+            items_per_op=size),
+        measure("utils.load_table_data", size, repeat,
+            lambda _: utils.load_table_data("snapshot", table_meta),
+            items_per_op=size),
+        measure("utils.append_table_log", size, POINT_OPS,
+            lambda _: utils.append_table_log("snapshot", [entry], table_meta)),
+    ]
+
+def bench_engine(size, records, storage):
+    """
+    Функция для замеров команд engine над таблицей на диске
+
+    Каждая команда выполняется так же, как строка скрипта: через
+    execute_command с последующим сбросом изменений на диск
+
+    Параметры:
+        size - целое число, количество записей таблицы
+        records - список, содержит словари записей таблицы
+        storage - строка, хранилище таблиц
+    """
+    write_table(TABLE, records, storage)
+    repeat = scan_repeat(size)
+    rng = random.Random(size)
+
+    def open_table(_):
+        manager = TableManager(flush_policy="exit", storage_backend=storage)
+        manager.get_table(TABLE)
+        manager.close()
+
+    results = [measure("engine.open", size, repeat, open_table,
+        items_per_op=size)]
+
+    manager = TableManager(flush_policy="command", storage_backend=storage)
+    session = {'pager_size': None, 'interactive': False, 'refresh': True}
+
+    def command(text):
+        with contextlib.redirect_stdout(io.StringIO()):
+            execute_command(manager, manager.metadata, text, session)
+            manager.after_command()
+
+    def random_id(_):
+        return rng.randint(1, size)
+
+    # Таблица и индексы загружаются до замеров
+    command(f"select from {TABLE} where ID = 1")
+
+    try:
+        results += [
+            measure("engine.select_id", size, POINT_OPS,
+                lambda k: command(f"select from {TABLE} where ID = {k}"),
+                setup=random_id),
+            # Условие без совпадений: просматривается вся таблица, вывод пуст,
+            # а разные значения не дают попадать в кэш выборок
+            measure("engine.select_scan", size, repeat,
+                lambda i: command(f'select from {TABLE} where name = "none{i}"'),
+                items_per_op=size),
+            measure("engine.aggregate", size, repeat,
+                lambda i: command(f"select count(*), avg(age) from {TABLE} "
+                    f"where ID > {i} group by active"),
+                items_per_op=size),
+            measure("engine.insert", size, POINT_OPS,
+                lambda i: command(f'insert into {TABLE} values ("new{i}", '
+                    f'{i % 100}, true)')),
+            measure("engine.update_id", size, POINT_OPS,
+                lambda k: command(f"update {TABLE} set age = 1 where ID = {k}"),
+                setup=random_id),
+            measure("engine.delete_id", size, repeat,
+                lambda i: command(f"delete from {TABLE} where ID = {i + 1}")),
+            measure("engine.create_table", size, POINT_OPS,
+                lambda i: command(f"create_table tmp{i} v:int")),
+            measure("engine.drop_table", size, POINT_OPS,
+                lambda i: command(f"drop_table tmp{i}")),
+        ]
+    finally:
+        manager.close()
+
+    # Скрипт целиком: загрузка таблицы, команды и сброс на диск при выходе
+    script = [f"select from {TABLE} where ID = {size // 2}",
+        f'insert into {TABLE} values ("script", 30, false)',
+        f"update {TABLE} set active = true where ID = {size // 3 + 1}",
+        f"select count(*) from {TABLE} where active = true",
+        f"delete from {TABLE} where ID = {size}"]
+
+    def run_script(_):
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_batch(script, auto_confirm=True, storage_backend=storage)
+
+    results.append(measure("engine.script", size, repeat, run_script))
+    return results
+
+def run_benchmarks(sizes, paths, storage, seed):
+    """
+    Функция для выполнения замеров, каждый размер таблицы замеряется
+    в отдельном временном каталоге
+
+    Параметры:
+        sizes - список, содержит количества записей таблиц
+        paths - список, содержит пути замеров: core, utils, engine
+        storage - строка, хранилище таблиц
+        seed - целое число, начальное значение генератора данных
+    """
+    set_auto_confirm(True)
+    cwd = os.getcwd()
+    results = []
+
+    for size in sizes:
+        print(f"Таблица из {size} записей", file=sys.stderr)
+        records = generate_records(size, seed)
+        with tempfile.TemporaryDirectory(prefix="primitive_db_bench_") as workdir:
+            os.chdir(workdir)
+            try:
+                if "core" in paths:
+                    results += bench_core(size, records)
+                results += bench_tables(size, records, storage, paths)
+                if "engine" in paths:
+                    results += bench_engine(size, records, storage)
+                    set_auto_confirm(True)
+            finally:
+                close_backends()
+                os.chdir(cwd)
+
+    return results
+
+def print_results(results, baseline=None):
+    """
+    Функция для вывода результатов, при наличии прошлого запуска выводится
+    отношение задержек p50
+
+    Параметры:
+        results - список, содержит словари результатов
+        baseline - словарь, содержит результаты прошлого запуска по ключу
+            (имя, количество записей)
+
+    Возвращает:
+        regressions - список, содержит имена замеров с регрессией
+    """
+    table = PrettyTable()
+    table.field_names = ["замер", "записей", "операций/с", "записей/с",
+        "p50, мс", "p99, мс", "память, КиБ"] + (["p50 / база"] if baseline
+        else [])
+    table.align = "r"
+    table.align["замер"] = "l"
+
+    regressions = []
+    for result in results:
+        row = [result['name'], result['rows'], result['ops_per_s'],
+            result['items_per_s'], result['p50_ms'], result['p99_ms'],
+            result['peak_kib']]
+        if baseline:
+            previous = baseline.get((result['name'], result['rows']))
+            ratio = None
+            if previous and previous['p50_ms']:
+                ratio = round(result['p50_ms'] / previous['p50_ms'], 2)
+                if ratio > REGRESSION_RATIO:
+                    regressions.append(f"{result['name']}[{result['rows']}]")
+            row.append("-" if ratio is None else ratio)
+        table.add_row(row)
+
+    print(table)
+    return regressions
+
+def load_baseline(filepath):
+    """
+    Функция для загрузки результатов прошлого запуска
+
+    Параметры:
+        filepath - строка, путь к файлу результатов
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return {(result['name'], result['rows']): result
+        for result in report['results']}
+
+def parse_args(argv=None):
+    """
+    Функция для разбора аргументов командной строки
+
+    Параметры:
+        argv - список, содержит аргументы, None - аргументы процесса
+    """
+    parser = argparse.ArgumentParser(prog="bench",
+        description="Замеры производительности команд базы данных")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="количества записей синтетических таблиц")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=PATHS,
+        help="замеряемые пути: функции core, функции utils, команды engine")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS,
+        default=STORAGE_BACKEND, help="хранилище таблиц")
+    parser.add_argument("--parallel-rows", type=int, default=PARALLEL_SCAN_ROWS,
+        help="количество записей для параллельного просмотра в командах "
+            "engine, 0 - выключить")
+    parser.add_argument("--parallel-workers", type=int,
+        default=PARALLEL_SCAN_WORKERS,
+        help="количество процессов параллельного просмотра, 0 - по количеству "
+            "процессоров")
+    parser.add_argument("--seed", type=int, default=0,
+        help="начальное значение генератора данных")
+    parser.add_argument("-o", "--output",
+        help="файл результатов JSON, по умолчанию в benchmarks/results")
+    parser.add_argument("--compare", metavar="FILE",
+        help="файл результатов прошлого запуска для поиска регрессий")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Основная функция замеров
+
+    Параметры:
+        argv - список, содержит аргументы, None - аргументы процесса
+
+    Возвращает:
+        code - целое число, код завершения: 1, если найдены регрессии
+    """
+    args = parse_args(argv)
+    set_parallel_scan(args.parallel_rows, args.parallel_workers)
+    started = datetime.now(timezone.utc)
+
+    output = args.output
+    if output is None:
+        output = os.path.join(RESULTS_DIR,
+            f"{started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    output = os.path.abspath(output)
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    results = run_benchmarks(args.sizes, args.paths, args.storage, args.seed)
+
+    report = {
+        'started': started.isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'storage': args.storage,
+        'durable_writes': DURABLE_WRITES,
+        'parallel_rows': args.parallel_rows,
+        'parallel_workers': scan_workers(),
+        'sizes': args.sizes,
+        'seed': args.seed,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    regressions = print_results(results, baseline)
+    print(f"Результаты сохранены в {output}")
+    if regressions:
+        print(f"Регрессии (p50 выше базы в {REGRESSION_RATIO} раза и более): "
+            f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,174 @@
+# src/primitive_db/aggregates.py
+
+import re
+
+from .instrument import timed
+from .joins import resolve_column
+from .rows import column_getter
+
+AGGREGATE_FUNCTIONS = ("count", "sum", "min", "max", "avg")
+
+_AGGREGATE_RE = re.compile(r"^(\w+)\s*\(\s*(\*|[\w.]+)\s*\)$")
+
+
+def parse_aggregates(select_list, columns, group_by=None):
+    """
+    Функция для разбора списка выражений select с агрегатными функциями
+
+    Параметры:
+        select_list - строка, выражения через запятую, например
+            "count(*), sum(age)"
+        columns - список, содержит столбцы таблицы из метаданных
+        group_by - строка, столбец группировки или None
+
+    Возвращает:
+        specs - список пар (функция, столбец): функция None обозначает
+            столбец группировки, столбец None - count(*)
+        group_by - строка, полное имя столбца группировки или None
+    """
+    col_types = {col['name']: col['type'] for col in columns}
+    if group_by is not None:
+        name = resolve_column(group_by, columns)
+        if name is None:
+            raise ValueError(f'Столбец группировки "{group_by}" не существует')
+        group_by = name
+
+    specs = []
+    for item in select_list.split(','):
+        item = item.strip()
+        if not item:
+            raise ValueError("Пустое выражение в списке select")
+
+        if group_by is not None and resolve_column(item, columns) == group_by:
+            specs.append((None, group_by))
+            continue
+
+        match = _AGGREGATE_RE.match(item)
+        if match is None:
+            raise ValueError(f"Некорректное выражение: {item}. Ожидается "
+                "агрегатная функция или столбец группировки")
+
+        func, column = match.group(1).lower(), match.group(2)
+        if func not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Неизвестная агрегатная функция: {func}. "
+                f"Допустимые функции: {', '.join(AGGREGATE_FUNCTIONS)}")
+        if column == '*':
+            if func != "count":
+                raise ValueError(f"{func}(*) не поддерживается")
+            specs.append((func, None))
+            continue
+
+        name = resolve_column(column, columns)
+        if name is None:
+            raise ValueError(f'Столбец "{column}" не существует')
+        if func in ("sum", "avg") and col_types[name] != "int":
+            raise ValueError(f'{func} применим только к столбцам типа int, '
+                f'"{name}" имеет тип {col_types[name]}')
+        column = name
+
+        specs.append((func, column))
+
+    return specs, group_by
+
+def aggregate_label(spec):
+    """
+    Функция для получения заголовка столбца результата
+
+    Параметры:
+        spec - пара (функция, столбец)
+    """
+    func, column = spec
+    if func is None:
+        return column
+    return f"{func}({column or '*'})"
+
+def _new_state(specs):
+    """
+    Функция для создания начального состояния агрегатов одной группы
+
+    Параметры:
+        specs - список пар (функция, столбец)
+    """
+    # count и sum накапливаются в числе, avg - в паре [сумма, количество]
+    state = []
+    for func, _ in specs:
+        if func in ("count", "sum"):
+            state.append(0)
+        elif func == "avg":
+            state.append([0, 0])
+        else:
+            state.append(None)
+    return state
+
+@timed("filter")
+def aggregate(records, specs, group_by=None):
+    """
+    Функция для вычисления агрегатов за один проход по записям
+
+    Для каждой группы хранится только состояние агрегатов, поэтому
+    записи можно передавать генератором без построения выборки в памяти.
+    Значения None не учитываются, кроме count(*)
+
+    Параметры:
+        records - итерируемый объект с записями
+        specs - список пар (функция, столбец) из parse_aggregates
+        group_by - строка, столбец группировки или None
+
+    Возвращает:
+        columns - список, содержит столбцы результата
+        rows - список, содержит словари строк результата
+    """
+    groups = {}
+    if group_by is None:
+        groups[None] = _new_state(specs)
+
+    steps = [(i, func, column) for i, (func, column) in enumerate(specs)
+        if func is not None]
+
+    # Позиции столбцов находятся один раз, пока не сменится вид записей
+    record_type = None
+    for record in records:
+        if type(record) is not record_type:
+            record_type = type(record)
+            get_key = column_getter(record_type, group_by)
+            getters = [(i, func, column_getter(record_type, column)
+                if column is not None else None) for i, func, column in steps]
+
+        key = get_key(record) if group_by is not None else None
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = _new_state(specs)
+
+        for i, func, getter in getters:
+            if getter is None:
+                state[i] += 1
+                continue
+            value = getter(record)
+            if value is None:
+                continue
+            if func == "count":
+                state[i] += 1
+            elif func == "sum":
+                state[i] += value
+            elif func == "avg":
+                state[i][0] += value
+                state[i][1] += 1
+            elif func == "min":
+                if state[i] is None or value < state[i]:
+                    state[i] = value
+            elif state[i] is None or value > state[i]:
+                state[i] = value
+
+    labels = [aggregate_label(spec) for spec in specs]
+    rows = []
+    for key, state in groups.items():
+        row = {}
+        for label, (func, _), value in zip(labels, specs, state):
+            if func is None:
+                value = key
+            elif func == "avg":
+                value = round(value[0] / value[1], 4) if value[1] else None
+            row[label] = value
+        rows.append(row)
+
+    return [{'name': label} for label in labels], rows
\ No newline at end of file
@@ -0,0 +1,174 @@
+# src/primitive_db/bulk.py
+
+import csv
+import json
+import os
+
+from .constrants import IMPORT_BATCH_SIZE
+from .core import build_record, iter_select
+from .decorators import handle_db_errors
+from .rows import record_getter, table_row_type
+
+
+def iter_source_rows(filepath, table_cols):
+    """
+    Генератор значений строк из CSV или JSONL файла
+
+    CSV файл должен начинаться со строки заголовка с именами столбцов,
+    каждая строка JSONL файла - объект с именами столбцов в качестве ключей.
+    Столбец ID в файле игнорируется, ID выделяются заново
+
+    Параметры:
+        filepath - строка, путь к файлу .csv или .jsonl
+        table_cols - список, содержит столбцы таблицы, первый из них - ID
+
+    Возвращает:
+        (line_number, values) - номер строки файла и список значений
+            в порядке столбцов таблицы без ID
+    """
+    col_names = [col['name'] for col in table_cols[1:]]
+    extension = os.path.splitext(filepath)[1].lower()
+
+    if extension == '.csv':
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            missing = [name for name in col_names
+                if name not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError("В заголовке CSV нет столбцов: "
+                    f"{', '.join(missing)}")
+            for row in reader:
+                yield reader.line_num, [row[name] for name in col_names]
+
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                try:
+                    yield line_number, [row[name] for name in col_names]
+                except KeyError as e:
+                    raise ValueError(f"Строка {line_number}: "
+                        f"нет значения для столбца {e}")
+
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла: {extension}. "
+            "Допустимые форматы: .csv, .jsonl")
+
+def iter_batches(rows, batch_size):
+    """
+    Генератор пачек строк фиксированного размера
+
+    Параметры:
+        rows - итерируемый объект со строками
+        batch_size - целое число, размер пачки
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@handle_db_errors
+def import_table(manager, table_name, filepath, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Функция для массовой загрузки записей в таблицу из CSV или JSONL файла
+
+    Файл читается потоково, каждая пачка проверяется по тем же правилам,
+    что и insert, получает непрерывный диапазон ID и записывается на диск
+    одной операцией журнала. Журнал сворачивается в снимок один раз после
+    загрузки, а не по мере роста после каждой пачки. При ошибке в пачке
+    она не записывается, а предыдущие пачки остаются сохраненными
+    в журнале
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+        table_name - строка, содержит имя таблицы
+        filepath - строка, путь к файлу .csv или .jsonl
+        batch_size - целое число, количество записей в пачке
+
+    Возвращает:
+        imported - целое число, количество загруженных записей
+    """
+    if table_name not in manager.metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    table_cols = manager.metadata[table_name]['columns']
+    imported = 0
+    compact = False
+
+    rows = iter_source_rows(filepath, table_cols)
+    for batch in iter_batches(rows, batch_size):
+        records = []
+        for line_number, values in batch:
+            try:
+                records.append(build_record(table_cols, values))
+            except ValueError as e:
+                raise ValueError(f"Строка {line_number}: {e} "
+                    f"Загружено записей до ошибки: {imported}.")
+
+        first_id = manager.allocate_ids(table_name, len(records))
+        for offset, record in enumerate(records):
+            record['ID'] = first_id + offset
+
+        manager.insert_records(table_name, records)
+        compact = manager.flush_table(table_name, defer_compact=True) or compact
+        imported += len(records)
+
+    if compact:
+        manager.compact_table(table_name)
+
+    return imported
+
+@handle_db_errors
+def export_table(table_data, columns, filepath, where_clause=None, indexes=None,
+    plan=None):
+    """
+    Функция для потоковой выгрузки записей таблицы в CSV или JSONL файл
+
+    Записи читаются из генератора выборки и пишутся в файл по одной,
+    полный результат в памяти не строится
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        columns - список, содержит столбцы таблицы
+        filepath - строка, путь к файлу .csv или .jsonl
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов
+        plan - Plan, план выполнения запроса
+
+    Возвращает:
+        exported - целое число, количество выгруженных записей
+    """
+    col_names = [col['name'] for col in columns]
+    extension = os.path.splitext(filepath)[1].lower()
+    records = iter_select(table_data, where_clause, indexes, plan=plan)
+    exported = 0
+    # Позиции столбцов находятся один раз на выгрузку
+    get_values = record_getter(table_row_type(table_data), col_names)
+
+    if extension == '.csv':
+        with open(filepath, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(col_names)
+            for record in records:
+                writer.writerow(get_values(record))
+                exported += 1
+
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(filepath, 'w', encoding='utf-8') as f:
+            for record in records:
+                row = dict(zip(col_names, get_values(record)))
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+                exported += 1
+
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла: {extension}. "
+            "Допустимые форматы: .csv, .jsonl")
+
+    return exported
\ No newline at end of file
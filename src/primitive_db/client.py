@@ -0,0 +1,221 @@
+# src/primitive_db/client.py
+
+import json
+import queue
+import socket
+from contextlib import contextmanager
+
+from .constrants import (
+    CLIENT_PIPELINE_DEPTH,
+    CLIENT_POOL_SIZE,
+    SERVER_HOST,
+    SERVER_PORT,
+)
+
+
+class ServerError(Exception):
+    """
+    Исключение, возникающее, если команда завершилась исключением на сервере
+    """
+
+
+class Connection:
+    """
+    Класс соединения с сервером базы данных
+
+    Несколько команд можно отправить одной записью в сокет и затем прочитать
+    ответы по порядку, не дожидаясь каждого ответа отдельно
+    """
+
+    def __init__(self, socket_path=None, host=SERVER_HOST, port=SERVER_PORT):
+        """
+        Параметры:
+            socket_path - строка, путь к Unix сокету, иначе используется TCP
+            host - строка, адрес TCP сервера
+            port - целое число, порт TCP сервера
+        """
+        if socket_path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(socket_path)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile('rb')
+        self._next_id = 0
+        self.closed = False
+
+    def execute_many(self, commands):
+        """
+        Метод для конвейерного выполнения команд
+
+        Запросы отправляются окнами, без ответа остается не больше
+        CLIENT_PIPELINE_DEPTH запросов. Пока клиент пишет запросы, он
+        не читает ответы, поэтому с неограниченным окном сервер с большими
+        ответами перестал бы читать запросы, и соединение бы зависло
+
+        Параметры:
+            commands - список, содержит строки команд
+
+        Возвращает:
+            outputs - список, содержит вывод каждой команды, после команды
+                exit соединение закрывается и остальные команды
+                не выполняются
+        """
+        requests = []
+        for command in commands:
+            self._next_id += 1
+            requests.append({'id': self._next_id, 'command': command})
+
+        # Все ответы читаются до проверки ошибок, чтобы в соединении
+        # не осталось непрочитанных ответов
+        responses = []
+        sent = 0
+        while len(responses) < len(requests):
+            window = requests[sent:len(responses) + CLIENT_PIPELINE_DEPTH]
+            if window:
+                self._socket.sendall(b''.join(json.dumps(request,
+                    ensure_ascii=False).encode() + b'\n' for request in window))
+                sent += len(window)
+
+            response = self._read_response(requests[len(responses)])
+            responses.append(response)
+            if response['closed']:
+                self.close()
+                break
+
+        for response in responses:
+            if not response['ok']:
+                raise ServerError(response['output'].strip())
+        return [response['output'] for response in responses]
+
+    def _read_response(self, request):
+        """
+        Метод для чтения ответа на запрос
+
+        Параметры:
+            request - словарь, содержит отправленный запрос
+
+        Возвращает:
+            response - словарь, содержит ответ сервера
+        """
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("Сервер закрыл соединение")
+
+        response = json.loads(line)
+        if response['id'] != request['id']:
+            self.close()
+            raise ConnectionError("Ответ сервера не соответствует запросу")
+        return response
+
+    def execute(self, command):
+        """
+        Метод для выполнения одной команды
+
+        Параметры:
+            command - строка, содержит команду
+
+        Возвращает:
+            output - строка, вывод команды
+        """
+        return self.execute_many([command])[0]
+
+    def close(self):
+        """
+        Метод для закрытия соединения
+        """
+        if not self.closed:
+            self.closed = True
+            self._file.close()
+            self._socket.close()
+
+
+class Client:
+    """
+    Класс клиента базы данных с пулом соединений
+
+    Соединения создаются по мере необходимости и возвращаются в пул после
+    выполнения команды, в пуле хранится не больше pool_size соединений.
+    Клиентом можно пользоваться из нескольких потоков
+
+    Пример:
+        client = Client(socket_path="/tmp/db.sock")
+        print(client.execute("select from users where age > 30"))
+        client.close()
+    """
+
+    def __init__(self, socket_path=None, host=SERVER_HOST, port=SERVER_PORT,
+        pool_size=CLIENT_POOL_SIZE):
+        """
+        Параметры:
+            socket_path - строка, путь к Unix сокету, иначе используется TCP
+            host - строка, адрес TCP сервера
+            port - целое число, порт TCP сервера
+            pool_size - целое число, количество хранимых соединений
+        """
+        self._address = {'socket_path': socket_path, 'host': host, 'port': port}
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    @contextmanager
+    def connection(self):
+        """
+        Контекстный менеджер для получения соединения из пула
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = Connection(**self._address)
+
+        try:
+            yield conn
+        except (ConnectionError, OSError, ValueError):
+            conn.close()
+            raise
+        finally:
+            if not conn.closed:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    def execute(self, command):
+        """
+        Метод для выполнения одной команды
+
+        Параметры:
+            command - строка, содержит команду
+
+        Возвращает:
+            output - строка, вывод команды
+        """
+        with self.connection() as conn:
+            return conn.execute(command)
+
+    def execute_many(self, commands):
+        """
+        Метод для конвейерного выполнения команд по одному соединению
+
+        Параметры:
+            commands - список, содержит строки команд
+
+        Возвращает:
+            outputs - список, содержит вывод каждой команды
+        """
+        with self.connection() as conn:
+            return conn.execute_many(commands)
+
+    def close(self):
+        """
+        Метод для закрытия всех соединений пула
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,185 @@
+# src/primitive_db/columnar.py
+
+import json
+import struct
+from array import array
+
+from .rows import column_getter, row_type, table_row_type
+
+COLUMNAR_MAGIC = b"PDBCOL1\n"
+
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def _encode_int_column(values):
+    """
+    Функция для кодирования столбца int в массив 64-битных чисел
+
+    Параметры:
+        values - список, содержит значения столбца
+    """
+    return array('q', values).tobytes()
+
+def _decode_int_column(raw, count, start=0, stop=None):
+    """
+    Функция для декодирования столбца int
+
+    Параметры:
+        raw - байты секции столбца
+        count - целое число, количество записей
+        start, stop - целые числа, диапазон декодируемых записей,
+            по умолчанию весь столбец
+    """
+    stop = count if stop is None else stop
+    column = array('q')
+    column.frombytes(raw[start * column.itemsize:stop * column.itemsize])
+    return column.tolist()
+
+def _encode_bool_column(values):
+    """
+    Функция для кодирования столбца bool в битовую карту
+
+    Параметры:
+        values - список, содержит значения столбца
+    """
+    bitmap = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+def _decode_bool_column(raw, count, start=0, stop=None):
+    """
+    Функция для декодирования столбца bool из битовой карты
+
+    Параметры:
+        raw - байты секции столбца
+        count - целое число, количество записей
+        start, stop - целые числа, диапазон декодируемых записей,
+            по умолчанию весь столбец
+    """
+    stop = count if stop is None else stop
+    return [bool(raw[i >> 3] & (1 << (i & 7))) for i in range(start, stop)]
+
+def _encode_str_column(values):
+    """
+    Функция для кодирования столбца str в массив смещений и общий блок UTF-8
+
+    Параметры:
+        values - список, содержит значения столбца
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = array('Q', [0])
+    total = 0
+    for item in encoded:
+        total += len(item)
+        offsets.append(total)
+    return offsets.tobytes() + b''.join(encoded)
+
+def _decode_str_column(raw, count, start=0, stop=None):
+    """
+    Функция для декодирования столбца str
+
+    Параметры:
+        raw - байты секции столбца
+        count - целое число, количество записей
+        start, stop - целые числа, диапазон декодируемых записей,
+            по умолчанию весь столбец
+    """
+    stop = count if stop is None else stop
+    offsets = array('Q')
+    offsets.frombytes(raw[start * offsets.itemsize:(stop + 1) * offsets.itemsize])
+    blob = raw[(count + 1) * offsets.itemsize:]
+    return [str(blob[offsets[i]:offsets[i + 1]], 'utf-8')
+        for i in range(stop - start)]
+
+
+COLUMN_CODECS = {
+    'int': (_encode_int_column, _decode_int_column),
+    'bool': (_encode_bool_column, _decode_bool_column),
+    'str': (_encode_str_column, _decode_str_column),
+}
+
+def encode_table(columns, table_data):
+    """
+    Функция для кодирования таблицы в колоночный формат
+
+    Файл состоит из сигнатуры, длины и JSON заголовка с количеством записей
+    и расположением секций, за которыми идут секции столбцов
+
+    Параметры:
+        columns - список, содержит столбцы таблицы из метаданных
+        table_data - список, содержит записи или словари с данными таблицы
+
+    Возвращает:
+        raw - байты таблицы в колоночном формате
+    """
+    sections = []
+    layout = []
+    offset = 0
+    record_type = table_row_type(table_data)
+
+    for col in columns:
+        values = list(map(column_getter(record_type, col['name']), table_data))
+        encode = COLUMN_CODECS[col['type']][0]
+        try:
+            section = encode(values)
+        except (TypeError, OverflowError, AttributeError):
+            raise ValueError(f'Столбец "{col["name"]}" содержит значения, '
+                f'не соответствующие типу {col["type"]}')
+        layout.append({'name': col['name'], 'type': col['type'],
+            'offset': offset, 'length': len(section)})
+        sections.append(section)
+        offset += len(section)
+
+    header = json.dumps({'rows': len(table_data), 'columns': layout}).encode()
+    return b''.join([COLUMNAR_MAGIC, _HEADER_SIZE.pack(len(header)), header,
+        *sections])
+
+def read_header(raw):
+    """
+    Функция для чтения заголовка таблицы в колоночном формате
+
+    Параметры:
+        raw - байты таблицы в колоночном формате или отображение файла
+
+    Возвращает:
+        header - словарь с количеством записей (rows) и расположением
+            секций столбцов (columns)
+        position - целое число, начало первой секции
+    """
+    if raw[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC:
+        raise ValueError("Файл таблицы не в колоночном формате.")
+
+    position = len(COLUMNAR_MAGIC)
+    (header_size,) = _HEADER_SIZE.unpack_from(raw, position)
+    position += _HEADER_SIZE.size
+    header = json.loads(bytes(raw[position:position + header_size]))
+    return header, position + header_size
+
+def decode_table(raw):
+    """
+    Функция для декодирования таблицы из колоночного формата
+
+    Параметры:
+        raw - байты таблицы в колоночном формате
+
+    Возвращает:
+        table_data - список, содержит записи (Row) с данными таблицы
+    """
+    header, position = read_header(raw)
+
+    # Секции читаются через memoryview, чтобы не копировать байты
+    raw = memoryview(raw)
+
+    count = header['rows']
+    names = []
+    values = []
+    for col in header['columns']:
+        start = position + col['offset']
+        section = raw[start:start + col['length']]
+        decode = COLUMN_CODECS[col['type']][1]
+        names.append(col['name'])
+        values.append(decode(section, count))
+
+    return list(map(row_type(names), zip(*values)))
\ No newline at end of file
@@ -3,4 +3,53 @@
 DATA_TYPES = {"int", "str", "bool"}
 
 DB_INFO_DATAPATH = "db_meta.json"
-TABLES_DATAPATH = "data/"
\ No newline at end of file
+TABLES_DATAPATH = "data/"
+
+STORAGE_FORMATS = {"json": ".json", "columnar": ".col", "mapped": ".bin"}
+DEFAULT_STORAGE_FORMAT = "json"
+
+STORAGE_BACKENDS = ("files", "sqlite")
+STORAGE_BACKEND = "files"
+SQLITE_DATAPATH = "data/tables.sqlite3"
+
+LOG_COMPACT_SIZE = 1024 * 1024
+
+DURABLE_WRITES = True
+
+LOCK_TIMEOUT_MS = 5000
+LOCK_BACKOFF_MS = 1
+LOCK_MAX_BACKOFF_MS = 100
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5544
+CLIENT_POOL_SIZE = 4
+CLIENT_PIPELINE_DEPTH = 32
+
+FLUSH_POLICIES = ("command", "interval", "exit")
+FLUSH_POLICY = "command"
+FLUSH_INTERVAL_MS = 1000
+
+SELECT_CACHE_SIZE = 128
+PREDICATE_CODE_CACHE_SIZE = 256
+
+IMPORT_BATCH_SIZE = 10000
+INDEX_UPDATE_BATCH = 64
+INDEX_MAX_GAPS = 4096
+
+PAGE_SIZE = 20
+
+SORT_RUN_SIZE = 100000
+
+JOIN_MEMORY_ROWS = 100000
+JOIN_PARTITIONS = 16
+
+PARALLEL_SCAN_ROWS = 200000
+PARALLEL_SCAN_WORKERS = 0
+PARALLEL_SCAN_CHUNKS = 4
+
+STATS_SAMPLE_SIZE = 10000
+STATS_REFRESH_RATIO = 0.2
+
+INSTRUMENTATION = True
+SPAN_BUFFER_SIZE = 10000
+PROFILE_TOP = 20
\ No newline at end of file
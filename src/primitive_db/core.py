@@ -1,15 +1,31 @@
 # src/primitive_db/core.py
 
-import os
+import re
+from itertools import islice
 
 from prettytable import PrettyTable
 
-from .constrants import DATA_TYPES, TABLES_DATAPATH
-from .decorators import confirm_action, create_cacher, handle_db_errors, log_time
+from .constrants import (
+    DATA_TYPES,
+    SELECT_CACHE_SIZE,
+    STORAGE_BACKEND,
+    STORAGE_BACKENDS,
+    STORAGE_FORMATS,
+)
+from .decorators import confirm_action, create_cacher, handle_db_errors
+from .indexes import INDEX_TYPES
+from .instrument import timed
+from .parallel import parallel_positions
+from .planner import PARALLEL_SCAN, plan_query
+from .predicates import as_predicate
+from .rows import column_getter, record_getter, table_row_type
+from .storage import table_backend
+from .utils import table_format
 
 
 @handle_db_errors
-def create_table(metadata, table_name, columns):
+def create_table(metadata, table_name, columns, storage_format="json",
+    backend=STORAGE_BACKEND):
     """
     Функция для создания таблицы
 
@@ -17,9 +33,30 @@ def create_table(metadata, table_name, columns):
         metadata - словарь, содержит текущие метаданные
         table_name - стркоа, содержит имя таблицы
         columns - список, содержит список столбцов
+        storage_format - строка, формат хранения: json, columnar или mapped
+        backend - строка, хранилище таблицы: files или sqlite
     """
     if table_name in metadata:
         raise ValueError(f'Таблица "{table_name}" уже существует.')
+
+    # Точка разделяет имя таблицы и столбца в соединении и имя таблицы
+    # и номер поколения в именах файлов
+    if not re.fullmatch(r"\w+", table_name):
+        raise ValueError(f"Некорректное имя таблицы: {table_name}. Допустимы "
+            "буквы, цифры и символ подчеркивания")
+    
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат хранения: {storage_format}. "
+            f"Допустимые форматы: {', '.join(STORAGE_FORMATS)}")
+
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Неизвестное хранилище: {backend}. "
+            f"Допустимые хранилища: {', '.join(STORAGE_BACKENDS)}")
+
+    # Формат хранения определяет только файлы таблицы
+    if backend != "files" and storage_format != "json":
+        raise ValueError(f"Формат хранения {storage_format} доступен только "
+            "для хранилища files")
     
     parsed_cols = []
     user_defined_id = False
@@ -51,7 +88,10 @@ def create_table(metadata, table_name, columns):
     if not user_defined_id:
         parsed_cols.insert(0, {'name': 'ID', 'type': 'int'})
     
-    metadata[table_name] = {'columns': parsed_cols}
+    metadata[table_name] = {'columns': parsed_cols, 'next_id': 1,
+        'format': storage_format}
+    if backend != "files":
+        metadata[table_name]['backend'] = backend
     
     return metadata
 
@@ -68,16 +108,65 @@ def drop_table(metadata, table_name):
     if table_name not in metadata:
         raise ValueError(f'Таблица "{table_name}" не существует.')
 
-    table_datapath = os.path.join(TABLES_DATAPATH, f"{table_name}.json")
-    try:
-        if os.path.exists(table_datapath):
-            os.remove(table_datapath)
-    except OSError as e:
-        print(f"Ошибка: не удалось удалить файл для таблицы {table_name}: {e}")
-    
+    # Данные таблицы удаляются менеджером после записи метаданных
     del metadata[table_name]
     return metadata
 
+@handle_db_errors
+def create_index(metadata, table_name, column, kind="hash"):
+    """
+    Функция для создания индекса по столбцу таблицы
+
+    Параметры:
+        metadata - словарь, содержит текущие метаданные
+        table_name - стркоа, содержит имя таблицы
+        column - строка, содержит имя столбца
+        kind - строка, тип индекса: hash или sorted
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    table_columns = [col['name'] for col in metadata[table_name]['columns']]
+    if column not in table_columns:
+        raise ValueError(f'Столбец "{column}" не существует '
+            f'в таблице "{table_name}"')
+
+    if column == 'ID':
+        raise ValueError("Столбец ID уже проиндексирован как первичный ключ.")
+
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Неподдерживаемый тип индекса: {kind}. "
+            f"Допустимые типы: {', '.join(INDEX_TYPES)}")
+
+    indexes = metadata[table_name].setdefault('indexes', {})
+    if column in indexes:
+        raise ValueError(f'Индекс по столбцу "{column}" уже существует.')
+
+    indexes[column] = kind
+    return metadata
+
+@handle_db_errors
+def drop_index(metadata, table_name, column):
+    """
+    Функция для удаления индекса по столбцу таблицы
+
+    Параметры:
+        metadata - словарь, содержит текущие метаданные
+        table_name - стркоа, содержит имя таблицы
+        column - строка, содержит имя столбца
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    indexes = metadata[table_name].get('indexes', {})
+    if column not in indexes:
+        raise ValueError(f'Индекс по столбцу "{column}" не существует.')
+
+    del indexes[column]
+    if not indexes:
+        del metadata[table_name]['indexes']
+    return metadata
+
 def list_tables(metadata):
     """
     Функция для вывода названий созданных таблиц
@@ -93,23 +182,48 @@ def list_tables(metadata):
         print("Нет созданных таблиц.")
 
 @handle_db_errors
-def insert(metadata, table_name, values):
+def insert(metadata, table_name, rows):
     """
     Функция для получения новых записей в таблицу
     
+    Все строки проверяются до добавления: при ошибке в любой из них
+    не добавляется ни одна запись
+    
     Параметры:
         metadata - словарь, содержит текущие метаданные
         table_name - стркоа, содержит имя таблицы
-        values - список, содержит значения
+        rows - список, содержит списки значений для каждой записи
         
     Возвращает:
-        new_record - словарь, содержащий новую запись
+        new_records - список, содержит словари новых записей без ID
     """
     if table_name not in metadata:
         raise ValueError(f'Таблица "{table_name}" не существует.')
     
     table_cols = metadata[table_name]['columns']
+    if len(rows) == 1:
+        return [build_record(table_cols, rows[0])]
     
+    new_records = []
+    for number, values in enumerate(rows, start=1):
+        try:
+            new_records.append(build_record(table_cols, values))
+        except ValueError as e:
+            raise ValueError(f"Строка {number}: {e}")
+    
+    return new_records
+
+def build_record(table_cols, values):
+    """
+    Функция для проверки значений и приведения их к типам столбцов
+    
+    Параметры:
+        table_cols - список, содержит столбцы таблицы, первый из них - ID
+        values - список, содержит значения всех столбцов, кроме ID
+        
+    Возвращает:
+        new_record - словарь, содержащий новую запись без ID
+    """
     if len(values) != len(table_cols) - 1:
         raise ValueError(
             f"Неверное количество значений. Ожидается {len(table_cols)-1}, "
@@ -122,7 +236,15 @@ def insert(metadata, table_name, values):
         value = values[i-1]
         
         try:
+            # Значения JSONL приходят с типами JSON: null не становится
+            # строкой "None", а дробное число не обрезается до целого
+            if value is None:
+                raise ValueError('Пустое значение')
+
             if col_type == 'int':
+                if isinstance(value, bool) or \
+                    isinstance(value, float) and not value.is_integer():
+                    raise ValueError(f'Недопустимое значение для int: {value}')
                 new_record[col_name] = int(value)
 
             elif col_type == 'str':
@@ -140,8 +262,10 @@ def insert(metadata, table_name, values):
                         new_record[col_name] = False
                     else:
                         raise ValueError(f'Недопустимое значение для bool: {value}')
+                elif isinstance(value, bool):
+                    new_record[col_name] = value
                 else:
-                    new_record[col_name] = bool(value)
+                    raise ValueError(f'Недопустимое значение для bool: {value}')
         except (ValueError, TypeError):
             raise ValueError(
                 f'Некорректное значение для столбца {col_name}: {value}. '
@@ -151,79 +275,198 @@ def insert(metadata, table_name, values):
 
 @handle_db_errors
 @confirm_action("удаление записей")
-def delete(table_data, where_clause):
+@timed("filter")
+def delete(table_data, where_clause, indexes=None, plan=None):
     """
     Функция для удаления данных из таблицы
     
     Параметры:
-        table_data - список, содержит словари с данными таблиц
-        where_clause - словарь, содержит условием фильтрации
+        table_data - список, содержит записи таблицы
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов,
+            они обновляются под данные после удаления
+        plan - Plan, план выполнения запроса
         
     Возвращает:
         new_data - список, содержит данные после удаления
-        amount_deleted - целое число, содержит количество удаленных записей
+        deleted_ids - список, содержит ID удаленных записей
     """
+    where_clause = as_predicate(where_clause)
     if not where_clause:
-        return [], len(table_data)
+        get_id = column_getter(table_row_type(table_data), 'ID')
+        for index in (indexes or {}).values():
+            index.build([])
+        return [], [get_id(record) for record in table_data]
     
-    new_data = []
-    amount_deleted = 0
+    deleted = []
+    deleted_ids = []
     
-    for record in table_data:
-        match = True
-        for column, value in where_clause.items():
-            if column not in record or record[column] != value:
-                match = False
-                break
-        
-        if match:
-            amount_deleted += 1
-        else:
-            new_data.append(record)
+    for position, record in scan(table_data, where_clause, indexes, plan):
+        deleted.append((position, record))
+        deleted_ids.append(record.get('ID'))
+    
+    if not deleted:
+        return table_data, deleted_ids
+    
+    # Из индексов удаляются только удаленные записи, позиции следующих
+    # сдвигаются без чтения записей
+    deleted.sort(key=lambda item: item[0])
+    for column, index in (indexes or {}).items():
+        index.delete_positions([(position, record.get(column))
+            for position, record in deleted])
+    deleted_positions = {position for position, _ in deleted}
+    
+    # Отображенная таблица удаляет строки по позициям без декодирования
+    if hasattr(table_data, 'delete_positions'):
+        table_data.delete_positions(deleted_positions)
+        return table_data, deleted_ids
     
-    return new_data, amount_deleted
+    new_data = [record for position, record in enumerate(table_data)
+        if position not in deleted_positions]
+    
+    return new_data, deleted_ids
 
 @handle_db_errors
-def update(table_data, set_clause, where_clause):
+@timed("filter")
+def update(table_data, set_clause, where_clause, indexes=None, plan=None):
     """
     Функция для обновления данных в таблице
     
     Параметры:
-        table_data - список, содержит словари с данными таблиц
+        table_data - список, содержит записи таблицы
         set_clause - словарь, содержит новое значение
-        where_clause - словарь, содержит условием фильтрации
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов
+        plan - Plan, план выполнения запроса
         
     Возвращает:
         table_data - список, содержит обновленные данные таблиц
-        amount_updated - целое число, содержить количество обновленных записей
+        updated_ids - список, содержит ID обновленных записей
     """
-    amount_updated = 0
+    if 'ID' in set_clause:
+        # ID - первичный ключ: по нему журнал находит записи, а индекс
+        # и последовательность ID считают его неизменным
+        raise ValueError('Столбец "ID" нельзя изменить')
     
-    for record in table_data:
-        match = True
-        for column, value in where_clause.items():
-            if column not in record or record[column] != value:
-                match = False
-                break
-        if match:
-            amount_updated += 1
-            for column, new_value in set_clause.items():
-                if column in record:
-                    record[column] = new_value
+    updated_ids = []
+    indexes = indexes or {}
     
-    return table_data, amount_updated
+    # Список позиций строится до изменений, чтобы не сбить обход индекса
+    for position, record in list(scan(table_data, where_clause, indexes, plan)):
+        # Записи неизменяемы, поэтому измененная запись заменяет старую
+        # по позиции, отображенная таблица тоже запоминает замену
+        updated_ids.append(record.get('ID'))
+        for column, new_value in set_clause.items():
+            index = indexes.get(column)
+            if index is not None:
+                index.remove(record.get(column), position)
+                index.add(new_value, position)
+        table_data[position] = record.replace(set_clause)
+    
+    return table_data, updated_ids
+
+def scan(table_data, where_clause, indexes=None, plan=None):
+    """
+    Генератор записей, удовлетворяющих условию where
+
+    Записи выбираются согласно плану: через индекс, полным или
+    параллельным просмотром.
+    Без переданного плана он строится без статистики таблицы. Количество
+    просматриваемых записей сохраняется в plan.examined
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов
+        plan - Plan, план выполнения запроса
+
+    Возвращает:
+        (position, record) - позиция записи в таблице и сама запись
+    """
+    where_clause = as_predicate(where_clause)
+    if plan is None:
+        plan = plan_query(where_clause, indexes, None, len(table_data))
+
+    if plan.access == PARALLEL_SCAN and where_clause is not None:
+        # Условие уже проверено рабочими процессами, при неудаче
+        # просмотр выполняется последовательно
+        key, columns = plan.source
+        positions = parallel_positions(table_data, where_clause, columns, key)
+        if positions is not None:
+            plan.examined = len(table_data)
+            for position in positions:
+                yield position, table_data[position]
+            return
+
+    positions = plan.positions(indexes)
+    if positions is None:
+        plan.examined = len(table_data)
+        candidates = enumerate(table_data)
+    else:
+        plan.examined = len(positions)
+        candidates = ((position, table_data[position]) for position in positions)
+
+    if where_clause is None:
+        yield from candidates
+        return
+
+    # Условие скомпилировано в одну функцию до начала просмотра, для записей
+    # схемы столбцы в ней заменены позициями
+    fields = getattr(table_row_type(table_data), 'fields', None)
+    match = where_clause.match if fields is None else where_clause.bind(fields)
+    for position, record in candidates:
+        if match(record):
+            yield position, record
+
+def iter_select(table_data, where_clause=None, indexes=None, limit=None, offset=0,
+    plan=None):
+    """
+    Генератор записей выборки с поддержкой limit и offset, записи
+    отдаются по одной без построения полного результата
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов
+        limit - целое число, максимальное количество записей, None - все
+        offset - целое число, количество пропускаемых записей
+        plan - Plan, план выполнения запроса
+    """
+    if limit is not None and plan is not None:
+        # Параллельный просмотр проверяет всю таблицу, а последовательный
+        # останавливается после limit записей
+        plan = plan.sequential()
+    if where_clause or plan is not None:
+        records = (record for _, record in
+            scan(table_data, where_clause, indexes, plan))
+    else:
+        records = iter(table_data)
+
+    stop = None if limit is None else offset + limit
+    return islice(records, offset, stop)
 
-select_cache, clear_select_cache = create_cacher()
+select_cache, invalidate_select_cache, select_cache_info = \
+    create_cacher(SELECT_CACHE_SIZE)
 
 @handle_db_errors
-@log_time
-def select(table_data, where_clause=None):
+@timed("filter")
+def select(table_data, where_clause=None, indexes=None,
+    table_name=None, version=0, plan=None):
     """
     Функция для выборки данных из таблицы
+
+    Результат кэшируется по ключу (таблица, версия таблицы, условие),
+    без имени таблицы выборка не кэшируется. Кэш общий для всех сессий
+    процесса, поэтому версия должна включать сессию, как ключ
+    TableManager.version_key
     
     Параметры:
-        table_data - список, содержит словари с данными таблиц
-        where_clause - словарь, содержит условием фильтрации
+        table_data - список, содержит записи таблицы
+        where_clause - Predicate или словарь, содержит условие фильтрации
+        indexes - словарь, содержит индексы таблицы по именам столбцов
+        table_name - стркоа, содержит имя таблицы
+        version - версия данных таблицы, число или кортеж
+        plan - Plan, план выполнения запроса
         
     Возвращает:
         filtered_data - список, содержит отфильтрованные данные
@@ -231,27 +474,21 @@ def select(table_data, where_clause=None):
     if not table_data:
         return []
     
+    where_clause = as_predicate(where_clause)
     if where_clause is None:
-        cache_key = "all_records"
+        predicate_key = "all_records"
     else:
-        cache_key = str(sorted(where_clause.items()))
+        predicate_key = where_clause.key
     
     def fetch_data():
         if where_clause is None:
             return table_data
-        filtered_data = []
-        for record in table_data:
-            match = True
-            for column, value in where_clause.items():
-                if column not in record or record[column] != value:
-                    match = False
-                    break
-            
-            if match:
-                filtered_data.append(record)
-        
-        return filtered_data
-    return select_cache(cache_key, fetch_data)
+        return [record for _, record in
+            scan(table_data, where_clause, indexes, plan)]
+    
+    if table_name is None:
+        return fetch_data()
+    return select_cache((table_name, version, predicate_key), fetch_data)
 
 def print_table_info(metadata, table_name, table_data):
     """
@@ -260,7 +497,7 @@ def print_table_info(metadata, table_name, table_data):
     Параметры:
         metadata - словарь, содержит текущие метаданные
         table_name - стркоа, содержит имя таблицы
-        table_data - список, содержит словари с данными таблиц
+        table_data - список, содержит записи таблицы
     """
     if table_name not in metadata:
         raise ValueError(f'Таблица "{table_name}" не существует.')
@@ -269,15 +506,48 @@ def print_table_info(metadata, table_name, table_data):
     columns_str = ', '.join(f"{col['name']}:{col['type']}" for col in columns_info)
     count = len(table_data)
     
+    storage_format = table_format(metadata[table_name])
+    backend = table_backend(metadata[table_name]).kind
+    
     print(f'Таблица: {table_name}\nСтолбцы: {columns_str}\n'
-        f'Количество записей: {count}')
+        f'Количество записей: {count}\nФормат хранения: {storage_format}\n'
+        f'Хранилище: {backend}')
+    
+    indexes = metadata[table_name].get('indexes')
+    if indexes:
+        indexes_str = ', '.join(f"{column}({kind})"
+            for column, kind in indexes.items())
+        print(f'Индексы: {indexes_str}')
 
+@timed("render")
+def print_plan(table_name, plan, found):
+    """
+    Функция для вывода плана выполнения запроса
+
+    Параметры:
+        table_name - строка, содержит имя таблицы
+        plan - Plan, выполненный план
+        found - целое число, количество найденных записей
+    """
+    print(f'План запроса к таблице "{table_name}": {plan.describe()}')
+    print(f'Оценка просмотренных записей: {plan.estimated_rows} из {plan.rows}')
+    print(f'Фактически просмотрено записей: {plan.examined}')
+    print(f'Найдено записей: {found}')
+
+    if len(plan.alternatives) > 1:
+        print("Рассмотренные варианты:")
+        for alternative in sorted(plan.alternatives,
+            key=lambda item: item.cost):
+            print(f'  {alternative.describe()}: оценка '
+                f'{alternative.estimated_rows}, стоимость {alternative.cost:g}')
+
+@timed("render")
 def display_table(table_data, columns):
     """
     Функция для вывода содержимого таблицы
 
     Параметры:
-        table_data - список, содержит словари с данными таблиц
+        table_data - список, содержит записи таблицы
         columns - список, содержит столбцы таблицы
     """
     if not table_data:
@@ -288,12 +558,48 @@ def display_table(table_data, columns):
     
     table.field_names = [col['name'] for col in columns]
     
+    # Позиции столбцов находятся один раз для каждого вида записей:
+    # в выводе соединений записи - словари
+    getters = {}
     for record in table_data:
-        row = []
-        for col in columns:
-            col_name = col['name']
-            value = record.get(col_name, '')
-            row.append(value)
-        table.add_row(row)
-    
-    print(table)
\ No newline at end of file
+        record_type = type(record)
+        getter = getters.get(record_type)
+        if getter is None:
+            getter = getters[record_type] = record_getter(record_type,
+                table.field_names, '')
+        table.add_row(list(getter(record)))
+    
+    print(table)
+
+@timed("render")
+def display_table_paged(records, columns, page_size):
+    """
+    Функция для постраничного вывода записей, следующая страница
+    читается из генератора только после подтверждения пользователя
+
+    Параметры:
+        records - итерируемый объект с записями
+        columns - список, содержит столбцы таблицы
+        page_size - целое число, количество записей на странице
+
+    Возвращает:
+        shown - целое число, количество выведенных записей
+    """
+    records = iter(records)
+    shown = 0
+    page = list(islice(records, page_size))
+    
+    while page:
+        display_table(page, columns)
+        shown += len(page)
+        
+        page = list(islice(records, page_size))
+        if not page:
+            break
+        
+        response = input(f"-- Показано {shown} записей. Enter - следующая "
+            "страница, q - выход: ").strip().lower()
+        if response == 'q':
+            break
+    
+    return shown
\ No newline at end of file
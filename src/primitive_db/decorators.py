@@ -1,8 +1,24 @@
 # src/primitive_db/decorators.py
 
-import time
+import threading
+from collections import OrderedDict
 from functools import wraps
 
+# Ответ на подтверждение без вопроса пользователю: None - спрашивать,
+# True - подтверждать, False - отменять. Меняется режимом запуска
+_auto_confirm = None
+
+
+def set_auto_confirm(answer):
+    """
+    Функция для настройки автоматического ответа на подтверждения
+
+    Параметры:
+        answer - None - спрашивать пользователя, True - подтверждать,
+            False - отменять операции
+    """
+    global _auto_confirm
+    _auto_confirm = answer
 
 def handle_db_errors(func):
     """
@@ -40,51 +56,74 @@ def confirm_action(action_name):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            response = input('Вы уверены, что хотите '
-                f'выполнить "{action_name}"? [y/n]: ').strip().lower()
-            if response != 'y':
-                print("Операция отменена.")
+            if _auto_confirm is None:
+                response = input('Вы уверены, что хотите '
+                    f'выполнить "{action_name}"? [y/n]: ').strip().lower()
+                confirmed = response == 'y'
+            else:
+                confirmed = _auto_confirm
+
+            if not confirmed:
+                if _auto_confirm is False:
+                    print(f'Операция "{action_name}" отменена: для '
+                        'подтверждения запустите программу с --yes.')
+                else:
+                    print("Операция отменена.")
                 return None
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
-def log_time(func):
+def create_cacher(max_size=128):
     """
-    Декоратор для замера времени выполнения функции
-    
-    Параметры:
-        func - функция, для которой необходимо вернуть wrapper
-    """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.monotonic()
-        result = func(*args, **kwargs)
-        end_time = time.monotonic()
-        elapsed = end_time - start_time
-        print(f"Функция {func.__name__} выполнилась за {elapsed:.3f} секунд.")
-        return result
-    return wrapper
+    Функция с замыканием для кэширования с вытеснением давно
+    не использованных значений (LRU)
 
-def create_cacher():
-    """
-    Функция с замыканием для кэширования
+    Ключ кэша - кортеж, первый элемент которого задает группу (например,
+    имя таблицы), по которой значения можно сбросить выборочно. Кэшем
+    можно пользоваться из нескольких потоков
+
+    Параметры:
+        max_size - целое число, максимальное количество значений в кэше
 
     Возвращает:
         cache_result(key, value_func) - внутренняя функция, зранит кэш
-        clear_cache - внутренняя функция, очищает кэш
+        invalidate(group) - внутренняя функция, очищает кэш группы или весь кэш
+        cache_info - внутренняя функция, возвращает счетчики кэша
     """
-    cache = {}
+    cache = OrderedDict()
+    counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+    lock = threading.Lock()
     
     def cache_result(key, value_func):
-        if key in cache:
-            return cache[key]
+        with lock:
+            if key in cache:
+                counters['hits'] += 1
+                cache.move_to_end(key)
+                return cache[key]
+            counters['misses'] += 1
         
+        # Значение вычисляется без блокировки, чтобы не задерживать
+        # обращения других потоков
         result = value_func()
-        cache[key] = result
+        with lock:
+            cache[key] = result
+            cache.move_to_end(key)
+            if len(cache) > max_size:
+                cache.popitem(last=False)
+                counters['evictions'] += 1
         return result
     
-    def clear_cache():
-        cache.clear()
+    def invalidate(group=None):
+        with lock:
+            if group is None:
+                cache.clear()
+                return
+            for key in [key for key in cache if key[0] == group]:
+                del cache[key]
+    
+    def cache_info():
+        with lock:
+            return {**counters, 'size': len(cache), 'max_size': max_size}
     
-    return cache_result, clear_cache
\ No newline at end of file
+    return cache_result, invalidate, cache_info
\ No newline at end of file
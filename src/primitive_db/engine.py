@@ -1,21 +1,58 @@
 # src/primitive_db/engine.py
 
+import re
 import shlex
+from itertools import islice
 
+from .aggregates import aggregate, parse_aggregates
+from .bulk import export_table, import_table
+from .constrants import (
+    FLUSH_INTERVAL_MS,
+    FLUSH_POLICY,
+    PAGE_SIZE,
+    STORAGE_BACKEND,
+)
 from .core import (
-    clear_select_cache,
+    create_index,
     create_table,
     delete,
     display_table,
+    display_table_paged,
+    drop_index,
     drop_table,
     insert,
+    invalidate_select_cache,
+    iter_select,
     list_tables,
+    print_plan,
     print_table_info,
     select,
+    select_cache_info,
     update,
 )
-from .decorators import handle_db_errors
-from .utils import load_metadata, load_table_data, save_metadata, save_table_data
+from .decorators import handle_db_errors, set_auto_confirm
+from .instrument import (
+    command_span,
+    dump_stats,
+    profile_call,
+    reset_spans,
+    set_timing_report,
+    span,
+    span_summary,
+    timed,
+)
+from .joins import resolve_column, select_join
+from .predicates import coerce_literal, parse_predicate, tokenize
+from .sorting import order_records
+from .storage import table_backend
+from .table_manager import TableManager
+from .utils import write_stats
+
+# Команды, которые сразу пишут на диск и не могут быть отменены
+NON_TRANSACTIONAL_COMMANDS = ("drop_table", "import", "compact", "flush")
+
+# Слово команды: части в кавычках вместе с пробелами внутри них
+_RAW_ARG_RE = re.compile(r"""(?:"[^"]*"|'[^']*'|[^\s"']+)+""")
 
 
 def print_help():
@@ -25,341 +62,993 @@ def print_help():
     print("\n***База данных***")
     print("Функции:")
     print("<command> create_table <имя_таблицы> <столбец1:тип> "
-        "<столбец2:тип> .. - создать таблицу")
+        "<столбец2:тип> .. [format=json|columnar|mapped] - создать таблицу")
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
     print("<command> info <имя_таблицы> - информация о таблице")
+    print("<command> create_index <имя_таблицы> <столбец> [hash|sorted] "
+        "- создать индекс")
+    print("<command> drop_index <имя_таблицы> <столбец> - удалить индекс")
     print("\n***Операции с данными***")
     print("Функции:")
     print("<command> insert into <имя_таблицы> values (<значение1>, "
-        "<значение2>, ...) - создать запись.")
-    print("<command> select from <имя_таблицы> where <столбец> = <значение> "
+        "<значение2>, ...)[, (...), ...] - создать одну или несколько записей.")
+    print("<command> select from <имя_таблицы> where <условие> "
         "- прочитать записи по условию.")
     print("<command> select from <имя_таблицы> - прочитать все записи.")
+    print("<command> select ... [limit <N>] [offset <M>] - прочитать "
+        "не больше N записей, пропустив первые M.")
+    print("<command> select count(*), sum(<столбец>), min(<столбец>), "
+        "max(<столбец>), avg(<столбец>) from <имя_таблицы> [where <условие>] "
+        "[group by <столбец>] - вычислить агрегаты.")
+    print("<command> select ... [order by <столбец> [asc|desc]] - "
+        "упорядочить записи.")
+    print("<command> select from <таблица1> join <таблица2> on "
+        "<таблица1>.<столбец> = <таблица2>.<столбец> [where <условие>] "
+        "- соединить таблицы.")
+    print("<command> pager on [<размер>] | pager off - включить или "
+        "выключить постраничный вывод.")
+    print("<command> export <имя_таблицы> to <файл.csv|файл.jsonl> "
+        "[where <условие>] - выгрузить записи в файл.")
+    print("<command> import <имя_таблицы> from <файл.csv|файл.jsonl> "
+        "- загрузить записи из файла.")
     print("<command> update <имя_таблицы> set <столбец1> = <новое_значение1> "
-        "where <столбец_условия> = <значение_условия> - обновить запись.")
-    print("<command> delete from <имя_таблицы> where <столбец> = "
-        "<значение> - удалить запись.")
+        "where <условие> - обновить записи.")
+    print("<command> delete from <имя_таблицы> where <условие> "
+        "- удалить записи.")
     print("<command> info <имя_таблицы> - вывести информацию о таблице.")
+    print("<command> compact <имя_таблицы> - свернуть журнал изменений "
+        "в снимок таблицы.")
+    print("<command> flush - сохранить все изменения на диск.")
+    print("<command> cache_info - статистика кэша выборок.")
+    print("<command> io_stats - время и объем записи на диск.")
+    print("<command> stats [json <файл> | reset] - время выполнения команд "
+        "по фазам и статистика кэша, выгрузка в JSON или сброс.")
+    print("<command> profile cpu|memory <команда> - выполнить команду "
+        "под cProfile или tracemalloc.")
+    print("<command> explain select from <имя_таблицы> [where <условие>] "
+        "- показать план выполнения запроса.")
+    print("<command> analyze <имя_таблицы> - собрать статистику таблицы "
+        "для планировщика.")
+    print("\nУсловие: <столбец> =|!=|<|<=|>|>= <значение>, "
+        "<столбец> in (<значение1>, ...), <столбец> like '<шаблон>'; "
+        "условия объединяются через and, or и скобки.")
+    print("<command> begin - начать транзакцию.")
+    print("<command> commit - зафиксировать транзакцию.")
+    print("<command> rollback - отменить транзакцию.")
     print("\nОбщие команды:")
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация\n")
 
 @handle_db_errors
-def run():
+def run(flush_policy=FLUSH_POLICY, flush_interval_ms=FLUSH_INTERVAL_MS,
+    storage_backend=STORAGE_BACKEND, show_time=False):
     """
     Основной цикл программы
+
+    Параметры:
+        flush_policy - строка, политика сброса изменений на диск
+        flush_interval_ms - целое число, интервал сброса в миллисекундах
+        storage_backend - строка, хранилище новых таблиц
+        show_time - логическое значение, выводить время выполнения команд
     """
+    set_timing_report(show_time)
     print_help()
     
+    manager = TableManager(flush_policy, flush_interval_ms, storage_backend)
+    metadata = manager.metadata
+    
+    try:
+        command_loop(manager, metadata)
+    finally:
+        close_session(manager)
+
+@handle_db_errors
+def run_batch(lines, auto_confirm=False, show_time=False,
+    storage_backend=STORAGE_BACKEND):
+    """
+    Функция для выполнения скрипта команд без диалога с пользователем
+
+    Таблицы загружаются один раз, изменения всех команд сбрасываются
+    на диск одной операцией в конце скрипта
+
+    Параметры:
+        lines - итерируемый объект со строками команд
+        auto_confirm - логическое значение, подтверждать опасные операции,
+            иначе они отменяются
+        show_time - логическое значение, выводить время выполнения команд
+        storage_backend - строка, хранилище новых таблиц
+
+    Возвращает:
+        errors - целое число, количество команд, завершившихся исключением
+    """
+    set_auto_confirm(auto_confirm)
+    set_timing_report(show_time)
+    
+    manager = TableManager(flush_policy="exit",
+        storage_backend=storage_backend)
+    
+    try:
+        return run_script(manager, manager.metadata, lines)
+    finally:
+        close_session(manager)
+
+def close_session(manager):
+    """
+    Функция для завершения сессии, незавершенная транзакция отменяется
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+    """
+    if manager.in_transaction:
+        print("Незавершенная транзакция отменена.")
+    manager.close()
+
+def command_loop(manager, metadata):
+    """
+    Цикл чтения и выполнения команд
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+        metadata - словарь, содержит текущие метаданные
+    """
+    session = {'pager_size': None, 'interactive': True, 'refresh': True}
+    
     while True:
         try:
-            metadata = load_metadata()
+            manager.after_command()
             
             user_input = input(">>>Введите команду: ").strip()
             
-            if not user_input:
-                continue
-                
-            args = shlex.split(user_input)
-            command = args[0].lower()
-            
-            if command == "exit":
-                print("Выход из программы.")
+            if not execute_command(manager, metadata, user_input, session):
                 break
                 
-            elif command == "help":
-                print_help()
-                
-            elif command == "create_table":
-                if len(args) < 3:
-                    print("Ошибка: недостаточно аргументов. Формат: create_table "
-                        "<имя> <столбец1:тип> ...")
-                    continue
-                
-                table_name = args[1]
-                columns = args[2:]
-                
-                try:
-                    metadata = create_table(metadata, table_name, columns)
-
-                    if metadata is not None:
-                        save_metadata(metadata)
-                        table_info = ', '.join(f"{col['name']}:{col['type']}" \
-                            for col in metadata[table_name]['columns'])
-                        print(f'Таблица "{table_name}" успешно создана '
-                            f'со столбцами: {table_info}')
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
-
-            elif command == "drop_table":
-                if len(args) != 2:
-                    print("Ошибка: неверное количество аргументов. "
-                        "Формат: drop_table <имя_таблицы>")
-                    continue
-                
-                table_name = args[1]
-                
-                try:
-                    metadata = drop_table(metadata, table_name)
-
-                    if metadata is not None:
-                        save_metadata(metadata)
-                        print(f'Таблица "{table_name}" успешно удалена.')
-                    
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
-                    
-            elif command == "list_tables":
-                list_tables(metadata)
-
-            elif command == "insert":
-                if len(args) < 5 or args[1].lower() != "into" or \
-                    args[3].lower() != "values":
-                    print("Ошибка: некорректный формат команды. "
-                        "Формат: insert into <таблица> values (<значения>)")
-                    continue
-                
-                table_name = args[2]
-                
-                values_str = ' '.join(args[4:])
-                if not (values_str[0] == '(' and values_str[-1] == ')'):
-                    print("Ошибка: значения должны быть в скобках")
-                    continue
-                
-                values = [v.strip() for v in values_str[1:-1].split(',')]
-                
-                try:
-                    table_data = load_table_data(table_name)
-                    
-                    new_record = insert(metadata, table_name, values)
-
-                    if new_record is not None:
-                        if table_data:
-                            max_id = max(int(record.get('ID', 0)) 
-                                for record in table_data)
-                            new_id = max_id + 1
-                        else:
-                            new_id = 1
-                        
-                        new_record['ID'] = new_id
-                        table_data.append(new_record)
-                        
-                        save_table_data(table_name, table_data)
-
-                        clear_select_cache()
-                        
-                        print(f'Запись с ID={new_id} успешно добавлена '
-                            f'в таблицу "{table_name}".')
-                    
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
-
-            elif command == "delete":
-                if len(args) < 5 or args[1].lower() != "from" or \
-                    args[3].lower() != "where":
-                    print("Ошибка: некорректный формат команды. "
-                        "Формат: delete from <таблица> where <условие>")
-                    continue
-                
-                table_name = args[2]
-                
-                if table_name not in metadata:
-                    print(f'Ошибка: таблица "{table_name}" не существует.')
-                    continue
-                
-                where_str = ' '.join(args[4:])
-                
-                try:
-                    where_clause = parse_where(where_str)
-                    
-                    table_columns = [col['name'] for col in \
-                        metadata[table_name]['columns']]
-                    
-                    if where_clause:
-                        for column in where_clause.keys():
-                            if column not in table_columns:
-                                print(f'Ошибка: столбец "{column}" '
-                                    f'не существует в таблице "{table_name}"')
-                                continue
-                    else:
-                        print("Ошибка: некорректный формат команды. "
-                        "Формат: delete from <таблица> where <условие>")
-                        continue
-                    
-                    table_data = load_table_data(table_name)
-                    new_data, deleted_count = delete(table_data, where_clause)
-                    
-                    if new_data is not None:
-                        if deleted_count > 0:
-                            save_table_data(table_name, new_data)
-                            clear_select_cache()
-                            print(f'Удалено {deleted_count} '
-                                f'записей из таблицы "{table_name}".')
-                        else:
-                            print("Нет записей, соответствующих условию.")
-                        
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
-
-            elif command == "info":
-                if len(args) != 2:
-                    print("Ошибка: некорректный формат команды. "
-                        "Формат: info <таблица>")
-                    continue
-                
-                table_name = args[1]
-                
-                try:
-                    table_data = load_table_data(table_name)
-                    print_table_info(metadata, table_name, table_data)
-                    
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
-
-            elif command == "update":
-                if len(args) < 8 or args[2].lower() != "set" or \
-                    args[-4].lower() != "where":
-                    print(args[2].lower())
-                    print(args[-4].lower())
-                    print("here Ошибка: некорректный формат команды. "
-                        "Формат: update <таблица> set <столбец>=<значение> "
-                        "where <условие>")
-                    continue
-
-                table_name = args[1]
-                
-                if table_name not in metadata:
-                    print(f'Ошибка: таблица "{table_name}" не существует.')
-                    continue
-                
-                set_str = ' '.join(args[3:args.index("where")])
-                where_str = ' '.join(args[args.index("where") + 1:])
+        except (KeyboardInterrupt, EOFError):
+            print("\n\nВыход из программы.")
+            break
+        except Exception as e:
+            print(f"Произошла непредвиденная ошибка: {e}")
+
+def run_script(manager, metadata, lines):
+    """
+    Функция для выполнения команд из скрипта без диалога с пользователем
+
+    Пустые строки и строки, начинающиеся с # или --, пропускаются,
+    завершающая точка с запятой отбрасывается. Все команды работают
+    с таблицами, загруженными в память один раз
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+        metadata - словарь, содержит текущие метаданные
+        lines - итерируемый объект со строками команд
+
+    Возвращает:
+        errors - целое число, количество команд, завершившихся исключением
+    """
+    session = {'pager_size': None, 'interactive': False, 'refresh': True}
+    errors = 0
+    
+    for line in lines:
+        user_input = line.strip().rstrip(';').strip()
+        if not user_input or user_input.startswith(('#', '--')):
+            continue
+        
+        try:
+            if not execute_command(manager, metadata, user_input, session):
+                break
+        except Exception as e:
+            errors += 1
+            print(f"Произошла непредвиденная ошибка: {e}")
+        
+        manager.after_command()
+    
+    return errors
+
+def execute_command(manager, metadata, user_input, session):
+    """
+    Функция для выполнения одной команды
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+        metadata - словарь, содержит текущие метаданные
+        user_input - строка, содержит команду
+        session - словарь, содержит настройки сессии: размер страницы
+            постраничного вывода (pager_size), признак диалогового
+            режима (interactive) и признак проверки изменений на диске
+            перед командой (refresh)
+
+    Возвращает:
+        result - логическое значение, False после команды exit
+    """
+    if not user_input:
+        return True
+
+    with command_span(user_input.split(maxsplit=1)[0].lower()):
+        return _run_command(manager, metadata, user_input, session)
+
+def _run_command(manager, metadata, user_input, session):
+    """
+    Функция для разбора и выполнения непустой команды, параметры
+    и результат - как у execute_command
+    """
+    pager_size = session['pager_size']
+        
+    if session['refresh']:
+        with span("load"):
+            manager.refresh()
+
+    with span("parse"):
+        args = shlex.split(user_input)
+        # Лексемы с сохраненными кавычками для условий where и set
+        raw_args = split_raw(user_input)
+    command = args[0].lower()
+    
+    if manager.in_transaction and command in NON_TRANSACTIONAL_COMMANDS:
+        print(f'Ошибка: команда "{command}" недоступна внутри транзакции. '
+            "Завершите ее через commit или rollback.")
+        return True
+
+    if command == "exit":
+        print("Выход из программы.")
+        return False
+
+    elif command in ("begin", "commit", "rollback"):
+        if len(args) != 1:
+            print(f"Ошибка: команда {command} не принимает аргументов.")
+            return True
+
+        try:
+            if command == "begin":
+                manager.begin()
+                print("Транзакция начата.")
+            elif command == "commit":
+                tables = manager.commit()
+                print(f"Транзакция зафиксирована, изменено таблиц: "
+                    f"{len(tables)}.")
+            else:
+                tables = manager.rollback()
+                invalidate_select_cache()
+                print(f"Транзакция отменена, изменено таблиц: {len(tables)}.")
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+        
+    elif command == "help":
+        print_help()
+        
+    elif command == "create_table":
+        if len(args) < 3:
+            print("Ошибка: недостаточно аргументов. Формат: create_table "
+                "<имя> <столбец1:тип> ...")
+            return True
+        
+        table_name = args[1]
+        columns = args[2:]
+        storage_format = "json"
+        
+        if columns[-1].lower().startswith("format="):
+            storage_format = columns.pop().split("=", 1)[1].lower()
+        
+        try:
+            if create_table(metadata, table_name, columns, storage_format,
+                manager.storage_backend) is not None:
+                manager.mark_metadata_dirty(table_name)
+                table_info = ', '.join(f"{col['name']}:{col['type']}" \
+                    for col in metadata[table_name]['columns'])
+                print(f'Таблица "{table_name}" успешно создана '
+                    f'со столбцами: {table_info}')
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    elif command == "drop_table":
+        if len(args) != 2:
+            print("Ошибка: неверное количество аргументов. "
+                "Формат: drop_table <имя_таблицы>")
+            return True
+        
+        table_name = args[1]
+        
+        try:
+            table_meta = metadata.get(table_name)
+            if drop_table(metadata, table_name) is not None:
+                invalidate_select_cache(table_name)
+                manager.drop_table_data(table_name, table_meta)
+                print(f'Таблица "{table_name}" успешно удалена.')
+            
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            
+    elif command in ("create_index", "drop_index"):
+        if command == "create_index" and len(args) not in (3, 4) or \
+            command == "drop_index" and len(args) != 3:
+            print("Ошибка: некорректный формат команды. Формат: "
+                "create_index <таблица> <столбец> [hash|sorted] или "
+                "drop_index <таблица> <столбец>")
+            return True
+        
+        table_name = args[1]
+        column = args[2]
+        
+        if command == "create_index":
+            kind = args[3].lower() if len(args) == 4 else "hash"
+            result = create_index(metadata, table_name, column, kind)
+            message = f'Индекс {kind} по столбцу "{column}" создан.'
+        else:
+            result = drop_index(metadata, table_name, column)
+            message = f'Индекс по столбцу "{column}" удален.'
+        
+        if result is not None:
+            manager.reset_indexes(table_name)
+            manager.mark_metadata_dirty(table_name)
+            print(message)
+
+    elif command == "list_tables":
+        list_tables(metadata)
+
+    elif command == "insert":
+        if len(args) < 5 or args[1].lower() != "into" or \
+            args[3].lower() != "values":
+            print("Ошибка: некорректный формат команды. "
+                "Формат: insert into <таблица> values (<значения>)"
+                "[, (<значения>), ...]")
+            return True
+        
+        table_name = args[2]
+        
+        try:
+            rows = parse_values(' '.join(raw_args[4:]))
+            new_records = insert(metadata, table_name, rows)
+
+            if new_records is not None:
+                # Все записи получают непрерывный диапазон ID и попадают
+                # в журнал одной операцией
+                first_id = manager.allocate_ids(table_name, len(new_records))
+                for offset, new_record in enumerate(new_records):
+                    new_record['ID'] = first_id + offset
+                manager.insert_records(table_name, new_records)
+
+                invalidate_select_cache(table_name)
                 
-                try:
-                    set_clause = parse_set(set_str)
-                    where_clause = parse_where(where_str)
-                    
-                    table_columns = [col['name'] for col in \
-                        metadata[table_name]['columns']]
-                    
-                    for column in set_clause.keys():
-                        if column not in table_columns:
-                            print(f'Ошибка: столбец "{column}" не '
-                                f'существует в таблице "{table_name}"')
-                            continue
-                    
-                    for column in where_clause.keys():
-                        if column not in table_columns:
-                            print(f'Ошибка: столбец "{column}" не '
-                                f'существует в таблице "{table_name}"')
-                            continue
-                    
-                    table_data = load_table_data(table_name)
-                    updated_data, amount_updated = \
-                        update(table_data, set_clause, where_clause)
-                    
-                    if updated_data is not None:
-                        if amount_updated > 0:
-                            save_table_data(table_name, updated_data)
-                            clear_select_cache()
-                            print(f'Обновлено {amount_updated} '
-                                f'записей в таблице "{table_name}".')
-                        else:
-                            print("Нет записей, соответствующих условию.")
-                        
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
+                if len(new_records) == 1:
+                    print(f'Запись с ID={first_id} успешно добавлена '
+                        f'в таблицу "{table_name}".')
+                else:
+                    last_id = first_id + len(new_records) - 1
+                    print(f'Добавлено {len(new_records)} записей с ID='
+                        f'{first_id}..{last_id} в таблицу "{table_name}".')
+            
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    elif command == "import":
+        if len(args) != 4 or args[2].lower() != "from":
+            print("Ошибка: некорректный формат команды. "
+                "Формат: import <таблица> from <файл.csv|файл.jsonl>")
+            return True
+        
+        table_name = args[1]
+        filepath = args[3]
+        
+        imported = import_table(manager, table_name, filepath)
+        invalidate_select_cache(table_name)
+        
+        if imported is not None:
+            print(f'Загружено {imported} записей '
+                f'в таблицу "{table_name}".')
+
+    elif command == "pager":
+        if len(args) not in (2, 3) or args[1].lower() not in ("on", "off"):
+            print("Ошибка: некорректный формат команды. "
+                "Формат: pager on [<размер>] | pager off")
+            return True
+        
+        if args[1].lower() == "off":
+            session['pager_size'] = None
+            print("Постраничный вывод выключен.")
+            return True
+        
+        if not session['interactive']:
+            print("Ошибка: постраничный вывод доступен только в диалоговом "
+                "режиме.")
+            return True
+        
+        size = args[2] if len(args) == 3 else str(PAGE_SIZE)
+        if not size.isdigit() or int(size) == 0:
+            print("Ошибка: размер страницы должен быть "
+                "положительным целым числом.")
+            return True
+        
+        session['pager_size'] = int(size)
+        print(f"Постраничный вывод включен, {size} записей "
+            "на странице.")
+
+    elif command == "export":
+        if len(args) < 4 or args[2].lower() != "to" or \
+            len(args) > 4 and args[4].lower() != "where":
+            print("Ошибка: некорректный формат команды. Формат: export "
+                "<таблица> to <файл.csv|файл.jsonl> [where <условие>]")
+            return True
+        
+        table_name = args[1]
+        filepath = args[3]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        try:
+            where_clause = parse_where(' '.join(raw_args[5:]),
+                metadata[table_name]['columns'])
+        except ValueError as e:
+            print(f"Ошибка в условии WHERE: {e}")
+            return True
+        
+        exported = export_table(manager.get_table(table_name),
+            metadata[table_name]['columns'], filepath, where_clause,
+            manager.get_indexes(table_name),
+            manager.plan(table_name, where_clause))
+        
+        if exported is not None:
+            print(f'Выгружено {exported} записей из таблицы '
+                f'"{table_name}" в файл {filepath}.')
+
+    elif command == "delete":
+        if len(args) < 5 or args[1].lower() != "from" or \
+            args[3].lower() != "where":
+            print("Ошибка: некорректный формат команды. "
+                "Формат: delete from <таблица> where <условие>")
+            return True
+        
+        table_name = args[2]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        where_str = ' '.join(raw_args[4:])
+        
+        try:
+            where_clause = parse_where(where_str,
+                metadata[table_name]['columns'])
+            
+            if not where_clause:
+                print("Ошибка: некорректный формат команды. "
+                "Формат: delete from <таблица> where <условие>")
+                return True
+            
+            table_data = manager.get_table(table_name)
+            result = delete(table_data, where_clause,
+                manager.get_indexes(table_name),
+                manager.plan(table_name, where_clause))
             
-            elif command == "select":
-                if len(args) < 3 or args[1].lower() != "from":
-                    print("Ошибка: некорректный формат команды. "
-                        "Формат: select from <таблица> [where <условие>]")
-                    continue
+            # None - операция отменена или завершилась ошибкой
+            if result is not None:
+                new_data, deleted_ids = result
+                if deleted_ids:
+                    manager.set_table(table_name, new_data,
+                        keep_indexes=True)
+                    manager.log_mutation(table_name,
+                        {'op': 'delete', 'ids': deleted_ids})
+                    invalidate_select_cache(table_name)
+                    print(f'Удалено {len(deleted_ids)} '
+                        f'записей из таблицы "{table_name}".')
+                else:
+                    print("Нет записей, соответствующих условию.")
                 
-                table_name = args[2]
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    elif command == "info":
+        if len(args) != 2:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: info <таблица>")
+            return True
+        
+        table_name = args[1]
+        
+        try:
+            table_data = manager.get_table(table_name)
+            print_table_info(metadata, table_name, table_data)
+            
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    elif command == "compact":
+        if len(args) != 2:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: compact <таблица>")
+            return True
+        
+        table_name = args[1]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        manager.flush_table(table_name, compact=True)
+        if table_backend(metadata[table_name]).in_place:
+            print(f'Изменения таблицы "{table_name}" записаны, хранилище '
+                'не требует свертки.')
+        else:
+            print(f'Журнал таблицы "{table_name}" свернут в снимок.')
+
+    elif command == "cache_info":
+        info = select_cache_info()
+        print(f"Кэш выборок: {info['size']}/{info['max_size']} записей, "
+            f"попаданий: {info['hits']}, промахов: {info['misses']}, "
+            f"вытеснений: {info['evictions']}")
+
+    elif command == "io_stats":
+        stats = write_stats()
+        if not stats:
+            print("Записей на диск в этой сессии не было.")
+            return True
+        rows = [{'вид': kind, 'записей': values['count'],
+            'байт': values['bytes'],
+            'среднее, мс': round(values['total_ms'] / values['count'], 3),
+            'максимум, мс': round(values['max_ms'], 3),
+            'fsync, мс': round(values['fsync_ms'], 3)}
+            for kind, values in sorted(stats.items())]
+        display_table(rows, [{'name': name} for name in rows[0]])
+
+    elif command == "stats":
+        if len(args) == 2 and args[1].lower() == "reset":
+            reset_spans()
+            print("Статистика выполнения команд сброшена.")
+            return True
+        
+        if len(args) == 3 and args[1].lower() == "json":
+            try:
+                count = dump_stats(args[2], {'cache': select_cache_info(),
+                    'io': write_stats()})
+            except OSError as e:
+                print(f"Ошибка: не удалось записать файл {args[2]}: {e}")
+                return True
+            print(f"Сохранено интервалов: {count}, файл {args[2]}.")
+            return True
+        
+        if len(args) != 1:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: stats [json <файл> | reset]")
+            return True
+        
+        summary = span_summary()
+        if summary:
+            rows = [{'команда': item['command'], 'фаза': item['phase'],
+                'вызовов': item['count'], 'всего, мс': item['total_ms'],
+                'среднее, мс': item['avg_ms'], 'p50, мс': item['p50_ms'],
+                'p99, мс': item['p99_ms'], 'максимум, мс': item['max_ms']}
+                for item in summary]
+            display_table(rows, [{'name': name} for name in rows[0]])
+        else:
+            print("Время выполнения команд не записывалось.")
+        
+        info = select_cache_info()
+        print(f"Кэш выборок: {info['size']}/{info['max_size']} записей, "
+            f"попаданий: {info['hits']}, промахов: {info['misses']}, "
+            f"вытеснений: {info['evictions']}")
+
+    elif command == "profile":
+        if len(args) < 3 or args[1].lower() not in ("cpu", "memory"):
+            print("Ошибка: некорректный формат команды. "
+                "Формат: profile cpu|memory <команда>")
+            return True
+        
+        inner = user_input.split(maxsplit=2)[2]
+        if args[2].lower() == "profile":
+            print("Ошибка: команда profile не может быть вложенной.")
+            return True
+        
+        try:
+            result, report = profile_call(args[1].lower(), execute_command,
+                manager, metadata, inner, session)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return True
+        
+        print(report, end="")
+        return result
+
+    elif command == "flush":
+        manager.flush()
+        print("Все изменения сохранены на диск.")
+
+    elif command == "update":
+        lowered_args = [arg.lower() for arg in args]
+        if len(args) < 6 or lowered_args[2] != "set" or \
+            "where" not in lowered_args[3:]:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: update <таблица> set <столбец>=<значение> "
+                "where <условие>")
+            return True
+
+        table_name = args[1]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        where_index = [arg.lower() for arg in raw_args].index("where", 3)
+        set_str = ' '.join(raw_args[3:where_index])
+        where_str = ' '.join(raw_args[where_index + 1:])
+        
+        try:
+            columns = metadata[table_name]['columns']
+            set_clause = parse_set(set_str, columns)
+            where_clause = parse_where(where_str, columns)
+            
+            table_data = manager.get_table(table_name)
+            result = update(table_data, set_clause, where_clause,
+                manager.get_indexes(table_name),
+                manager.plan(table_name, where_clause))
+            
+            if result is not None:
+                _, updated_ids = result
+                if updated_ids:
+                    manager.log_mutation(table_name, {'op': 'update',
+                        'ids': updated_ids, 'set': set_clause})
+                    invalidate_select_cache(table_name)
+                    print(f'Обновлено {len(updated_ids)} '
+                        f'записей в таблице "{table_name}".')
+                else:
+                    print("Нет записей, соответствующих условию.")
                 
-                if table_name not in metadata:
-                    print(f'Ошибка: таблица "{table_name}" не существует.')
-                    continue
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+    
+    elif command == "select":
+        try:
+            args, limit, offset = parse_limit_offset(args)
+            raw_args, _, _ = parse_limit_offset(raw_args)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return True
+        
+        args, order_by, descending = parse_order_by(args)
+        raw_args, _, _ = parse_order_by(raw_args)
+        args, group_by = parse_group_by(args)
+        raw_args, _ = parse_group_by(raw_args)
+        
+        # Между select и from может стоять список агрегатных функций
+        lowered_args = [arg.lower() for arg in raw_args]
+        from_index = lowered_args.index("from") \
+            if "from" in lowered_args else -1
+        select_list = ' '.join(raw_args[1:from_index])
+        
+        if from_index < 1 or len(raw_args) <= from_index + 1 or \
+            group_by is not None and not select_list:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: select [<агрегаты>] from <таблица> "
+                "[where <условие>] [group by <столбец>] "
+                "[order by <столбец> [asc|desc]] "
+                "[limit <N>] [offset <M>]")
+            return True
+        
+        table_name = raw_args[from_index + 1]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        join_name = None
+        where_index = from_index + 2
+        if len(raw_args) > from_index + 2 and \
+            lowered_args[from_index + 2] == "join":
+            if len(raw_args) < from_index + 6 or \
+                lowered_args[from_index + 4] != "on":
+                print("Ошибка: некорректный формат команды. "
+                    "Формат: select from <таблица1> join <таблица2> "
+                    "on <таблица1>.<столбец> = <таблица2>.<столбец> "
+                    "[where <условие>]")
+                return True
+            join_name = raw_args[from_index + 3]
+            where_index = lowered_args.index("where", from_index + 5) \
+                if "where" in lowered_args[from_index + 5:] \
+                else len(raw_args)
+            on_str = ' '.join(raw_args[from_index + 5:where_index])
+        
+        where_str = None
+        if len(raw_args) > where_index + 1 and \
+            lowered_args[where_index] == "where":
+            where_str = ' '.join(raw_args[where_index + 1:])
+        
+        where_clause = None
+        if where_str and join_name is None:
+            try:
+                where_clause = parse_where(where_str,
+                    metadata[table_name]['columns'])
+            except ValueError as e:
+                print(f"Ошибка в условии WHERE: {e}")
+                return True
+        
+        try:
+            if join_name is not None:
+                columns, records = select_join(manager, table_name,
+                    join_name, on_str, where_str)
+            else:
+                table_data = manager.get_table(table_name)
+                columns = metadata[table_name]['columns']
+                indexes = manager.get_indexes(table_name)
+                plan = manager.plan(table_name, where_clause)
+                records = iter_select(table_data, where_clause,
+                    indexes, plan=plan)
+            
+            if select_list:
+                specs, group_by = parse_aggregates(select_list, columns,
+                    group_by)
+                result_columns, rows = aggregate(records, specs,
+                    group_by)
+                if order_by is not None:
+                    order_by = resolve_order_column(order_by,
+                        result_columns)
+                    rows = list(order_records(rows, order_by,
+                        descending, limit, offset))
+                else:
+                    stop = None if limit is None else offset + limit
+                    rows = rows[offset:stop]
+                display_table(rows, result_columns)
+                return True
+            
+            if join_name is not None or order_by is not None or \
+                limit is not None or offset or pager_size:
+                if order_by is not None:
+                    order_by = resolve_order_column(order_by, columns)
+                    records = order_records(records, order_by,
+                        descending, limit, offset)
+                else:
+                    stop = None if limit is None else offset + limit
+                    records = islice(records, offset, stop)
                 
-                where_clause = None
-                if len(args) > 4 and args[3].lower() == "where":
-                    where_str = ' '.join(args[4:])
-                    try:
-                        where_clause = parse_where(where_str)
-                    except ValueError as e:
-                        print(f"Ошибка в условии WHERE: {e}")
-                        continue
+                if pager_size:
+                    shown = display_table_paged(records, columns,
+                        pager_size)
+                else:
+                    records = list(records)
+                    shown = len(records)
+                    if records:
+                        display_table(records, columns)
+                if not shown:
+                    print("Нет данных, соответствующих условию.")
+                return True
+            
+            filtered_data = select(table_data, where_clause,
+                indexes, table_name, manager.version_key(table_name), plan)
+            
+            if filtered_data is not None:
+                if filtered_data:
+                    display_table(filtered_data, \
+                        metadata[table_name]['columns'])
+                else:
+                    print("Нет данных, соответствующих условию.")
                 
-                try:
-                    table_data = load_table_data(table_name)
-                    
-                    if where_clause:
-                        table_columns = [col['name'] for col in \
-                            metadata[table_name]['columns']]
-                        for column in where_clause.keys():
-                            if column not in table_columns:
-                                print(f'Ошибка: столбец "{column}" '
-                                    'не существует в таблице "{table_name}"')
-                                continue
-                    
-                    filtered_data = select(table_data, where_clause)
-                    
-                    if filtered_data is not None:
-                        if filtered_data:
-                            display_table(filtered_data, \
-                                metadata[table_name]['columns'])
-                        else:
-                            print("Нет данных, соответствующих условию.")
-                        
-                except ValueError as e:
-                    print(f"Ошибка: {e}")
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+    
+    elif command == "explain":
+        if len(args) < 4 or args[1].lower() != "select" or \
+            args[2].lower() != "from":
+            print("Ошибка: некорректный формат команды. "
+                "Формат: explain select from <таблица> "
+                "[where <условие>]")
+            return True
+        
+        table_name = args[3]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        try:
+            where_clause = None
+            if len(args) > 5 and args[4].lower() == "where":
+                where_clause = parse_where(' '.join(raw_args[5:]),
+                    metadata[table_name]['columns'])
+            
+            plan = manager.plan(table_name, where_clause)
+            found = sum(1 for _ in iter_select(
+                manager.get_table(table_name), where_clause,
+                manager.get_indexes(table_name), plan=plan))
+            print_plan(table_name, plan, found)
+            
+        except ValueError as e:
+            print(f"Ошибка в условии WHERE: {e}")
+    
+    elif command == "analyze":
+        if len(args) != 2:
+            print("Ошибка: некорректный формат команды. "
+                "Формат: analyze <таблица>")
+            return True
+        
+        table_name = args[1]
+        
+        if table_name not in metadata:
+            print(f'Ошибка: таблица "{table_name}" не существует.')
+            return True
+        
+        stats = manager.table_stats(table_name, refresh=True)
+        print(f'Статистика таблицы "{table_name}" обновлена: '
+            f'{stats["rows"]} записей.')
+
+    else:
+        print(f"Функции '{command}' нет. Попробуйте снова.")
+    
+    return True
+
+def parse_limit_offset(args):
+    """
+    Функция для разбора завершающих limit и offset команды
+
+    Параметры:
+        args - список, содержит аргументы команды
+
+    Возвращает:
+        args - список, содержит аргументы без limit и offset
+        limit - целое число или None, если limit не указан
+        offset - целое число, 0 если offset не указан
+    """
+    options = {"limit": None, "offset": 0}
+    
+    while len(args) >= 2 and args[-2].lower() in options:
+        keyword, value = args[-2].lower(), args[-1]
+        if not value.isdigit():
+            raise ValueError(f"{keyword.upper()} ожидает неотрицательное "
+                f"целое число, получено: {value}")
+        options[keyword] = int(value)
+        args = args[:-2]
+    
+    return args, options["limit"], options["offset"]
+
+def parse_order_by(args):
+    """
+    Функция для разбора завершающего order by команды
+
+    Параметры:
+        args - список, содержит аргументы команды
 
+    Возвращает:
+        args - список, содержит аргументы без order by
+        order_by - строка, столбец сортировки или None
+        descending - логическое значение, сортировка по убыванию
+    """
+    lowered_args = [arg.lower() for arg in args]
+    if len(args) >= 4 and lowered_args[-4:-2] == ["order", "by"] and \
+        lowered_args[-1] in ("asc", "desc"):
+        return args[:-4], args[-2], lowered_args[-1] == "desc"
+    if len(args) >= 3 and lowered_args[-3:-1] == ["order", "by"]:
+        return args[:-3], args[-1], False
+    return args, None, False
+
+def resolve_order_column(order_by, columns):
+    """
+    Функция для проверки столбца сортировки
+
+    Параметры:
+        order_by - строка, столбец сортировки
+        columns - список, содержит столбцы результата
+
+    Возвращает:
+        order_by - строка, полное имя столбца сортировки
+    """
+    name = resolve_column(order_by, columns)
+    if name is None:
+        raise ValueError(f'Столбец сортировки "{order_by}" не существует')
+    return name
+
+def parse_group_by(args):
+    """
+    Функция для разбора завершающего group by команды
+
+    Параметры:
+        args - список, содержит аргументы команды
+
+    Возвращает:
+        args - список, содержит аргументы без group by
+        group_by - строка, столбец группировки или None
+    """
+    if len(args) >= 3 and args[-3].lower() == "group" and \
+        args[-2].lower() == "by":
+        return args[:-3], args[-1]
+    return args, None
+
+def split_raw(user_input):
+    """
+    Функция для разбиения команды на слова с сохраненными кавычками
+
+    Строки в кавычках остаются частью слова вместе с пробелами
+    и кавычками другого вида внутри них, поэтому значения insert, set
+    и where после объединения слов через пробел не меняются
+
+    Параметры:
+        user_input - строка, содержит команду
+
+    Возвращает:
+        raw_args - список, содержит слова команды
+    """
+    return _RAW_ARG_RE.findall(user_input)
+
+@timed("parse")
+def parse_values(values_str):
+    """
+    Функция для разбора списков значений insert: (<значения>), (<значения>)
+
+    Значения разделяются запятыми вне кавычек, кавычки вокруг значения
+    снимаются, несколько слов без кавычек образуют одно значение
+
+    Параметры:
+        values_str - строка, содержит списки значений в скобках
+
+    Возвращает:
+        rows - список, содержит списки значений в виде строк
+    """
+    tokens = tokenize(values_str)
+    if not tokens:
+        raise ValueError("значения должны быть в скобках")
+
+    rows = []
+    position = 0
+    while True:
+        if position >= len(tokens) or tokens[position] != ("punct", "("):
+            raise ValueError("значения должны быть в скобках")
+        position += 1
+
+        row = []
+        words = []
+        while True:
+            if position >= len(tokens):
+                raise ValueError("не закрыта скобка списка значений")
+            kind, value = tokens[position]
+            position += 1
+            if (kind, value) in (("punct", ","), ("punct", ")")):
+                if len(words) == 1 and words[0][0] == "string":
+                    row.append(words[0][1][1:-1])
+                else:
+                    row.append(' '.join(word for _, word in words))
+                words = []
+                if value == ")":
+                    break
+            elif kind == "punct":
+                raise ValueError(f"Некорректный символ в значениях: {value}")
             else:
-                print(f"Функции '{command}' нет. Попробуйте снова.")
-                
-        except KeyboardInterrupt:
-            print("\n\nВыход из программы.")
-            break
-        except Exception as e:
-            print(f"Произошла непредвиденная ошибка: {e}")
+                words.append((kind, value))
+        rows.append(row)
 
-def parse_where(where_clause):
+        if position == len(tokens):
+            return rows
+        if tokens[position] != ("punct", ","):
+            raise ValueError("списки значений должны разделяться запятой")
+        position += 1
+
+@timed("parse")
+def parse_where(where_clause, columns=None):
     """
     Функция для парсинга where условия
 
+    Условие может содержать сравнения =, !=, <, <=, >, >=, проверки IN
+    и LIKE, объединенные через AND и OR, и скобки
+
     Параметры:
         where_clause - строка, содержит условие where
+        columns - список, содержит столбцы таблицы из метаданных
 
     Возвращает:
-        result - словарь со столбцом и значением из where условия
+        result - Predicate, скомпилированное условие, или None
     """
     if not where_clause:
         return None
     
-    where_clause = where_clause.strip()
-    
-    if '=' not in where_clause:
-        raise ValueError("Некорректный формат WHERE. Ожидаемый формат: "
-            "where <столбец> = <значение>")
-    
-    column, value = where_clause.split('=', 1)
-    column = column.strip()
-    value = value.strip()
+    return parse_predicate(where_clause, columns)
 
-    if column == "" or value == "":
-        raise ValueError("Некорректный формат WHERE. Ожидаемый формат: "
-            "where <столбец> = <значение>")
-
-    return {column: parse_value(value)}
-
-def parse_set(set_clause):
+@timed("parse")
+def parse_set(set_clause, columns=None):
     """
     Функция для парсинга set выражения
 
+    Выражение разбирается на лексемы, как условие where, поэтому запятые
+    внутри кавычек не разделяют присваивания
+
     Параметры:
         set_clause - строка, содержит выражение set
+        columns - список, содержит столбцы таблицы из метаданных, по ним
+            проверяются имена столбцов и приводятся типы значений
 
     Возвращает:
         result - словарь со столбцом и значением из set выражения
@@ -367,17 +1056,34 @@ def parse_set(set_clause):
     if not set_clause:
         return {}
     
-    conditions = set_clause.split(',')
+    col_types = None if columns is None else \
+        {col['name']: col['type'] for col in columns}
+    # Присваивания разделяются запятыми вне кавычек
+    conditions = [[]]
+    for token in tokenize(set_clause):
+        if token == ("punct", ","):
+            conditions.append([])
+        else:
+            conditions[-1].append(token)
     result = {}
     
     for condition in conditions:
-        condition = condition.strip()
-        if '=' not in condition:
-            raise ValueError(f"Некорректное условие SET: {condition}")
+        if len(condition) < 3 or condition[0][0] != "word" or \
+            condition[1] != ("op", "="):
+            raise ValueError("Некорректное условие SET: "
+                f"{' '.join(value for _, value in condition)}")
+        
+        column = condition[0][1]
+        value = parse_value(' '.join(value for _, value in condition[2:]))
         
-        column, value = condition.split('=', 1)
+        if col_types is not None:
+            if column not in col_types:
+                raise ValueError(f'Столбец "{column}" не существует')
+            value = coerce_literal(value, col_types[column], column)
+        if column == 'ID':
+            raise ValueError('Столбец "ID" нельзя изменить')
         
-        result[column.strip()] = parse_value(value.strip())
+        result[column] = value
     
     return result
 
@@ -0,0 +1,485 @@
+# src/primitive_db/indexes.py
+
+from bisect import bisect_left, bisect_right, insort
+
+from .constrants import INDEX_MAX_GAPS, INDEX_UPDATE_BATCH
+from .rows import column_getter, table_row_type
+
+
+def _sort_key(value):
+    """
+    Функция для получения ключа сортировки значения столбца,
+    строки упорядочиваются отдельно от чисел и логических значений
+
+    Параметры:
+        value - значение столбца
+    """
+    return (isinstance(value, str), value)
+
+
+class _PositionIndex:
+    """
+    Базовый класс индекса позиций записей с отложенным сдвигом позиций
+
+    После удаления записей позиции следующих записей сдвигаются, как в списке.
+    Чтобы не пересчитывать позиции всех записей при каждом удалении, индекс
+    хранит позиции на момент построения и отсортированный список хранимых
+    позиций удаленных записей, а текущая позиция вычисляется при чтении.
+    Когда удаленных записей становится больше INDEX_MAX_GAPS, позиции
+    пересчитываются все сразу
+    """
+
+    def _current(self, stored):
+        """
+        Метод для получения текущей позиции записи по хранимой
+
+        Параметры:
+            stored - целое число, хранимая позиция записи
+        """
+        return stored - bisect_left(self._gaps, stored) if self._gaps else stored
+
+    def _current_positions(self, positions):
+        """
+        Метод для получения текущих позиций записей по хранимым, порядок
+        позиций сохраняется
+
+        Параметры:
+            positions - итерируемый объект с хранимыми позициями
+        """
+        gaps = self._gaps
+        if not gaps:
+            return list(positions)
+        return [position - bisect_left(gaps, position) for position in positions]
+
+    def _stored(self, position):
+        """
+        Метод для получения хранимой позиции записи по текущей
+
+        Текущая позиция не убывает с ростом хранимой, поэтому хранимая
+        позиция ищется двоичным поиском между position и position
+        плюс количество удаленных записей
+
+        Параметры:
+            position - целое число, текущая позиция записи
+        """
+        gaps = self._gaps
+        if not gaps:
+            return position
+        low, high = position, position + len(gaps)
+        while low < high:
+            middle = (low + high) // 2
+            if middle - bisect_right(gaps, middle) < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def delete_positions(self, removed):
+        """
+        Метод для удаления записей из индекса после удаления их из таблицы:
+        удаляются только записи removed, позиции следующих записей
+        сдвигаются при чтении
+
+        Параметры:
+            removed - список, содержит пары (позиция, значение) удаленных
+                записей по возрастанию позиций
+        """
+        stored = [(self._stored(position), value) for position, value in removed]
+        self._drop(stored)
+        self._gaps = sorted(self._gaps + [position for position, _ in stored])
+
+        if len(self._gaps) > INDEX_MAX_GAPS:
+            self._renumber()
+            self._gaps = []
+
+    def _drop(self, removed):
+        """
+        Метод для удаления записей из индекса по хранимым позициям
+
+        Параметры:
+            removed - список, содержит пары (хранимая позиция, значение)
+        """
+        raise NotImplementedError
+
+    def _renumber(self):
+        """
+        Метод для замены всех хранимых позиций текущими
+        """
+        raise NotImplementedError
+
+
+class PrimaryKeyIndex(_PositionIndex):
+    """
+    Класс индекса первичного ключа
+
+    Хранит словарь ID -> позиция записи, каждому ID соответствует
+    не более одной записи
+    """
+    kind = "primary"
+
+    def __init__(self, column='ID'):
+        """
+        Параметры:
+            column - строка, содержит имя столбца первичного ключа
+        """
+        self.column = column
+        self._positions = {}
+        self._removed = set()
+        self._table = None
+        self._gaps = []
+
+    def build(self, table_data):
+        """
+        Метод для построения индекса по данным таблицы
+
+        Для отображенной в память таблицы словарь не строится: ключи ищутся
+        в массиве ID файла, а в словаре хранятся только изменения
+
+        Параметры:
+            table_data - список, содержит записи таблицы
+        """
+        self._removed = set()
+        self._gaps = []
+        if getattr(table_data, 'position_of_id', None) is not None:
+            self._table = table_data
+            self._positions = {}
+            return
+
+        self._table = None
+        get_value = column_getter(table_row_type(table_data), self.column)
+        self._positions = {get_value(record): position
+            for position, record in enumerate(table_data)}
+
+    def add(self, value, position):
+        """
+        Метод для добавления позиции записи в индекс
+
+        Параметры:
+            value - значение первичного ключа
+            position - целое число, позиция записи в таблице
+        """
+        self._positions[value] = self._stored(position)
+        self._removed.discard(value)
+
+    def remove(self, value, position):
+        """
+        Метод для удаления позиции записи из индекса
+
+        Параметры:
+            value - значение первичного ключа
+            position - целое число, позиция записи в таблице
+        """
+        self._drop([(self._stored(position), value)])
+
+    def _drop(self, removed):
+        for position, value in removed:
+            if self._positions.get(value) == position:
+                del self._positions[value]
+            elif self._table is not None:
+                self._removed.add(value)
+
+    def _renumber(self):
+        self._positions = dict(zip(self._positions,
+            self._current_positions(self._positions.values())))
+
+    def lookup(self, value):
+        """
+        Метод для поиска позиции записи по первичному ключу
+
+        Параметры:
+            value - искомое значение первичного ключа
+
+        Возвращает:
+            positions - список из одной позиции или пустой список
+        """
+        position = self._positions.get(value)
+        if position is not None:
+            return [self._current(position)]
+        # Отображенная таблица возвращает текущую позицию
+        if self._table is not None and value not in self._removed:
+            position = self._table.position_of_id(value)
+        return [] if position is None else [position]
+
+    def max_key(self):
+        """
+        Метод для получения наибольшего значения первичного ключа
+
+        Возвращает:
+            max_key - целое число, 0 для пустой таблицы
+        """
+        max_key = max((key for key in self._positions if isinstance(key, int)),
+            default=0)
+        if self._table is not None:
+            max_key = max(max_key, self._table.max_id())
+        return max_key
+
+
+class HashIndex(_PositionIndex):
+    """
+    Класс хэш-индекса для поиска по равенству
+
+    Хранит словарь значение -> отсортированный список позиций записей
+    """
+    kind = "hash"
+
+    def __init__(self, column):
+        """
+        Параметры:
+            column - строка, содержит имя индексируемого столбца
+        """
+        self.column = column
+        self._buckets = {}
+        self._gaps = []
+
+    def build(self, table_data):
+        """
+        Метод для построения индекса по данным таблицы
+
+        Параметры:
+            table_data - список, содержит записи таблицы
+        """
+        self._buckets = {}
+        self._gaps = []
+        get_value = column_getter(table_row_type(table_data), self.column)
+        for position, record in enumerate(table_data):
+            self._buckets.setdefault(get_value(record), []).append(position)
+
+    def add(self, value, position):
+        """
+        Метод для добавления позиции записи в индекс
+
+        Параметры:
+            value - значение столбца
+            position - целое число, позиция записи в таблице
+        """
+        position = self._stored(position)
+        bucket = self._buckets.setdefault(value, [])
+        if not bucket or bucket[-1] < position:
+            bucket.append(position)
+        else:
+            insort(bucket, position)
+
+    def remove(self, value, position):
+        """
+        Метод для удаления позиции записи из индекса
+
+        Параметры:
+            value - значение столбца
+            position - целое число, позиция записи в таблице
+        """
+        self._drop([(self._stored(position), value)])
+
+    def _drop(self, removed):
+        gone = {}
+        for position, value in removed:
+            gone.setdefault(value, set()).add(position)
+        for value, positions in gone.items():
+            bucket = self._buckets.get(value)
+            if bucket is None:
+                continue
+            if len(positions) <= INDEX_UPDATE_BATCH:
+                for position in positions:
+                    i = bisect_left(bucket, position)
+                    if i < len(bucket) and bucket[i] == position:
+                        del bucket[i]
+            else:
+                # Много позиций одного значения удаляются за один проход
+                bucket[:] = [position for position in bucket
+                    if position not in positions]
+            if not bucket:
+                del self._buckets[value]
+
+    def _renumber(self):
+        for bucket in self._buckets.values():
+            bucket[:] = self._current_positions(bucket)
+
+    def lookup(self, value):
+        """
+        Метод для поиска позиций записей по равенству
+
+        Параметры:
+            value - искомое значение столбца
+
+        Возвращает:
+            positions - список, содержит позиции записей по возрастанию
+        """
+        return self._current_positions(self._buckets.get(value, ()))
+
+
+class SortedIndex(_PositionIndex):
+    """
+    Класс упорядоченного индекса для поиска по равенству и диапазону
+
+    Хранит отсортированный список пар (ключ значения, позиция записи)
+    """
+    kind = "sorted"
+
+    def __init__(self, column):
+        """
+        Параметры:
+            column - строка, содержит имя индексируемого столбца
+        """
+        self.column = column
+        self._entries = []
+        self._gaps = []
+
+    def build(self, table_data):
+        """
+        Метод для построения индекса по данным таблицы
+
+        Параметры:
+            table_data - список, содержит записи таблицы
+        """
+        self._gaps = []
+        get_value = column_getter(table_row_type(table_data), self.column)
+        self._entries = sorted(
+            (_sort_key(get_value(record)), position)
+            for position, record in enumerate(table_data))
+
+    def add(self, value, position):
+        """
+        Метод для добавления позиции записи в индекс
+
+        Параметры:
+            value - значение столбца
+            position - целое число, позиция записи в таблице
+        """
+        insort(self._entries, (_sort_key(value), self._stored(position)))
+
+    def remove(self, value, position):
+        """
+        Метод для удаления позиции записи из индекса
+
+        Параметры:
+            value - значение столбца
+            position - целое число, позиция записи в таблице
+        """
+        self._drop([(self._stored(position), value)])
+
+    def _drop(self, removed):
+        if len(removed) > INDEX_UPDATE_BATCH:
+            # Большая пачка удаляется за один проход
+            gone = {position for position, _ in removed}
+            self._entries = [entry for entry in self._entries
+                if entry[1] not in gone]
+            return
+
+        for position, value in removed:
+            entry = (_sort_key(value), position)
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    def _renumber(self):
+        self._entries = [(key, self._current(position))
+            for key, position in self._entries]
+
+    def lookup(self, value):
+        """
+        Метод для поиска позиций записей по равенству
+
+        Параметры:
+            value - искомое значение столбца
+
+        Возвращает:
+            positions - список, содержит позиции записей по возрастанию
+        """
+        return self.range(value, value)
+
+    def range(self, low=None, high=None, include_low=True, include_high=True):
+        """
+        Метод для поиска позиций записей в диапазоне значений
+
+        Параметры:
+            low - нижняя граница, None - без ограничения
+            high - верхняя граница, None - без ограничения
+            include_low - логическое значение, включать нижнюю границу
+            include_high - логическое значение, включать верхнюю границу
+
+        Возвращает:
+            positions - список, содержит позиции записей по возрастанию
+        """
+        if low is None:
+            start = 0
+        elif include_low:
+            start = bisect_left(self._entries, (_sort_key(low),))
+        else:
+            start = bisect_right(self._entries, (_sort_key(low), float('inf')))
+
+        if high is None:
+            end = len(self._entries)
+        elif include_high:
+            end = bisect_right(self._entries, (_sort_key(high), float('inf')))
+        else:
+            end = bisect_left(self._entries, (_sort_key(high),))
+
+        return sorted(self._current_positions(position
+            for _, position in self._entries[start:end]))
+
+
+INDEX_TYPES = {
+    HashIndex.kind: HashIndex,
+    SortedIndex.kind: SortedIndex,
+}
+
+def build_indexes(table_meta, table_data):
+    """
+    Функция для построения всех индексов таблицы по ее метаданным
+
+    Параметры:
+        table_meta - словарь, содержит метаданные таблицы
+        table_data - список, содержит записи таблицы
+
+    Возвращает:
+        indexes - словарь, содержит индексы по именам столбцов
+    """
+    primary_key = PrimaryKeyIndex()
+    primary_key.build(table_data)
+
+    indexes = {primary_key.column: primary_key}
+    for column, kind in table_meta.get('indexes', {}).items():
+        index = INDEX_TYPES[kind](column)
+        index.build(table_data)
+        indexes[column] = index
+    return indexes
+
+def index_positions(node, indexes):
+    """
+    Функция для выбора позиций записей через индекс по одному условию
+
+    Параметры:
+        node - кортеж, узел дерева условия
+        indexes - словарь, содержит индексы по именам столбцов
+
+    Возвращает:
+        positions - список позиций или None, если индекс не подходит
+    """
+    if node[0] == 'in':
+        index = indexes.get(node[1])
+        if index is None:
+            return None
+        positions = set()
+        for value in node[2]:
+            positions.update(index.lookup(value))
+        return sorted(positions)
+
+    if node[0] != 'cmp':
+        return None
+
+    _, op, column, value = node
+    index = indexes.get(column)
+    if index is None:
+        return None
+    if op == '==':
+        return index.lookup(value)
+    if not hasattr(index, 'range'):
+        return None
+    if op == '<':
+        return index.range(high=value, include_high=False)
+    if op == '<=':
+        return index.range(high=value)
+    if op == '>':
+        return index.range(low=value, include_low=False)
+    if op == '>=':
+        return index.range(low=value)
+    return None
\ No newline at end of file
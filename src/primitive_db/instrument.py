@@ -0,0 +1,277 @@
+# src/primitive_db/instrument.py
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+from .constrants import INSTRUMENTATION, PROFILE_TOP, SPAN_BUFFER_SIZE
+
+# Фазы выполнения команды, total - команда целиком
+PHASES = ("parse", "load", "filter", "render", "save", "total")
+
+# Последние интервалы: (команда, фаза, начало в нс, длительность в нс)
+_spans = deque(maxlen=SPAN_BUFFER_SIZE)
+_spans_lock = threading.Lock()
+_enabled = INSTRUMENTATION
+_report = False
+# Команда и накопленные фазы текущего потока
+_local = threading.local()
+_NULL_SPAN = nullcontext()
+
+
+def set_instrumentation(enabled):
+    """
+    Функция для включения и выключения записи интервалов
+
+    Параметры:
+        enabled - логическое значение, записывать интервалы
+    """
+    global _enabled
+    _enabled = enabled
+
+def set_timing_report(enabled):
+    """
+    Функция для включения и выключения вывода времени фаз после
+    каждой команды
+
+    Параметры:
+        enabled - логическое значение, выводить время выполнения
+    """
+    global _report
+    _report = enabled
+
+
+class _Span:
+    """
+    Класс интервала фазы, при выходе записывает длительность в буфер
+    и в фазы текущей команды потока
+    """
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter_ns() - self.start
+        command = getattr(_local, 'command', None)
+        with _spans_lock:
+            _spans.append((command, self.phase, self.start, duration))
+        phases = getattr(_local, 'phases', None)
+        if phases is not None:
+            phases[self.phase] = phases.get(self.phase, 0) + duration
+        return False
+
+
+class _CommandSpan(_Span):
+    """
+    Класс интервала команды целиком
+
+    Команда запоминается в потоке и после выхода из интервала, поэтому
+    сброс изменений на диск после команды записывается на ее счет
+    """
+    __slots__ = ("command", "previous")
+
+    def __init__(self, command):
+        super().__init__("total")
+        self.command = command
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'phases', None)
+        _local.command = self.command
+        _local.phases = {}
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Вложенная команда (например, под profile) сменила команду потока
+        _local.command = self.command
+        super().__exit__(exc_type, exc_value, traceback)
+        phases, _local.phases = _local.phases, self.previous
+        if _report:
+            print_timing(self.command, phases)
+        return False
+
+
+def span(phase):
+    """
+    Функция для получения контекстного менеджера интервала фазы,
+    при выключенной записи возвращается пустой менеджер
+
+    Параметры:
+        phase - строка, фаза из PHASES
+    """
+    return _Span(phase) if _enabled else _NULL_SPAN
+
+def command_span(command):
+    """
+    Функция для получения контекстного менеджера интервала команды
+
+    Параметры:
+        command - строка, имя команды
+    """
+    return _CommandSpan(command) if _enabled else _NULL_SPAN
+
+def timed(phase):
+    """
+    Декоратор для записи времени выполнения функции как интервала фазы
+
+    Параметры:
+        phase - строка, фаза из PHASES
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def print_timing(command, phases):
+    """
+    Функция для вывода времени выполнения команды по фазам
+
+    Параметры:
+        command - строка, имя команды
+        phases - словарь, содержит длительности фаз в наносекундах
+    """
+    details = ', '.join(f"{phase} {phases[phase] / 1e6:.3f}"
+        for phase in PHASES[:-1] if phase in phases)
+    total = phases.get('total', 0) / 1e6
+    print(f"Время {command}: {total:.3f} мс" + (f" ({details})" if details
+        else ""))
+
+def recent_spans():
+    """
+    Функция для получения копии буфера интервалов
+
+    Возвращает:
+        spans - список, содержит кортежи (команда, фаза, начало в нс,
+            длительность в нс) от старых к новым
+    """
+    with _spans_lock:
+        return list(_spans)
+
+def reset_spans():
+    """
+    Функция для очистки буфера интервалов
+    """
+    with _spans_lock:
+        _spans.clear()
+
+def _percentile(ordered, percent):
+    """
+    Функция для вычисления перцентиля упорядоченного списка методом
+    ближайшего ранга
+
+    Параметры:
+        ordered - список, содержит упорядоченные значения
+        percent - число, перцентиль от 0 до 100
+    """
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+def span_summary():
+    """
+    Функция для сводки интервалов буфера по командам и фазам
+
+    Возвращает:
+        summary - список, содержит словари с командой (command), фазой
+            (phase), количеством (count) и временем в миллисекундах:
+            суммарным, средним, p50, p99 и максимальным
+    """
+    groups = {}
+    for command, phase, _, duration in recent_spans():
+        groups.setdefault((command or "-", phase), []).append(duration)
+
+    order = {phase: i for i, phase in enumerate(PHASES)}
+    summary = []
+    for (command, phase), durations in sorted(groups.items(),
+        key=lambda item: (item[0][0], order.get(item[0][1], len(order)))):
+        durations.sort()
+        total = sum(durations)
+        summary.append({
+            'command': command,
+            'phase': phase,
+            'count': len(durations),
+            'total_ms': round(total / 1e6, 3),
+            'avg_ms': round(total / len(durations) / 1e6, 3),
+            'p50_ms': round(_percentile(durations, 50) / 1e6, 3),
+            'p99_ms': round(_percentile(durations, 99) / 1e6, 3),
+            'max_ms': round(durations[-1] / 1e6, 3),
+        })
+    return summary
+
+def dump_stats(filepath, extra=None):
+    """
+    Функция для сохранения сводки и интервалов буфера в JSON
+
+    Параметры:
+        filepath - строка, путь к файлу
+        extra - словарь, содержит дополнительные разделы отчета
+
+    Возвращает:
+        count - целое число, количество сохраненных интервалов
+    """
+    spans = recent_spans()
+    report = {
+        'summary': span_summary(),
+        'spans': [{'command': command, 'phase': phase, 'start_ns': start,
+            'duration_ns': duration}
+            for command, phase, start, duration in spans],
+    }
+    report.update(extra or {})
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return len(spans)
+
+def profile_call(mode, func, *args, **kwargs):
+    """
+    Функция для выполнения функции под cProfile или tracemalloc
+
+    Параметры:
+        mode - строка, cpu - профиль вызовов, memory - профиль памяти
+        func - функция, выполняется с аргументами args и kwargs
+
+    Возвращает:
+        result - результат функции
+        report - строка, отчет профилировщика
+    """
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative") \
+            .print_stats(PROFILE_TOP)
+        return result, stream.getvalue()
+
+    if mode != "memory":
+        raise ValueError(f"Неизвестный режим профилирования: {mode}. "
+            "Допустимые режимы: cpu, memory")
+
+    if tracemalloc.is_tracing():
+        raise ValueError("tracemalloc уже запущен")
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    lines = [f"Пиковая память: {peak / 1024:.1f} КиБ",
+        f"Крупнейшие выделения, оставшиеся после команды (первые {PROFILE_TOP}):"]
+    lines += [str(stat) for stat
+        in snapshot.statistics("lineno")[:PROFILE_TOP]]
+    return result, '\n'.join(lines) + '\n'
\ No newline at end of file
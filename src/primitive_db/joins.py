@@ -0,0 +1,354 @@
+# src/primitive_db/joins.py
+
+import json
+import re
+import tempfile
+from itertools import chain
+
+from .constrants import JOIN_MEMORY_ROWS, JOIN_PARTITIONS
+from .core import iter_select
+from .predicates import Predicate, parse_predicate
+from .rows import as_dict
+
+# Глубина разбиения, после которой раздел строится в памяти целиком
+MAX_PARTITION_DEPTH = 3
+
+_CONDITION_RE = re.compile(r"^\s*([^\s=]+)\s*=\s*([^\s=]+)\s*$")
+
+
+def join_columns(left_name, left_cols, right_name, right_cols):
+    """
+    Функция для получения столбцов результата соединения, имена столбцов
+    дополняются именем таблицы: <таблица>.<столбец>
+
+    Параметры:
+        left_name - строка, имя левой таблицы
+        left_cols - список, содержит столбцы левой таблицы
+        right_name - строка, имя правой таблицы
+        right_cols - список, содержит столбцы правой таблицы
+    """
+    return [{'name': f"{table_name}.{col['name']}", 'type': col['type']}
+        for table_name, cols in ((left_name, left_cols), (right_name, right_cols))
+        for col in cols]
+
+def parse_join_condition(text, left_name, left_cols, right_name, right_cols):
+    """
+    Функция для разбора условия соединения <A>.<столбец> = <B>.<столбец>
+
+    Параметры:
+        text - строка, условие после on
+        left_name - строка, имя левой таблицы
+        left_cols - список, содержит столбцы левой таблицы
+        right_name - строка, имя правой таблицы
+        right_cols - список, содержит столбцы правой таблицы
+
+    Возвращает:
+        left_column, right_column - имена столбцов соединения
+    """
+    match = _CONDITION_RE.match(text)
+    if match is None:
+        raise ValueError("Некорректное условие соединения. Ожидаемый формат: "
+            "on <таблица1>.<столбец> = <таблица2>.<столбец>")
+
+    sides = {}
+    for operand in match.groups():
+        table_name, _, column = operand.rpartition('.')
+        if table_name not in (left_name, right_name) or table_name in sides:
+            raise ValueError(f"Некорректный столбец в условии соединения: "
+                f"{operand}")
+        sides[table_name] = column
+
+    left_types = {col['name']: col['type'] for col in left_cols}
+    right_types = {col['name']: col['type'] for col in right_cols}
+    left_column, right_column = sides[left_name], sides[right_name]
+
+    if left_column not in left_types:
+        raise ValueError(f'Столбец "{left_column}" не существует '
+            f'в таблице "{left_name}"')
+    if right_column not in right_types:
+        raise ValueError(f'Столбец "{right_column}" не существует '
+            f'в таблице "{right_name}"')
+    if left_types[left_column] != right_types[right_column]:
+        raise ValueError("Столбцы соединения имеют разные типы: "
+            f"{left_types[left_column]} и {right_types[right_column]}")
+
+    return left_column, right_column
+
+def resolve_column(name, columns):
+    """
+    Функция для поиска столбца по имени, для результата соединения
+    имя таблицы можно опустить, если столбец с таким именем один
+
+    Параметры:
+        name - строка, имя столбца
+        columns - список, содержит столбцы
+
+    Возвращает:
+        name - строка, полное имя столбца или None, если столбец не найден
+    """
+    names = [col['name'] for col in columns]
+    if name in names:
+        return name
+    matches = [column for column in names if column.endswith('.' + name)]
+    return matches[0] if len(matches) == 1 else None
+
+def _rename(node, mapping):
+    """
+    Функция для замены имен столбцов в дереве условия
+
+    Параметры:
+        node - кортеж, узел дерева условия
+        mapping - словарь, содержит новые имена столбцов
+    """
+    if node[0] in ("and", "or"):
+        return (node[0], tuple(_rename(child, mapping) for child in node[1]))
+    if node[0] == "cmp":
+        return ("cmp", node[1], mapping[node[2]], node[3])
+    return (node[0], mapping[node[1]], node[2])
+
+def parse_join_where(text, columns):
+    """
+    Функция для разбора условия where запроса с соединением
+
+    Столбцы указываются как <таблица>.<столбец>, имя таблицы можно
+    опустить, если столбец с таким именем есть только в одной таблице
+
+    Параметры:
+        text - строка, содержит условие where
+        columns - список, содержит столбцы результата соединения
+
+    Возвращает:
+        predicate - Predicate над столбцами с именами таблиц или None
+    """
+    mapping = {col['name']: col['name'] for col in columns}
+    owners = {}
+    for col in columns:
+        owners.setdefault(col['name'].split('.', 1)[1], []).append(col)
+    for name, cols in owners.items():
+        if len(cols) == 1:
+            mapping[name] = cols[0]['name']
+
+    types = {col['name']: col['type'] for col in columns}
+    aliases = [{'name': alias, 'type': types[name]}
+        for alias, name in mapping.items()]
+
+    predicate = parse_predicate(text, aliases)
+    if predicate is None:
+        return None
+    return Predicate(_rename(predicate.ast, mapping))
+
+def split_join_where(predicate, left_name, right_name):
+    """
+    Функция для разделения условия where на части, которые можно проверить
+    до соединения по каждой таблице отдельно, и остаток
+
+    Параметры:
+        predicate - Predicate над столбцами с именами таблиц или None
+        left_name - строка, имя левой таблицы
+        right_name - строка, имя правой таблицы
+
+    Возвращает:
+        left, right, rest - Predicate или None: условия на столбцы
+            левой таблицы, правой таблицы и остальные условия
+    """
+    if predicate is None:
+        return None, None, None
+
+    parts = {left_name: [], right_name: [], None: []}
+    for node in predicate.conjuncts():
+        owners = {column.split('.', 1)[0]
+            for column in Predicate(node).columns()}
+        owner = owners.pop() if len(owners) == 1 else None
+        parts[owner].append(node)
+
+    def build(nodes, prefix=None):
+        if not nodes:
+            return None
+        node = nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+        if prefix is not None:
+            columns = Predicate(node).columns()
+            node = _rename(node, {column: column[len(prefix) + 1:]
+                for column in columns})
+        return Predicate(node)
+
+    return (build(parts[left_name], left_name),
+        build(parts[right_name], right_name), build(parts[None]))
+
+def _write_partitions(records, column, depth):
+    """
+    Функция для разбиения записей по хэшу значения столбца
+    на временные файлы
+
+    Параметры:
+        records - итерируемый объект со словарями записей
+        column - строка, столбец соединения
+        depth - целое число, глубина разбиения, входит в хэш
+
+    Возвращает:
+        files - список открытых временных файлов разделов
+    """
+    files = [tempfile.TemporaryFile('w+', encoding='utf-8')
+        for _ in range(JOIN_PARTITIONS)]
+    for record in records:
+        key = record.get(column)
+        if key is None:
+            continue
+        f = files[hash((depth, key)) % JOIN_PARTITIONS]
+        f.write(json.dumps(as_dict(record), ensure_ascii=False) + '\n')
+    for f in files:
+        f.seek(0)
+    return files
+
+def _read_partition(f):
+    """
+    Генератор записей раздела из временного файла
+
+    Параметры:
+        f - открытый временный файл
+    """
+    for line in f:
+        yield json.loads(line)
+
+def _join(build, probe, build_column, probe_column, combine, memory_rows, depth):
+    """
+    Генератор строк соединения по хэш-таблице
+
+    Хэш-таблица строится по записям build. Если записей больше memory_rows,
+    обе стороны разбиваются на разделы по хэшу ключа и соединяются
+    по разделам (grace hash join)
+
+    Параметры:
+        build - итерируемый объект с записями строящей стороны
+        probe - итерируемый объект с записями проверяющей стороны
+        build_column - строка, столбец соединения строящей стороны
+        probe_column - строка, столбец соединения проверяющей стороны
+        combine - функция (запись build, запись probe) -> строка результата
+        memory_rows - целое число, максимум записей хэш-таблицы в памяти
+        depth - целое число, глубина разбиения
+    """
+    build = iter(build)
+    table = {}
+    count = 0
+
+    for record in build:
+        key = record.get(build_column)
+        if key is None:
+            continue
+        table.setdefault(key, []).append(record)
+        count += 1
+
+        if count > memory_rows and depth < MAX_PARTITION_DEPTH:
+            rest = chain(chain.from_iterable(table.values()), build)
+            table = None
+            yield from _grace_join(rest, probe, build_column, probe_column,
+                combine, memory_rows, depth)
+            return
+
+    for record in probe:
+        matches = table.get(record.get(probe_column))
+        if matches:
+            for match in matches:
+                yield combine(match, record)
+
+def _grace_join(build, probe, build_column, probe_column, combine, memory_rows,
+    depth):
+    """
+    Генератор строк соединения по разделам во временных файлах
+
+    Параметры совпадают с параметрами _join
+    """
+    build_files = _write_partitions(build, build_column, depth)
+    probe_files = []
+    try:
+        probe_files = _write_partitions(probe, probe_column, depth)
+        for build_file, probe_file in zip(build_files, probe_files):
+            yield from _join(_read_partition(build_file),
+                _read_partition(probe_file), build_column, probe_column,
+                combine, memory_rows, depth + 1)
+    finally:
+        for f in build_files + probe_files:
+            f.close()
+
+def hash_join(left_records, right_records, left_name, left_column, right_name,
+    right_column, build_left=True, memory_rows=JOIN_MEMORY_ROWS):
+    """
+    Генератор строк внутреннего соединения двух таблиц по равенству
+
+    Хэш-таблица строится по одной стороне, записи другой стороны читаются
+    потоково. Записи с пустым значением столбца соединения не соединяются
+
+    Параметры:
+        left_records - итерируемый объект с записями левой таблицы
+        right_records - итерируемый объект с записями правой таблицы
+        left_name - строка, имя левой таблицы
+        left_column - строка, столбец соединения левой таблицы
+        right_name - строка, имя правой таблицы
+        right_column - строка, столбец соединения правой таблицы
+        build_left - логическое значение, строить хэш-таблицу по левой стороне
+        memory_rows - целое число, максимум записей хэш-таблицы в памяти
+
+    Возвращает:
+        row - словарь, столбцы обеих таблиц с именами <таблица>.<столбец>
+    """
+    def qualify(left, right):
+        row = {f"{left_name}.{column}": value for column, value in left.items()}
+        row.update((f"{right_name}.{column}", value)
+            for column, value in right.items())
+        return row
+
+    if build_left:
+        return _join(left_records, right_records, left_column, right_column,
+            qualify, memory_rows, 0)
+    return _join(right_records, left_records, right_column, left_column,
+        lambda build, probe: qualify(probe, build), memory_rows, 0)
+
+def select_join(manager, left_name, right_name, on_clause, where_clause=None):
+    """
+    Функция для выборки соединения двух таблиц
+
+    Части условия where, относящиеся к одной таблице, проверяются
+    до соединения через планировщик этой таблицы. Хэш-таблица строится
+    по стороне с меньшей оценкой количества записей
+
+    Параметры:
+        manager - TableManager, хранит таблицы сессии
+        left_name - строка, имя левой таблицы
+        right_name - строка, имя правой таблицы
+        on_clause - строка, условие соединения
+        where_clause - строка, условие where или None
+
+    Возвращает:
+        columns - список, содержит столбцы результата
+        rows - генератор строк результата
+    """
+    for table_name in (left_name, right_name):
+        if table_name not in manager.metadata:
+            raise ValueError(f'Таблица "{table_name}" не существует.')
+    if left_name == right_name:
+        raise ValueError("Соединение таблицы с самой собой не поддерживается.")
+
+    left_cols = manager.metadata[left_name]['columns']
+    right_cols = manager.metadata[right_name]['columns']
+    left_column, right_column = parse_join_condition(on_clause, left_name,
+        left_cols, right_name, right_cols)
+    columns = join_columns(left_name, left_cols, right_name, right_cols)
+
+    predicate = parse_join_where(where_clause, columns) if where_clause else None
+    left_where, right_where, rest = split_join_where(predicate, left_name,
+        right_name)
+
+    sides = []
+    for table_name, side_where in ((left_name, left_where),
+        (right_name, right_where)):
+        plan = manager.plan(table_name, side_where)
+        records = iter_select(manager.get_table(table_name), side_where,
+            manager.get_indexes(table_name), plan=plan)
+        sides.append((records, plan.estimated_rows))
+
+    (left_records, left_rows), (right_records, right_rows) = sides
+    rows = hash_join(left_records, right_records, left_name, left_column,
+        right_name, right_column, build_left=left_rows <= right_rows)
+
+    if rest is not None:
+        rows = filter(rest.match, rows)
+    return columns, rows
\ No newline at end of file
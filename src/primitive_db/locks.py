@@ -0,0 +1,127 @@
+# src/primitive_db/locks.py
+
+import os
+import time
+from contextlib import contextmanager
+
+from .constrants import (
+    DB_INFO_DATAPATH,
+    LOCK_BACKOFF_MS,
+    LOCK_MAX_BACKOFF_MS,
+    LOCK_TIMEOUT_MS,
+    TABLES_DATAPATH,
+)
+
+try:
+    import fcntl
+except ImportError:
+    # На платформах без fcntl процессы не блокируют друг друга
+    fcntl = None
+
+
+class LockTimeoutError(TimeoutError):
+    """
+    Исключение, возникающее, если блокировку не удалось получить за отведенное
+    время
+    """
+
+
+@contextmanager
+def file_lock(filepath, exclusive=False, timeout_ms=LOCK_TIMEOUT_MS):
+    """
+    Контекстный менеджер блокировки файла через fcntl.flock
+
+    Разделяемую блокировку одновременно держат несколько читателей,
+    исключительную - только один писатель. Пока блокировка занята, попытки
+    повторяются с удваивающейся паузой от LOCK_BACKOFF_MS до
+    LOCK_MAX_BACKOFF_MS. Блокировка снимается при закрытии файла, в том числе
+    при завершении процесса
+
+    Параметры:
+        filepath - строка, путь к файлу блокировки, создается при необходимости
+        exclusive - логическое значение, исключительная блокировка
+        timeout_ms - целое число, время ожидания в миллисекундах
+    """
+    if fcntl is None:
+        yield
+        return
+
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    deadline = time.monotonic() + timeout_ms / 1000
+    delay = LOCK_BACKOFF_MS / 1000
+
+    while True:
+        fd = os.open(filepath, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LockTimeoutError(f"Не удалось получить блокировку "
+                            f"{filepath} за {timeout_ms} мс: файл занят другим "
+                            "процессом") from None
+                    time.sleep(min(delay, remaining))
+                    delay = min(delay * 2, LOCK_MAX_BACKOFF_MS / 1000)
+
+            # Пока блокировка ожидалась, файл мог быть удален вместе
+            # с таблицей, тогда блокировка получена на удаленный файл
+            try:
+                if os.fstat(fd).st_ino == os.stat(filepath).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+def table_lock(table_name, exclusive=False):
+    """
+    Функция для получения блокировки таблицы
+
+    Файлы снимка и журнала заменяются при свертке, поэтому блокируется
+    отдельный файл data/<имя_таблицы>.lock
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        exclusive - логическое значение, блокировка для записи
+    """
+    return file_lock(os.path.join(TABLES_DATAPATH, f"{table_name}.lock"),
+        exclusive)
+
+def remove_table_lock(table_name):
+    """
+    Функция для удаления файла блокировки удаленной таблицы, вызывается
+    под исключительными блокировками метаданных и таблицы: процессы,
+    ожидающие блокировку удаленного файла, получив ее, открывают файл
+    заново
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+    """
+    try:
+        os.remove(os.path.join(TABLES_DATAPATH, f"{table_name}.lock"))
+    except FileNotFoundError:
+        pass
+
+def metadata_lock(exclusive=False):
+    """
+    Функция для получения блокировки метаданных, исключительную
+    блокировку держит процесс, сбрасывающий изменения на диск
+
+    Параметры:
+        exclusive - логическое значение, блокировка для записи
+    """
+    return file_lock(f"{DB_INFO_DATAPATH}.lock", exclusive)
\ No newline at end of file
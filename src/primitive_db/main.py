@@ -1,14 +1,121 @@
 #!/usr/bin/env python3
 
-from .engine import run
+import argparse
+import sys
+from itertools import chain
 
+from .constrants import (
+    FLUSH_INTERVAL_MS,
+    FLUSH_POLICIES,
+    FLUSH_POLICY,
+    PARALLEL_SCAN_ROWS,
+    PARALLEL_SCAN_WORKERS,
+    SERVER_HOST,
+    SERVER_PORT,
+    STORAGE_BACKEND,
+    STORAGE_BACKENDS,
+)
+from .decorators import set_auto_confirm
+from .engine import run, run_batch
+from .instrument import set_instrumentation
+from .parallel import set_parallel_scan
+from .server import run_server
 
-def main():
+
+def parse_args(argv=None):
+    """
+    Функция для разбора аргументов командной строки
+
+    Параметры:
+        argv - список, содержит аргументы, None - аргументы процесса
+    """
+    parser = argparse.ArgumentParser(prog="database",
+        description="Примитивная база данных. Без аргументов запускается "
+            "в диалоговом режиме, с --file, -c или при передаче команд "
+            "через stdin выполняет их как скрипт, в режиме serve запускает "
+            "сервер.")
+    parser.add_argument("mode", nargs="?", choices=("serve",),
+        help="serve - держать таблицы в памяти и выполнять команды клиентов")
+    parser.add_argument("--socket",
+        help="путь к Unix сокету сервера, без него сервер слушает TCP порт")
+    parser.add_argument("--host", default=SERVER_HOST,
+        help="адрес TCP сервера")
+    parser.add_argument("--port", type=int, default=SERVER_PORT,
+        help="порт TCP сервера")
+    parser.add_argument("-f", "--file",
+        help="выполнить команды из файла, по одной в строке")
+    parser.add_argument("-c", "--command", action="append", dest="commands",
+        metavar="COMMAND", help="выполнить команду, можно указать несколько раз")
+    parser.add_argument("-y", "--yes", action="store_true",
+        help="автоматически подтверждать удаление таблиц и записей")
+    parser.add_argument("--time", action="store_true",
+        help="выводить время выполнения каждой команды по фазам")
+    parser.add_argument("--no-spans", action="store_true",
+        help="не записывать интервалы фаз команд для stats, --time "
+            "включает запись")
+    parser.add_argument("--flush-policy", choices=FLUSH_POLICIES,
+        default=FLUSH_POLICY,
+        help="политика сброса изменений на диск в диалоговом режиме "
+            "и на сервере")
+    parser.add_argument("--flush-interval-ms", type=int,
+        default=FLUSH_INTERVAL_MS,
+        help="интервал сброса изменений для политики interval")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS,
+        default=STORAGE_BACKEND,
+        help="хранилище новых таблиц: файлы в каталоге data или один "
+            "файл SQLite")
+    parser.add_argument("--parallel-rows", type=int, default=PARALLEL_SCAN_ROWS,
+        help="количество записей, начиная с которого таблица просматривается "
+            "параллельно, 0 - выключить параллельный просмотр")
+    parser.add_argument("--parallel-workers", type=int,
+        default=PARALLEL_SCAN_WORKERS,
+        help="количество процессов параллельного просмотра, 0 - по количеству "
+            "процессоров")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Основная функция базы данных
+
+    Параметры:
+        argv - список, содержит аргументы, None - аргументы процесса
+
+    Возвращает:
+        code - целое число, код завершения: 1, если команда скрипта
+            завершилась исключением
     """
-    run()
+    args = parse_args(argv)
+    set_parallel_scan(args.parallel_rows, args.parallel_workers)
+    set_instrumentation(args.time or not args.no_spans)
+
+    if args.mode == "serve":
+        run_server(args.socket, args.host, args.port, args.yes, args.time,
+            args.flush_policy, args.flush_interval_ms, args.storage)
+        return 0
+
+    if args.file is None and not args.commands and sys.stdin.isatty():
+        if args.yes:
+            set_auto_confirm(True)
+        run(args.flush_policy, args.flush_interval_ms, args.storage, args.time)
+        return 0
+
+    sources = []
+    if args.file is not None:
+        try:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                sources.append(f.readlines())
+        except OSError as e:
+            print(f"Ошибка: не удалось прочитать файл {args.file}: {e}")
+            return 1
+    if args.commands:
+        sources.append(args.commands)
+    if not sources:
+        sources.append(sys.stdin)
+
+    errors = run_batch(chain.from_iterable(sources), args.yes, args.time,
+        args.storage)
+    return 0 if errors == 0 else 1
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,279 @@
+# src/primitive_db/mapped.py
+
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+
+from .rows import row_type, schema_row_type
+
+MAPPED_MAGIC = b"PDBMAP1\n"
+
+# Количество записей, длина заголовка, смещения массивов ID и смещений строк,
+# флаг упорядоченности ID
+_LAYOUT = struct.Struct("<QQQQQ")
+
+
+def write_mapped_table(filepath, columns, table_data):
+    """
+    Функция для записи таблицы в построчный двоичный формат
+
+    Файл состоит из сигнатуры, описания расположения, JSON заголовка
+    с именами столбцов, строк в виде компактных JSON массивов, массива ID
+    и массива смещений строк. Строки пишутся потоково, в памяти держатся
+    только массивы ID и смещений
+
+    Параметры:
+        filepath - строка, путь к файлу
+        columns - список, содержит столбцы таблицы из метаданных
+        table_data - последовательность записей или словарей с данными таблицы
+    """
+    row_cls = schema_row_type(columns)
+    names = row_cls.fields
+    id_position = row_cls.positions.get('ID')
+    ids = array('q')
+    offsets = array('Q')
+    ids_sorted = True
+    position = 0
+
+    with open(filepath, 'wb') as f:
+        header = json.dumps({'columns': names}, ensure_ascii=False).encode()
+        f.write(MAPPED_MAGIC)
+        f.write(_LAYOUT.pack(0, 0, 0, 0, 0))
+        f.write(header)
+
+        for record in table_data:
+            # Записи схемы пишутся как есть, без поиска столбцов по имени
+            if type(record) is row_cls:
+                values = record
+                record_id = record[id_position] if id_position is not None \
+                    else None
+            else:
+                values = [record.get(name) for name in names]
+                record_id = record.get('ID')
+            if not isinstance(record_id, int) or isinstance(record_id, bool):
+                raise ValueError(f"Некорректный ID записи: {record_id}")
+            if ids and record_id <= ids[-1]:
+                ids_sorted = False
+            ids.append(record_id)
+
+            row = json.dumps(values, ensure_ascii=False,
+                separators=(',', ':')).encode('utf-8')
+            offsets.append(position)
+            f.write(row)
+            position += len(row)
+        offsets.append(position)
+
+        # Массивы выравниваются по 8 байт для чтения через memoryview.cast
+        f.write(b'\0' * (-f.tell() % 8))
+        ids_offset = f.tell()
+        f.write(ids.tobytes())
+        offsets_offset = f.tell()
+        f.write(offsets.tobytes())
+
+        f.seek(len(MAPPED_MAGIC))
+        f.write(_LAYOUT.pack(len(ids), len(header), ids_offset, offsets_offset,
+            int(ids_sorted)))
+
+
+class MappedTable:
+    """
+    Класс таблицы, отображенной в память через mmap
+
+    Открытие не зависит от размера файла: читается только заголовок,
+    а массивы ID и смещений строк используются прямо из отображения.
+    Строка декодируется в запись схемы (Row) при первом обращении
+    по позиции и запоминается. Замененные записи хранятся в памяти поверх
+    строк файла, новые записи - после записей файла. Удаленные строки
+    файла исключаются из массива оставшихся строк, строки при этом
+    не декодируются
+    """
+
+    def __init__(self, filepath):
+        """
+        Параметры:
+            filepath - строка, путь к файлу в построчном двоичном формате
+        """
+        with open(filepath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAPPED_MAGIC)] != MAPPED_MAGIC:
+            raise ValueError("Файл таблицы не в построчном двоичном формате.")
+
+        rows, header_size, ids_offset, offsets_offset, ids_sorted = \
+            _LAYOUT.unpack_from(self._mmap, len(MAPPED_MAGIC))
+        header_start = len(MAPPED_MAGIC) + _LAYOUT.size
+        header = json.loads(self._mmap[header_start:header_start + header_size])
+
+        view = memoryview(self._mmap)
+        self._ids = view[ids_offset:ids_offset + rows * 8].cast('q')
+        self._offsets = view[offsets_offset:offsets_offset + (rows + 1) * 8].cast('Q')
+        self._data_start = header_start + header_size
+        self._names = header['columns']
+        self.row_type = row_type(self._names)
+        self._unsorted_positions = None
+
+        self.base_count = rows
+        self.ids_sorted = bool(ids_sorted)
+        self._file_rows = rows
+        # Строки файла, оставшиеся после удаления, по возрастанию,
+        # None - удалений не было
+        self._live = None
+
+        # Записи по номерам строк файла и новые записи по ID
+        self._rows = {}
+        self._appended = []
+        self._appended_positions = {}
+
+    def _decode(self, position):
+        """
+        Метод для декодирования строки файла
+
+        Параметры:
+            position - целое число, позиция строки в файле
+        """
+        start = self._data_start + self._offsets[position]
+        end = self._data_start + self._offsets[position + 1]
+        return self.row_type(json.loads(self._mmap[start:end]))
+
+    def __len__(self):
+        return self.base_count + len(self._appended)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Позиция записи вне таблицы")
+
+        if position >= self.base_count:
+            return self._appended[position - self.base_count]
+
+        row = position if self._live is None else self._live[position]
+        record = self._rows.get(row)
+        if record is None:
+            record = self._rows[row] = self._decode(row)
+        return record
+
+    def __setitem__(self, position, record):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Позиция записи вне таблицы")
+
+        if position >= self.base_count:
+            self._appended[position - self.base_count] = record
+        else:
+            row = position if self._live is None else self._live[position]
+            self._rows[row] = record
+
+    def __iter__(self):
+        # При полном просмотре строки не запоминаются, чтобы память
+        # не росла до размера таблицы
+        rows = range(self._file_rows) if self._live is None else self._live
+        for row in rows:
+            record = self._rows.get(row)
+            yield record if record is not None else self._decode(row)
+        yield from self._appended
+
+    def append(self, record):
+        """
+        Метод для добавления записи после записей файла
+
+        Параметры:
+            record - Row, содержит новую запись
+        """
+        self._appended_positions[record.get('ID')] = len(self._appended)
+        self._appended.append(record)
+
+    def extend(self, records):
+        """
+        Метод для добавления нескольких записей после записей файла
+
+        Параметры:
+            records - итерируемый объект с записями
+        """
+        for record in records:
+            self.append(record)
+
+    def delete_positions(self, positions):
+        """
+        Метод для удаления записей по позициям: строки файла исключаются
+        из массива оставшихся строк без декодирования, позиции следующих
+        записей сдвигаются, как в списке
+
+        Параметры:
+            positions - множество, содержит позиции удаляемых записей
+        """
+        rows = array('q', range(self._file_rows)) if self._live is None \
+            else self._live
+        live = array('q')
+        start = 0
+        for position in sorted(p for p in positions if p < self.base_count):
+            live.extend(rows[start:position])
+            self._rows.pop(rows[position], None)
+            start = position + 1
+        live.extend(rows[start:])
+
+        self._appended = [record for i, record in enumerate(self._appended)
+            if self.base_count + i not in positions]
+        self._appended_positions = {record.get('ID'): i
+            for i, record in enumerate(self._appended)}
+        self._live = live
+        self.base_count = len(live)
+
+    def position_of_id(self, record_id):
+        """
+        Метод для поиска позиции записи по ID без декодирования строк
+
+        Параметры:
+            record_id - значение ID
+
+        Возвращает:
+            position - целое число или None, если записи нет
+        """
+        position = self._appended_positions.get(record_id)
+        if position is not None:
+            return self.base_count + position
+        if not isinstance(record_id, int) or isinstance(record_id, bool):
+            return None
+
+        if self.ids_sorted:
+            row = bisect_left(self._ids, record_id)
+            if row >= self._file_rows or self._ids[row] != record_id:
+                return None
+        else:
+            if self._unsorted_positions is None:
+                self._unsorted_positions = {value: row
+                    for row, value in enumerate(self._ids)}
+            row = self._unsorted_positions.get(record_id)
+            if row is None:
+                return None
+
+        if self._live is None:
+            return row
+        # Позиция строки файла среди оставшихся строк
+        position = bisect_left(self._live, row)
+        if position < self.base_count and self._live[position] == row:
+            return position
+        return None
+
+    def max_id(self):
+        """
+        Метод для получения наибольшего ID таблицы
+
+        Возвращает:
+            max_id - целое число, 0 для пустой таблицы
+        """
+        if not self.base_count:
+            base_max = 0
+        elif self._live is not None:
+            base_max = self._ids[self._live[-1]] if self.ids_sorted \
+                else max(self._ids[row] for row in self._live)
+        elif self.ids_sorted:
+            base_max = self._ids[self.base_count - 1]
+        else:
+            base_max = max(self._ids)
+        appended_max = max((key for key in self._appended_positions
+            if isinstance(key, int)), default=0)
+        return max(base_max, appended_max)
\ No newline at end of file
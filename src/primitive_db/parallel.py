@@ -0,0 +1,303 @@
+# src/primitive_db/parallel.py
+
+import atexit
+import mmap
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .columnar import COLUMN_CODECS, encode_table, read_header
+from .constrants import (
+    PARALLEL_SCAN_CHUNKS,
+    PARALLEL_SCAN_ROWS,
+    PARALLEL_SCAN_WORKERS,
+)
+from .predicates import Predicate
+
+# Снимки пишутся в разделяемую память, если она есть
+_SNAPSHOT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# Количество снимков, отображенных в рабочем процессе
+_ATTACHED_SNAPSHOTS = 4
+
+_rows_threshold = PARALLEL_SCAN_ROWS
+_workers = PARALLEL_SCAN_WORKERS
+_executor = None
+# Последний снимок каждой таблицы: имя -> (ключ версии, столбцы, путь)
+_snapshots = {}
+# Запросы к версиям таблиц без снимка: имя -> (ключ версии, количество)
+_demand = {}
+_lock = threading.Lock()
+# Отображенные снимки рабочего процесса: путь -> (mmap, заголовок, начало)
+_attached = OrderedDict()
+
+
+def set_parallel_scan(rows=None, workers=None):
+    """
+    Функция для настройки параллельного просмотра таблиц
+
+    Параметры:
+        rows - целое число, количество записей, начиная с которого
+            просмотр выполняется параллельно, 0 - выключить
+        workers - целое число, количество рабочих процессов,
+            0 - по количеству процессоров
+    """
+    global _rows_threshold, _workers
+    if rows is not None:
+        _rows_threshold = rows
+    if workers is not None and workers != _workers:
+        _workers = workers
+        shutdown_parallel()
+
+def scan_workers():
+    """
+    Функция для получения количества рабочих процессов просмотра
+    """
+    return _workers or os.cpu_count() or 1
+
+def parallel_enabled(rows):
+    """
+    Функция для проверки, выполнять ли просмотр таблицы параллельно
+
+    Параметры:
+        rows - целое число, количество записей таблицы
+    """
+    return 0 < _rows_threshold <= rows and scan_workers() > 1
+
+def _init_worker():
+    """
+    Функция инициализации рабочего процесса: Ctrl+C получает вся группа
+    процессов, а останавливать пул должен основной процесс
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _get_executor():
+    """
+    Функция для получения пула процессов, он создается при первом
+    параллельном просмотре
+
+    Процессы запускаются через spawn: сервер выполняет команды в потоках,
+    а fork многопоточного процесса небезопасен
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=scan_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker)
+        return _executor
+
+def snapshot_columns(predicate, columns):
+    """
+    Функция для получения столбцов снимка, нужных для проверки условия
+
+    Параметры:
+        predicate - Predicate, условие фильтрации
+        columns - список, содержит столбцы таблицы из метаданных
+
+    Возвращает:
+        names - кортеж, содержит имена столбцов условия по алфавиту
+    """
+    schema = {col['name'] for col in columns}
+    return tuple(sorted(name for name in predicate.columns() if name in schema))
+
+def snapshot_demand(key, names):
+    """
+    Функция для учета запроса к версии таблицы, для которой нужен
+    новый снимок
+
+    Параметры:
+        key - кортеж, (сессия, имя таблицы, версия данных)
+        names - кортеж, содержит имена столбцов условия
+
+    Возвращает:
+        reads - целое число, количество запросов к этой версии таблицы
+            без снимка, 0 - снимок с нужными столбцами уже записан
+    """
+    table_name = key[1]
+    with _lock:
+        current = _snapshots.get(table_name)
+        if current is not None and current[0] == key and \
+            set(names) <= set(current[1]):
+            return 0
+
+        previous = _demand.get(table_name)
+        reads = previous[1] + 1 if previous is not None and \
+            previous[0] == key else 1
+        _demand[table_name] = (key, reads)
+    return reads
+
+def _publish(table_data, columns, names, key):
+    """
+    Функция для записи снимка столбцов условия в колоночном формате
+    в разделяемую память
+
+    Снимок переиспользуется, пока версия таблицы не изменилась и в нем
+    есть нужные столбцы, иначе к столбцам снимка той же версии
+    добавляются столбцы условия
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        columns - список, содержит столбцы таблицы из метаданных
+        names - кортеж, содержит имена столбцов условия
+        key - кортеж, (сессия, имя таблицы, версия данных)
+
+    Возвращает:
+        path - строка, путь к файлу снимка
+    """
+    table_name = key[1]
+    with _lock:
+        current = _snapshots.get(table_name)
+        if current is not None and current[0] == key:
+            if set(names) <= set(current[1]):
+                return current[2]
+            names = tuple(sorted({*names, *current[1]}))
+
+        raw = encode_table([col for col in columns if col['name'] in names],
+            table_data)
+        fd, path = tempfile.mkstemp(prefix="primitive_db_", suffix=".col",
+            dir=_SNAPSHOT_DIR)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+
+        _snapshots[table_name] = (key, names, path)
+        _demand.pop(table_name, None)
+        if current is not None:
+            _remove(current[2])
+    return path
+
+def _remove(path):
+    """
+    Функция для удаления файла снимка, рабочие процессы, отобразившие
+    его, продолжают читать свою копию отображения
+
+    Параметры:
+        path - строка, путь к файлу снимка
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _attach(path):
+    """
+    Функция для отображения снимка в памяти рабочего процесса
+
+    Параметры:
+        path - строка, путь к файлу снимка
+
+    Возвращает:
+        (mapping, header, position) - отображение, заголовок снимка
+            и начало первой секции
+    """
+    snapshot = _attached.get(path)
+    if snapshot is not None:
+        _attached.move_to_end(path)
+        return snapshot
+
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, position = read_header(mapping)
+    snapshot = _attached[path] = (mapping, header, position)
+
+    while len(_attached) > _ATTACHED_SNAPSHOTS:
+        _, (old_mapping, _, _) = _attached.popitem(last=False)
+        old_mapping.close()
+    return snapshot
+
+def _scan_chunk(path, ast, names, start, stop):
+    """
+    Функция рабочего процесса для проверки условия на диапазоне записей
+
+    Декодируются только столбцы условия и только записи диапазона,
+    записи целиком не строятся
+
+    Параметры:
+        path - строка, путь к файлу снимка
+        ast - кортеж, дерево условия
+        names - кортеж, содержит имена столбцов условия
+        start, stop - целые числа, диапазон позиций записей
+
+    Возвращает:
+        positions - байты массива позиций подходящих записей
+    """
+    mapping, header, position = _attach(path)
+    layout = {col['name']: col for col in header['columns']}
+    count = header['rows']
+
+    with memoryview(mapping) as view:
+        values = []
+        for name in names:
+            col = layout[name]
+            offset = position + col['offset']
+            with view[offset:offset + col['length']] as section:
+                decode = COLUMN_CODECS[col['type']][1]
+                values.append(decode(section, count, start, stop))
+
+    match = Predicate(ast).bind(names)
+    return array('q', [start + i for i, row in enumerate(zip(*values))
+        if match(row)]).tobytes()
+
+def parallel_positions(table_data, predicate, columns, key):
+    """
+    Функция для параллельного поиска позиций записей по условию
+
+    Таблица делится на диапазоны по PARALLEL_SCAN_CHUNKS на процесс,
+    условие проверяется в пуле процессов над снимком столбцов условия
+    в разделяемой памяти, поэтому записи в процессы не передаются. Результаты
+    объединяются в порядке диапазонов
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        predicate - Predicate, условие фильтрации
+        columns - список, содержит столбцы таблицы из метаданных
+        key - кортеж, (сессия, имя таблицы, версия данных)
+
+    Возвращает:
+        positions - массив позиций подходящих записей по возрастанию
+            или None, если параллельный просмотр не удался
+    """
+    names = snapshot_columns(predicate, columns)
+    if not names:
+        return None
+    rows = len(table_data)
+    chunk = -(-rows // (scan_workers() * PARALLEL_SCAN_CHUNKS))
+
+    try:
+        path = _publish(table_data, columns, names, key)
+        executor = _get_executor()
+        futures = [executor.submit(_scan_chunk, path, predicate.ast, names,
+            start, min(start + chunk, rows)) for start in range(0, rows, chunk)]
+        positions = array('q')
+        for future in futures:
+            positions.frombytes(future.result())
+    except BrokenProcessPool:
+        # Рабочий процесс завершился аварийно, при следующем просмотре
+        # пул создается заново
+        shutdown_parallel()
+        return None
+    except (ValueError, OSError):
+        # Значения не кодируются в колоночный формат (например, None)
+        # или снимок не записан - просмотр выполняется последовательно
+        return None
+    return positions
+
+@atexit.register
+def shutdown_parallel():
+    """
+    Функция для остановки пула процессов и удаления снимков таблиц
+    """
+    global _executor
+    with _lock:
+        for _, _, path in _snapshots.values():
+            _remove(path)
+        _snapshots.clear()
+        _demand.clear()
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
\ No newline at end of file
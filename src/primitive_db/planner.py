@@ -0,0 +1,293 @@
+# src/primitive_db/planner.py
+
+import math
+from collections import Counter
+
+from .constrants import STATS_SAMPLE_SIZE
+from .indexes import index_positions
+from .parallel import (
+    parallel_enabled,
+    scan_workers,
+    snapshot_columns,
+    snapshot_demand,
+)
+from .predicates import format_node
+
+FULL_SCAN = "full_scan"
+PARALLEL_SCAN = "parallel_scan"
+PK_LOOKUP = "pk_lookup"
+INDEX_EQ = "index_eq"
+INDEX_IN = "index_in"
+INDEX_RANGE = "index_range"
+
+# Доля записей, которую оценщик предполагает без статистики
+DEFAULT_EQ_SELECTIVITY = 0.1
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+
+# Чтение записи по позиции из индекса дороже последовательного просмотра
+INDEX_ROW_COST = 1.5
+# Кодирование значения столбца в снимок для параллельного просмотра
+# стоит как проверка условия на записи
+SNAPSHOT_VALUE_COST = 1.0
+
+
+def collect_stats(columns, table_data, sample_size=STATS_SAMPLE_SIZE):
+    """
+    Функция для сбора статистики таблицы для планировщика
+
+    Для больших таблиц просматривается равномерная выборка записей,
+    количество различных значений оценивается по ней: значения,
+    встреченные в выборке один раз, масштабируются на всю таблицу
+
+    Параметры:
+        columns - список, содержит столбцы таблицы из метаданных
+        table_data - список, содержит словари с данными таблицы
+        sample_size - целое число, максимальный размер выборки
+
+    Возвращает:
+        stats - словарь с количеством записей (rows), оценками количества
+            различных значений (distinct) и границами столбцов int (min, max)
+    """
+    rows = len(table_data)
+    if rows > sample_size:
+        step = rows / sample_size
+        sample = [table_data[int(i * step)] for i in range(sample_size)]
+    else:
+        sample = list(table_data)
+
+    stats = {'rows': rows, 'distinct': {}, 'min': {}, 'max': {}}
+    for col in columns:
+        name = col['name']
+        counts = Counter(record.get(name) for record in sample)
+
+        singles = sum(1 for count in counts.values() if count == 1)
+        if len(sample) == rows or not sample:
+            distinct = len(counts)
+        elif singles == len(sample):
+            # Все значения выборки различны - столбец считается уникальным
+            distinct = rows
+        else:
+            scale = math.sqrt(rows / len(sample))
+            distinct = round(scale * singles + len(counts) - singles)
+        stats['distinct'][name] = min(distinct, rows)
+
+        if col['type'] == 'int':
+            values = [value for value in counts
+                if isinstance(value, int) and not isinstance(value, bool)]
+            if values:
+                stats['min'][name] = min(values)
+                stats['max'][name] = max(values)
+
+    return stats
+
+def estimate_rows(node, stats, rows):
+    """
+    Функция для оценки количества записей, отбираемых одним условием
+
+    Параметры:
+        node - кортеж, узел дерева условия
+        stats - словарь, содержит статистику таблицы или None
+        rows - целое число, текущее количество записей таблицы
+
+    Возвращает:
+        estimate - целое число, оценка количества записей
+    """
+    stats = stats or {}
+    column = node[2] if node[0] == 'cmp' else node[1]
+    distinct = stats.get('distinct', {}).get(column)
+
+    if distinct:
+        eq_rows = rows / distinct
+    else:
+        eq_rows = rows * DEFAULT_EQ_SELECTIVITY
+
+    if node[0] == 'cmp' and node[1] == '==':
+        estimate = 1 if column == 'ID' else eq_rows
+    elif node[0] == 'in':
+        estimate = len(node[2]) * (1 if column == 'ID' else eq_rows)
+    elif node[0] == 'cmp' and node[1] != '!=':
+        estimate = rows * _range_fraction(node, stats)
+    else:
+        estimate = rows
+
+    return min(rows, math.ceil(estimate))
+
+def _range_fraction(node, stats):
+    """
+    Функция для оценки доли записей в диапазоне по границам столбца,
+    значения считаются распределенными равномерно
+
+    Параметры:
+        node - кортеж, узел сравнения
+        stats - словарь, содержит статистику таблицы
+    """
+    _, op, column, value = node
+    low = stats.get('min', {}).get(column)
+    high = stats.get('max', {}).get(column)
+    if low is None or high is None or isinstance(value, (bool, str)):
+        return DEFAULT_RANGE_SELECTIVITY
+    if high == low:
+        below = 0.0 if value <= low else 1.0
+    else:
+        below = (value - low) / (high - low)
+    below = min(1.0, max(0.0, below))
+    return below if op in ('<', '<=') else 1.0 - below
+
+def access_path(node, indexes):
+    """
+    Функция для определения способа доступа через индекс по одному условию
+
+    Параметры:
+        node - кортеж, узел дерева условия
+        indexes - словарь, содержит индексы по именам столбцов
+
+    Возвращает:
+        access - строка, способ доступа или None, если индекс не подходит
+    """
+    if node[0] == 'in':
+        return INDEX_IN if node[1] in indexes else None
+    if node[0] != 'cmp':
+        return None
+
+    index = indexes.get(node[2])
+    if index is None:
+        return None
+    if node[1] == '==':
+        return PK_LOOKUP if index.kind == 'primary' else INDEX_EQ
+    if node[1] != '!=' and hasattr(index, 'range'):
+        return INDEX_RANGE
+    return None
+
+
+class Plan:
+    """
+    Класс плана выполнения запроса
+
+    Атрибуты:
+        access - строка, способ доступа к записям
+        rows - целое число, количество записей таблицы
+        estimated_rows - целое число, оценка просматриваемых записей
+        node - кортеж, условие, по которому выбираются записи через индекс
+        examined - целое число, фактически просмотренные записи или None
+        alternatives - список, содержит рассмотренные планы
+        source - кортеж (ключ версии таблицы, столбцы из метаданных)
+            для параллельного просмотра
+        setup_cost - число, стоимость подготовки просмотра: записи
+            снимка для параллельного просмотра
+    """
+
+    def __init__(self, access, rows, estimated_rows, node=None, source=None,
+        setup_cost=0):
+        """
+        Параметры:
+            access - строка, способ доступа к записям
+            rows - целое число, количество записей таблицы
+            estimated_rows - целое число, оценка просматриваемых записей
+            node - кортеж, условие для доступа через индекс
+            source - кортеж, таблица для параллельного просмотра
+            setup_cost - число, стоимость подготовки просмотра
+        """
+        self.access = access
+        self.rows = rows
+        self.estimated_rows = estimated_rows
+        self.node = node
+        self.source = source
+        self.setup_cost = setup_cost
+        self.examined = None
+        self.alternatives = [self]
+
+    @property
+    def column(self):
+        if self.node is None:
+            return None
+        return self.node[2] if self.node[0] == 'cmp' else self.node[1]
+
+    @property
+    def cost(self):
+        if self.access == FULL_SCAN:
+            return self.rows
+        if self.access == PARALLEL_SCAN:
+            return self.rows / scan_workers() + self.setup_cost
+        return self.estimated_rows * INDEX_ROW_COST
+
+    def sequential(self):
+        """
+        Метод для получения плана без параллельного просмотра: для
+        параллельного просмотра - полный просмотр из рассмотренных
+        вариантов, для остальных планов - сам план
+        """
+        if self.access != PARALLEL_SCAN:
+            return self
+        for plan in self.alternatives:
+            if plan.access == FULL_SCAN:
+                return plan
+        return Plan(FULL_SCAN, self.rows, self.rows)
+
+    def positions(self, indexes):
+        """
+        Метод для выбора позиций записей согласно плану
+
+        Параметры:
+            indexes - словарь, содержит индексы по именам столбцов
+
+        Возвращает:
+            positions - список позиций или None для полного просмотра
+        """
+        if self.access in (FULL_SCAN, PARALLEL_SCAN):
+            return None
+        return index_positions(self.node, indexes)
+
+    def describe(self):
+        """
+        Метод для получения текстового описания способа доступа
+        """
+        if self.access == FULL_SCAN:
+            return FULL_SCAN
+        if self.access == PARALLEL_SCAN:
+            return f"{PARALLEL_SCAN} ({scan_workers()} процессов)"
+        return f"{self.access} ({format_node(self.node)})"
+
+
+def plan_query(predicate, indexes, stats, rows, source=None):
+    """
+    Функция для выбора самого дешевого способа доступа к записям
+
+    Рассматриваются полный просмотр и доступ через индекс по каждому
+    условию, объединенному через AND на верхнем уровне. Для таблиц
+    от PARALLEL_SCAN_ROWS записей рассматривается и параллельный просмотр.
+    Если снимка столбцов условия для текущей версии таблицы нет, к его
+    стоимости добавляется запись снимка, деленная на количество запросов
+    к этой версии: сразу после изменения таблицы выгоднее последовательный
+    просмотр, а снимок окупается при повторных запросах
+
+    Параметры:
+        predicate - Predicate или None, содержит условие фильтрации
+        indexes - словарь, содержит индексы по именам столбцов
+        stats - словарь, содержит статистику таблицы или None
+        rows - целое число, текущее количество записей таблицы
+        source - кортеж (ключ версии таблицы, столбцы из метаданных),
+            без него параллельный просмотр не рассматривается
+
+    Возвращает:
+        plan - Plan, выбранный план
+    """
+    candidates = [Plan(FULL_SCAN, rows, rows)]
+    if predicate is not None and source is not None and parallel_enabled(rows):
+        key, columns = source
+        names = snapshot_columns(predicate, columns)
+        reads = snapshot_demand(key, names)
+        setup_cost = rows * len(names) * SNAPSHOT_VALUE_COST / reads \
+            if reads else 0
+        candidates.append(Plan(PARALLEL_SCAN, rows, rows, source=source,
+            setup_cost=setup_cost))
+
+    if predicate is not None and indexes:
+        for node in predicate.conjuncts():
+            access = access_path(node, indexes)
+            if access is not None:
+                candidates.append(Plan(access, rows,
+                    estimate_rows(node, stats, rows), node))
+
+    best = min(candidates, key=lambda plan: plan.cost)
+    best.alternatives = candidates
+    return best
\ No newline at end of file
@@ -0,0 +1,432 @@
+# src/primitive_db/predicates.py
+
+import re
+from functools import lru_cache
+
+from .constrants import PREDICATE_CODE_CACHE_SIZE
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"[^"]*"|'[^']*')
+      | (?P<op><=|>=|!=|<>|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<word>[^\s()<>=!,'"]+)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"and", "or", "in", "like"}
+
+COMPARISON_OPS = {"=": "==", "!=": "!=", "<>": "!=", "<": "<", "<=": "<=",
+    ">": ">", ">=": ">="}
+
+
+def tokenize(text):
+    """
+    Функция для разбиения условия where на лексемы
+
+    Параметры:
+        text - строка, содержит условие where
+
+    Возвращает:
+        tokens - список пар (вид лексемы, значение)
+    """
+    tokens = []
+    position = 0
+    text = text.rstrip()
+
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Некорректный символ в условии: {text[position:]}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value.lower() in _KEYWORDS:
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+
+    return tokens
+
+def parse_literal(kind, value):
+    """
+    Функция для преобразования лексемы значения в значение Python
+
+    Параметры:
+        kind - строка, вид лексемы: string или word
+        value - строка, текст лексемы
+
+    Возвращает:
+        value - строка, целое число или логическое значение
+    """
+    if kind == "string":
+        return value[1:-1]
+    if value.lower() == "true":
+        return True
+    if value.lower() == "false":
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class _Parser:
+    """
+    Класс рекурсивного разбора условия where в дерево
+
+    Узлы дерева - кортежи:
+        ("and", (узел, ...)), ("or", (узел, ...)),
+        ("cmp", оператор, столбец, значение),
+        ("in", столбец, (значение, ...)),
+        ("like", столбец, шаблон)
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or kind and token[0] != kind or \
+            value and token[1] != value:
+            expected = value or kind or "лексема"
+            found = token[1] if token[1] is not None else "конец условия"
+            raise ValueError(f"Ожидалось {expected}, получено: {found}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Лишний текст в условии: {self.peek()[1]}")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == ("keyword", "or"):
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", tuple(nodes))
+
+    def parse_and(self):
+        nodes = [self.parse_atom()]
+        while self.peek() == ("keyword", "and"):
+            self.take()
+            nodes.append(self.parse_atom())
+        return nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+
+    def parse_value(self):
+        kind, value = self.peek()
+        if kind not in ("string", "word"):
+            found = value if value is not None else "конец условия"
+            raise ValueError(f"Ожидалось значение, получено: {found}")
+        self.take()
+        return parse_literal(kind, value)
+
+    def parse_atom(self):
+        if self.peek() == ("punct", "("):
+            self.take()
+            node = self.parse_or()
+            self.take("punct", ")")
+            return node
+
+        _, column = self.take("word")
+        kind, value = self.peek()
+
+        if kind == "op":
+            self.take()
+            return ("cmp", COMPARISON_OPS[value], column, self.parse_value())
+
+        if (kind, value) == ("keyword", "in"):
+            self.take()
+            self.take("punct", "(")
+            values = [self.parse_value()]
+            while self.peek() == ("punct", ","):
+                self.take()
+                values.append(self.parse_value())
+            self.take("punct", ")")
+            return ("in", column, tuple(values))
+
+        if (kind, value) == ("keyword", "like"):
+            self.take()
+            pattern = self.parse_value()
+            if not isinstance(pattern, str):
+                pattern = str(pattern)
+            return ("like", column, pattern)
+
+        raise ValueError(f"Ожидался оператор после столбца {column}, "
+            f"получено: {value if value is not None else 'конец условия'}")
+
+
+def coerce_literal(value, col_type, column):
+    """
+    Функция для приведения значения из условия к типу столбца
+
+    Параметры:
+        value - значение из условия
+        col_type - строка, тип столбца: int, str или bool
+        column - строка, имя столбца для сообщения об ошибке
+    """
+    if col_type == "str":
+        # Значения без кавычек вроде 5 или true сравниваются как текст
+        return str(value).lower() if isinstance(value, bool) else str(value)
+    if col_type == "bool" and isinstance(value, bool):
+        return value
+    if col_type == "int" and isinstance(value, int) and \
+        not isinstance(value, bool):
+        return value
+    raise ValueError(f'Значение {value!r} не подходит для столбца "{column}" '
+        f'типа {col_type}')
+
+def _like_to_regex(pattern):
+    """
+    Функция для преобразования шаблона LIKE в регулярное выражение
+
+    Параметры:
+        pattern - строка, шаблон с % и _
+    """
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+def _typed(node, col_types):
+    """
+    Функция для проверки столбцов дерева условия и приведения значений
+    к типам столбцов
+
+    Параметры:
+        node - кортеж, узел дерева условия
+        col_types - словарь, содержит типы столбцов по именам или None
+    """
+    if node[0] in ("and", "or"):
+        return (node[0], tuple(_typed(child, col_types) for child in node[1]))
+    if col_types is None:
+        return node
+
+    column = node[2] if node[0] == "cmp" else node[1]
+    if column not in col_types:
+        raise ValueError(f'Столбец "{column}" не существует')
+    col_type = col_types[column]
+
+    if node[0] == "cmp":
+        value = coerce_literal(node[3], col_type, column)
+        if col_type == "bool" and node[1] not in ("==", "!="):
+            raise ValueError(f'Для столбца "{column}" типа bool '
+                "допустимы только = и !=")
+        return ("cmp", node[1], column, value)
+    if node[0] == "in":
+        return ("in", column, tuple(coerce_literal(value, col_type, column)
+            for value in node[2]))
+    if col_type != "str":
+        raise ValueError(f'LIKE применим только к столбцам типа str, '
+            f'"{column}" имеет тип {col_type}')
+    return node
+
+def format_node(node):
+    """
+    Функция для записи узла дерева условия в виде текста
+
+    Параметры:
+        node - кортеж, узел дерева условия
+
+    Возвращает:
+        text - строка, условие в синтаксисе where
+    """
+    def literal(value):
+        if isinstance(value, str):
+            return repr(value)
+        return str(value).lower() if isinstance(value, bool) else str(value)
+
+    kind = node[0]
+    if kind in ("and", "or"):
+        return "(" + f" {kind} ".join(format_node(child) for child in node[1]) + ")"
+    if kind == "cmp":
+        op = "=" if node[1] == "==" else node[1]
+        return f"{node[2]} {op} {literal(node[3])}"
+    if kind == "in":
+        return f"{node[1]} in ({', '.join(literal(value) for value in node[2])})"
+    return f"{node[1]} like {literal(node[2])}"
+
+
+@lru_cache(maxsize=PREDICATE_CODE_CACHE_SIZE)
+def _compile_source(source):
+    """
+    Функция для компиляции текста лямбда-выражения условия с кэшем
+
+    Значения условия в текст не входят, поэтому условия одного вида
+    с разными значениями (например, поиск по разным ID) компилируются
+    один раз
+
+    Параметры:
+        source - строка, текст лямбда-выражения
+    """
+    return compile(source, "<where>", "eval")
+
+
+class Predicate:
+    """
+    Класс разобранного и скомпилированного условия where
+
+    Атрибуты:
+        ast - кортеж, дерево условия
+        key - строка, каноническое представление для ключа кэша
+        match - функция record -> bool, проверяет запись по именам
+            столбцов, для записей схемы быстрее проверка из bind
+    """
+
+    def __init__(self, ast):
+        """
+        Параметры:
+            ast - кортеж, дерево условия
+        """
+        self.ast = ast
+        self.key = repr(ast)
+        self._match = None
+        self._bound = {}
+
+    @property
+    def match(self):
+        # Компилируется при первом обращении: записи схемы проверяются
+        # функцией из bind, и вторая компиляция не нужна
+        if self._match is None:
+            self._match = self._compile()
+        return self._match
+
+    def bind(self, fields):
+        """
+        Метод для получения проверки записей схемы (Row), в которой
+        столбцы заменены позициями, проверки кэшируются по схеме
+
+        Параметры:
+            fields - кортеж, содержит имена столбцов записей
+
+        Возвращает:
+            match - функция record -> bool, проверяет запись
+        """
+        match = self._bound.get(fields)
+        if match is None:
+            match = self._bound[fields] = self._compile(fields)
+        return match
+
+    def _compile(self, fields=None):
+        """
+        Метод для компиляции дерева в одну функцию Python
+
+        Дерево переводится в текст лямбда-выражения, а значения условия
+        передаются через пространство имен, поэтому при просмотре записей
+        нет обхода дерева и повторного разбора условия
+
+        Параметры:
+            fields - кортеж, содержит имена столбцов записей схемы, значения
+                читаются по позициям, None - записи читаются по именам
+        """
+        namespace = {"__builtins__": {}}
+        positions = None if fields is None else \
+            {name: i for i, name in enumerate(fields)}
+
+        def constant(value):
+            name = f"_v{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        def getter(column, default=None):
+            if positions is None:
+                if default is None:
+                    return f"_r.get({column!r})"
+                return f"_r.get({column!r}, {default!r})"
+            if column in positions:
+                return f"_r[{positions[column]}]"
+            return repr(default)
+
+        def emit(node):
+            kind = node[0]
+            if kind in ("and", "or"):
+                return "(" + f" {kind} ".join(emit(child) for child in node[1]) + ")"
+            if kind == "cmp":
+                _, op, column, value = node
+                value_of = getter(column)
+                if op in ("==", "!="):
+                    return f"({value_of} {op} {constant(value)})"
+                # Записи с отсутствующим значением не проходят сравнение
+                return (f"({value_of} is not None and {value_of} {op} "
+                    f"{constant(value)})")
+            if kind == "in":
+                return f"({getter(node[1])} in {constant(frozenset(node[2]))})"
+            regex = constant(_like_to_regex(node[2]))
+            return f"({regex}.match(str({getter(node[1], '')})) is not None)"
+
+        namespace["str"] = str
+        return eval(_compile_source(f"lambda _r: {emit(self.ast)}"), namespace)
+
+    def columns(self):
+        """
+        Метод для получения множества столбцов, участвующих в условии
+        """
+        result = set()
+
+        def walk(node):
+            if node[0] in ("and", "or"):
+                for child in node[1]:
+                    walk(child)
+            else:
+                result.add(node[2] if node[0] == "cmp" else node[1])
+
+        walk(self.ast)
+        return result
+
+    def conjuncts(self):
+        """
+        Метод для получения условий, объединенных через AND на верхнем
+        уровне, по ним можно выбрать записи через индекс
+        """
+        if self.ast[0] == "and":
+            return list(self.ast[1])
+        return [self.ast]
+
+
+def parse_predicate(text, columns=None):
+    """
+    Функция для разбора и компиляции условия where
+
+    Параметры:
+        text - строка, содержит условие where
+        columns - список, содержит столбцы таблицы из метаданных, по ним
+            проверяются имена столбцов и приводятся типы значений
+
+    Возвращает:
+        predicate - Predicate или None для пустого условия
+    """
+    if not text or not text.strip():
+        return None
+
+    tokens = tokenize(text)
+    ast = _Parser(tokens).parse()
+    col_types = None if columns is None else \
+        {col['name']: col['type'] for col in columns}
+    return Predicate(_typed(ast, col_types))
+
+def as_predicate(where_clause):
+    """
+    Функция для приведения условия к Predicate, словарь столбец -> значение
+    превращается в условие равенства всех пар через AND
+
+    Параметры:
+        where_clause - Predicate, словарь или None
+    """
+    if where_clause is None or isinstance(where_clause, Predicate):
+        return where_clause
+    if not where_clause:
+        return None
+    nodes = tuple(("cmp", "==", column, value)
+        for column, value in where_clause.items())
+    return Predicate(nodes[0] if len(nodes) == 1 else ("and", nodes))
\ No newline at end of file
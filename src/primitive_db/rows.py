@@ -0,0 +1,208 @@
+# src/primitive_db/rows.py
+
+from operator import itemgetter
+
+# Классы записей по кортежам имен столбцов
+_row_types = {}
+
+
+class Row(tuple):
+    """
+    Базовый класс записи таблицы
+
+    Значения хранятся кортежем в порядке столбцов схемы, а имена столбцов
+    и их позиции - один раз в классе схемы, поэтому запись не несет копию
+    ключей, как словарь. Записи неизменяемы: обновление заменяет запись
+    в таблице новой. Имена столбцов разрешаются в позиции один раз
+    на запрос через column_getter, метод get оставлен для редких обращений
+    и для кода, работающего и со словарями
+    """
+    __slots__ = ()
+    fields = ()
+    positions = {}
+
+    def get(self, name, default=None):
+        """
+        Метод для получения значения столбца по имени
+
+        Параметры:
+            name - строка, имя столбца
+            default - значение для отсутствующего столбца
+        """
+        position = self.positions.get(name)
+        return default if position is None else self[position]
+
+    def items(self):
+        """
+        Метод для получения пар (столбец, значение)
+        """
+        return zip(self.fields, self)
+
+    def as_dict(self):
+        """
+        Метод для преобразования записи в словарь
+        """
+        return dict(zip(self.fields, self))
+
+    def replace(self, changes):
+        """
+        Метод для получения копии записи с измененными значениями
+
+        Параметры:
+            changes - словарь, содержит новые значения по именам столбцов
+        """
+        values = list(self)
+        for name, value in changes.items():
+            values[self.positions[name]] = value
+        return type(self)(values)
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        Метод для создания записи из словаря, отсутствующие столбцы
+        получают значение None
+
+        Параметры:
+            record - словарь, содержит значения по именам столбцов
+        """
+        return cls(map(record.get, cls.fields))
+
+    def __reduce__(self):
+        # Классы схем создаются динамически, поэтому при сериализации
+        # передаются имена столбцов, а не класс
+        return _make_row, (self.fields, tuple(self))
+
+    def __repr__(self):
+        return f"Row({self.as_dict()!r})"
+
+
+def _make_row(fields, values):
+    """
+    Функция для восстановления записи при десериализации
+
+    Параметры:
+        fields - кортеж, содержит имена столбцов
+        values - кортеж, содержит значения
+    """
+    return row_type(fields)(values)
+
+def row_type(names):
+    """
+    Функция для получения класса записи по именам столбцов, классы
+    создаются один раз на схему
+
+    Параметры:
+        names - итерируемый объект с именами столбцов
+    """
+    names = tuple(names)
+    cls = _row_types.get(names)
+    if cls is None:
+        cls = _row_types[names] = type("Row", (Row,), {'__slots__': (),
+            'fields': names,
+            'positions': {name: i for i, name in enumerate(names)}})
+    return cls
+
+def schema_row_type(columns):
+    """
+    Функция для получения класса записи по столбцам из метаданных
+
+    Параметры:
+        columns - список, содержит столбцы таблицы из метаданных
+    """
+    return row_type(col['name'] for col in columns)
+
+def to_rows(records, columns):
+    """
+    Функция для преобразования словарей в записи схемы
+
+    Параметры:
+        records - итерируемый объект со словарями
+        columns - список, содержит столбцы таблицы из метаданных
+    """
+    return dicts_to_rows(records, schema_row_type(columns))
+
+def dicts_to_rows(records, row_cls):
+    """
+    Функция для преобразования списка словарей в записи класса row_cls
+
+    Значения читаются itemgetter за один вызов на запись, словари
+    с неполным набором столбцов преобразуются через from_dict
+
+    Параметры:
+        records - список, содержит словари
+        row_cls - класс записей схемы
+    """
+    if len(row_cls.fields) > 1:
+        getter = itemgetter(*row_cls.fields)
+        try:
+            return list(map(row_cls, map(getter, records)))
+        except KeyError:
+            pass
+    return list(map(row_cls.from_dict, records))
+
+def as_dict(record):
+    """
+    Функция для преобразования записи в словарь на границе модуля:
+    при записи JSON, выгрузке и выводе, словари возвращаются как есть
+
+    Параметры:
+        record - Row или словарь
+    """
+    return record.as_dict() if isinstance(record, Row) else record
+
+def table_row_type(table_data):
+    """
+    Функция для получения класса записей таблицы
+
+    Параметры:
+        table_data - список или отображенная таблица
+
+    Возвращает:
+        row_type - класс записи или None, если записи таблицы - словари
+            или таблица пуста
+    """
+    cls = getattr(table_data, 'row_type', None)
+    if cls is None and len(table_data) and isinstance(table_data[0], Row):
+        cls = type(table_data[0])
+    return cls
+
+def column_getter(record_type, name):
+    """
+    Функция для получения функции чтения столбца, для записей схемы
+    имя столбца заменяется позицией
+
+    Параметры:
+        record_type - класс записей: подкласс Row или None для словарей
+        name - строка, имя столбца
+
+    Возвращает:
+        getter - функция record -> значение столбца или None
+    """
+    if record_type is not None and issubclass(record_type, Row):
+        position = record_type.positions.get(name)
+        if position is None:
+            return lambda record: None
+        return itemgetter(position)
+    return lambda record: record.get(name)
+
+def record_getter(record_type, names, default=None):
+    """
+    Функция для получения функции чтения нескольких столбцов записи
+
+    Параметры:
+        record_type - класс записей: подкласс Row или None для словарей
+        names - список, содержит имена столбцов
+        default - значение для отсутствующих столбцов
+
+    Возвращает:
+        getter - функция record -> кортеж значений столбцов
+    """
+    names = tuple(names)
+    if record_type is not None and issubclass(record_type, Row) and \
+        all(name in record_type.positions for name in names):
+        positions = [record_type.positions[name] for name in names]
+        if len(positions) == 1:
+            position = positions[0]
+            return lambda record: (record[position],)
+        return itemgetter(*positions)
+    return lambda record: tuple(record.get(name, default) for name in names)
\ No newline at end of file
@@ -0,0 +1,374 @@
+# src/primitive_db/server.py
+
+import asyncio
+import io
+import json
+import os
+import shlex
+import socket
+import sys
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+from .constrants import FLUSH_INTERVAL_MS, FLUSH_POLICY, STORAGE_BACKEND
+from .decorators import handle_db_errors, set_auto_confirm
+from .engine import execute_command
+from .instrument import set_timing_report
+from .table_manager import TableManager
+
+# Команды, которые только читают таблицы и выполняются одновременно
+READ_COMMANDS = ("select", "explain", "list_tables", "info", "export", "help",
+    "cache_info", "io_stats", "stats")
+
+# Транзакция принадлежит всему менеджеру таблиц, а не соединению
+TRANSACTION_COMMANDS = ("begin", "commit", "rollback")
+
+
+class ReadWriteLock:
+    """
+    Класс блокировки для читателей и писателей в asyncio
+
+    Читатели выполняются одновременно, писатель - один. Ожидающий писатель
+    не пропускает новых читателей, поэтому поток чтений его не задерживает
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(
+                    lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ThreadOutput(io.TextIOBase):
+    """
+    Класс потока вывода, который направляет print каждого потока
+    в его собственный буфер, если он задан
+    """
+
+    def __init__(self, default):
+        """
+        Параметры:
+            default - поток вывода для потоков без буфера
+        """
+        self._default = default
+        self._local = threading.local()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._default).write(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._default.flush()
+
+    @contextmanager
+    def capture(self):
+        """
+        Метод для перехвата вывода текущего потока
+        """
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+class DatabaseServer:
+    """
+    Класс сервера базы данных
+
+    Таблицы загружаются в память сервера один раз и обслуживают всех
+    клиентов. Запрос - JSON строка {"id": ..., "command": "<команда>"},
+    ответ - JSON строка {"id": ..., "ok": ..., "output": "<вывод>",
+    "closed": ...}. Запросы одного соединения выполняются по порядку,
+    поэтому клиент может отправить несколько запросов, не дожидаясь ответов
+    """
+
+    def __init__(self, manager):
+        """
+        Параметры:
+            manager - TableManager, хранит таблицы сервера
+        """
+        self.manager = manager
+        self.lock = ReadWriteLock()
+        self.output = ThreadOutput(sys.stdout)
+
+    def _execute(self, command, session, write):
+        """
+        Метод для выполнения команды в рабочем потоке с перехватом вывода
+
+        Параметры:
+            command - строка, содержит команду
+            session - словарь, содержит настройки сессии соединения
+            write - логическое значение, команда выполняется
+                под блокировкой записи
+
+        Возвращает:
+            alive, ok, output - соединение продолжается, команда выполнена
+                без исключения, вывод команды
+        """
+        alive, ok = True, True
+        with self.output.capture() as buffer:
+            try:
+                if write:
+                    self.manager.refresh()
+                alive = execute_command(self.manager, self.manager.metadata,
+                    command, session)
+                if write:
+                    self.manager.after_command()
+            except Exception as e:
+                ok = False
+                print(f"Произошла непредвиденная ошибка: {e}")
+        return alive, ok, buffer.getvalue()
+
+    def _read_ready(self, tables):
+        """
+        Метод для проверки, может ли команда чтения выполняться
+        одновременно с другими чтениями
+
+        Параметры:
+            tables - список, содержит имена таблиц команды
+        """
+        return not self.manager.has_disk_changes() and \
+            self.manager.read_ready(tables)
+
+    def _prepare_read(self, tables):
+        """
+        Метод для подготовки таблиц к чтению в рабочем потоке, вызывается
+        под блокировкой записи. Ошибки не выводятся: команда сообщит
+        о них сама
+
+        Параметры:
+            tables - список, содержит имена таблиц команды
+        """
+        try:
+            self.manager.refresh()
+            self.manager.prepare_read(tables)
+            self.manager.after_command()
+        except Exception:
+            pass
+
+    async def execute(self, command, session):
+        """
+        Метод для выполнения команды с блокировкой чтения или записи
+
+        Чтения выполняются одновременно, поэтому не должны изменять
+        состояние менеджера таблиц. Изменения других процессов, загрузка
+        таблиц и индексов и сбор статистики для чтения выполняются заранее
+        под блокировкой записи. Если к началу чтения подготовка устарела,
+        команда выполняется под блокировкой записи
+
+        Параметры:
+            command - строка, содержит команду
+            session - словарь, содержит настройки сессии соединения
+
+        Возвращает:
+            alive, ok, output - см. _execute
+        """
+        name = command.split(maxsplit=1)[0].lower() if command.strip() else ""
+        if name in TRANSACTION_COMMANDS:
+            return True, True, (f'Ошибка: команда "{name}" недоступна '
+                "в режиме сервера.\n")
+
+        if name not in READ_COMMANDS:
+            async with self.lock.write():
+                return await asyncio.to_thread(self._execute, command,
+                    session, True)
+
+        tables = _read_tables(command)
+        if not self._read_ready(tables):
+            async with self.lock.write():
+                await asyncio.to_thread(self._prepare_read, tables)
+
+        result = None
+        async with self.lock.read():
+            # Между подготовкой и чтением мог выполниться писатель
+            if self._read_ready(tables):
+                result = await asyncio.to_thread(self._execute, command,
+                    session, False)
+        if result is None:
+            async with self.lock.write():
+                return await asyncio.to_thread(self._execute, command,
+                    session, True)
+
+        if self.manager.is_dirty():
+            async with self.lock.write():
+                await asyncio.to_thread(self.manager.after_command)
+        return result
+
+    async def handle_client(self, reader, writer):
+        """
+        Метод для обслуживания одного соединения
+
+        Параметры:
+            reader - asyncio.StreamReader соединения
+            writer - asyncio.StreamWriter соединения
+        """
+        session = {'pager_size': None, 'interactive': False, 'refresh': False}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    command = str(request['command']).strip().rstrip(';')
+                except (ValueError, KeyError, TypeError):
+                    request = {}
+                    alive, ok, output = True, False, \
+                        "Ошибка: некорректный запрос.\n"
+                else:
+                    alive, ok, output = await self.execute(command, session)
+
+                response = {'id': request.get('id'), 'ok': ok,
+                    'output': output, 'closed': not alive}
+                writer.write(json.dumps(response, ensure_ascii=False).encode()
+                    + b'\n')
+                await writer.drain()
+                if not alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, socket_path=None, host=None, port=None):
+        """
+        Метод для запуска сервера на Unix сокете или TCP порту
+
+        Параметры:
+            socket_path - строка, путь к Unix сокету
+            host - строка, адрес TCP сервера
+            port - целое число, порт TCP сервера
+        """
+        if socket_path is not None:
+            _remove_stale_socket(socket_path)
+            server = await asyncio.start_unix_server(self.handle_client,
+                path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            address = f"{host}:{port}"
+
+        print(f"Сервер базы данных слушает {address}. Остановка - Ctrl+C.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def _read_tables(command):
+    """
+    Функция для получения имен таблиц, которые читает команда
+
+    Параметры:
+        command - строка, содержит команду чтения
+
+    Возвращает:
+        tables - список, содержит имена таблиц: аргумент info и export
+            и имена после from и join
+    """
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return []
+    if not args:
+        return []
+    if args[0].lower() in ("info", "export"):
+        return args[1:2]
+    return [args[i + 1] for i, arg in enumerate(args[:-1])
+        if arg.lower() in ("from", "join")]
+
+def _remove_stale_socket(socket_path):
+    """
+    Функция для удаления файла сокета, оставшегося от завершенного сервера
+
+    Параметры:
+        socket_path - строка, путь к Unix сокету
+    """
+    if not os.path.exists(socket_path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+    else:
+        raise ValueError(f"Сервер уже запущен на сокете {socket_path}")
+    finally:
+        probe.close()
+
+@handle_db_errors
+def run_server(socket_path=None, host=None, port=None, auto_confirm=False,
+    show_time=False, flush_policy=FLUSH_POLICY,
+    flush_interval_ms=FLUSH_INTERVAL_MS, storage_backend=STORAGE_BACKEND):
+    """
+    Функция для запуска сервера базы данных до остановки через Ctrl+C
+
+    Параметры:
+        socket_path - строка, путь к Unix сокету
+        host - строка, адрес TCP сервера
+        port - целое число, порт TCP сервера
+        auto_confirm - логическое значение, подтверждать опасные операции,
+            иначе они отменяются
+        show_time - логическое значение, выводить время выполнения команд
+        flush_policy - строка, политика сброса изменений на диск
+        flush_interval_ms - целое число, интервал сброса в миллисекундах
+        storage_backend - строка, хранилище новых таблиц
+    """
+    set_auto_confirm(auto_confirm)
+    set_timing_report(show_time)
+
+    manager = TableManager(flush_policy, flush_interval_ms, storage_backend)
+    server = DatabaseServer(manager)
+
+    stdout = sys.stdout
+    sys.stdout = server.output
+    try:
+        asyncio.run(server.serve(socket_path, host, port))
+    except KeyboardInterrupt:
+        print("\nСервер остановлен.")
+    finally:
+        sys.stdout = stdout
+        manager.close()
\ No newline at end of file
@@ -0,0 +1,135 @@
+# src/primitive_db/sorting.py
+
+import heapq
+import json
+import tempfile
+from itertools import islice
+
+from .constrants import SORT_RUN_SIZE
+from .rows import Row
+
+
+def order_key(column, descending=False):
+    """
+    Функция для получения ключа сортировки записей по столбцу
+
+    Значения None упорядочиваются после остальных при любом направлении
+    сортировки, строки - отдельно от чисел и логических значений
+
+    Параметры:
+        column - строка, содержит имя столбца
+        descending - логическое значение, ключ для сортировки по убыванию
+    """
+    def key(record):
+        value = record.get(column)
+        if value is None:
+            return (not descending, False, 0)
+        return (descending, isinstance(value, str), value)
+    return key
+
+def top_k(records, column, k, descending=False):
+    """
+    Функция для выбора первых k записей в порядке сортировки
+
+    Используется куча из k элементов, поэтому память не зависит
+    от количества записей
+
+    Параметры:
+        records - итерируемый объект со словарями записей
+        column - строка, столбец сортировки
+        k - целое число, количество записей
+        descending - логическое значение, сортировка по убыванию
+
+    Возвращает:
+        records - список, содержит k первых записей
+    """
+    select_k = heapq.nlargest if descending else heapq.nsmallest
+    return select_k(k, records, key=order_key(column, descending))
+
+def _write_run(run):
+    """
+    Функция для записи отсортированной серии во временный файл,
+    записи схемы пишутся списками значений, словари - как есть
+
+    Параметры:
+        run - список, содержит отсортированные записи
+
+    Возвращает:
+        f - открытый временный файл, позиция чтения в начале
+    """
+    f = tempfile.TemporaryFile('w+', encoding='utf-8')
+    for record in run:
+        values = list(record) if isinstance(record, Row) else record
+        f.write(json.dumps(values, ensure_ascii=False) + '\n')
+    f.seek(0)
+    return f
+
+def _read_run(f, row_cls=None):
+    """
+    Генератор записей серии из временного файла
+
+    Параметры:
+        f - открытый временный файл
+        row_cls - класс записей схемы, None - записи серии словари
+    """
+    for line in f:
+        values = json.loads(line)
+        yield values if row_cls is None else row_cls(values)
+
+def external_sort(records, column, descending=False, run_size=SORT_RUN_SIZE):
+    """
+    Генератор записей в порядке сортировки с внешней сортировкой слиянием
+
+    Записи читаются сериями по run_size, каждая серия сортируется
+    и сбрасывается во временный файл, затем серии сливаются потоково.
+    Если все записи поместились в одну серию, файлы не создаются.
+    Записи из файлов восстанавливаются в класс исходных записей.
+    Сортировка устойчива: записи с равными значениями идут в исходном порядке
+
+    Параметры:
+        records - итерируемый объект со словарями записей
+        column - строка, столбец сортировки
+        descending - логическое значение, сортировка по убыванию
+        run_size - целое число, количество записей в серии
+    """
+    key = order_key(column, descending)
+    records = iter(records)
+    run = sorted(islice(records, run_size), key=key, reverse=descending)
+
+    if len(run) < run_size:
+        yield from run
+        return
+
+    row_cls = type(run[0]) if isinstance(run[0], Row) else None
+    files = []
+    try:
+        while run:
+            files.append(_write_run(run))
+            run = sorted(islice(records, run_size), key=key, reverse=descending)
+
+        yield from heapq.merge(*(_read_run(f, row_cls) for f in files), key=key,
+            reverse=descending)
+    finally:
+        for f in files:
+            f.close()
+
+def order_records(records, column, descending=False, limit=None, offset=0):
+    """
+    Функция для упорядочивания записей выборки с учетом limit и offset
+
+    С limit выбираются первые offset + limit записей через кучу,
+    без limit выполняется внешняя сортировка
+
+    Параметры:
+        records - итерируемый объект со словарями записей
+        column - строка, столбец сортировки
+        descending - логическое значение, сортировка по убыванию
+        limit - целое число, максимальное количество записей, None - все
+        offset - целое число, количество пропускаемых записей
+
+    Возвращает:
+        records - итерируемый объект с записями в порядке сортировки
+    """
+    if limit is not None:
+        return top_k(records, column, offset + limit, descending)[offset:]
+    return islice(external_sort(records, column, descending), offset, None)
\ No newline at end of file
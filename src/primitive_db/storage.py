@@ -0,0 +1,443 @@
+# src/primitive_db/storage.py
+
+import os
+import sqlite3
+import threading
+import time
+
+from .constrants import (
+    DURABLE_WRITES,
+    LOCK_TIMEOUT_MS,
+    SQLITE_DATAPATH,
+)
+from .rows import schema_row_type
+from .utils import (
+    append_table_log,
+    load_table_data,
+    needs_compaction,
+    record_write,
+    remove_table_files,
+    save_table_data,
+    table_generation,
+    table_signature,
+)
+
+
+class StorageBackend:
+    """
+    Базовый класс хранилища таблиц
+
+    Хранилище загружает и читает таблицы, записывает операции журнала
+    (insert, update, delete), сворачивает изменения и удаляет таблицы.
+    Метаданные таблиц хранятся отдельно, хранилище получает их параметром
+    """
+    kind = None
+    # Хранилище изменяет записи на месте, а не ведет журнал со снимками
+    in_place = False
+
+    def load(self, table_name, table_meta):
+        """
+        Метод для загрузки всех записей таблицы
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+
+        Возвращает:
+            table_data - список, содержит словари с данными таблицы
+        """
+        raise NotImplementedError
+
+    def scan(self, table_name, table_meta):
+        """
+        Генератор записей таблицы
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+        """
+        yield from self.load(table_name, table_meta)
+
+    def write(self, table_name, table_meta, entries, txn=None):
+        """
+        Метод для записи операций журнала одной операцией
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+            entries - список, содержит операции журнала
+            txn - целое число, номер фиксации нескольких таблиц, изменения
+                действуют только после записи этого номера в метаданные
+
+        Возвращает:
+            compact - логическое значение, изменения пора свернуть
+        """
+        raise NotImplementedError
+
+    def write_tables(self, tables):
+        """
+        Метод для записи операций журнала нескольких таблиц одной фиксации
+
+        Параметры:
+            tables - список, содержит кортежи (имя таблицы, метаданные,
+                операции журнала, номер фиксации)
+
+        Возвращает:
+            compact - список, содержит имена таблиц, изменения которых
+                пора свернуть
+        """
+        return [table_name for table_name, table_meta, entries, txn in tables
+            if self.write(table_name, table_meta, entries, txn)]
+
+    def compact(self, table_name, table_meta, table_data):
+        """
+        Метод для свертки изменений таблицы
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+            table_data - список, содержит словари с данными таблицы
+
+        Возвращает:
+            changes - словарь, содержит изменения метаданных таблицы, после
+                записи которых свертка вступает в силу, None - свертка
+                не удалась
+        """
+        return {}
+
+    def cleanup(self, table_name, table_meta):
+        """
+        Метод для удаления данных таблицы, устаревших после свертки
+        или оставшихся после сбоя
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+        """
+
+    def drop(self, table_name):
+        """
+        Метод для удаления всех данных таблицы
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+        """
+        raise NotImplementedError
+
+    def signature(self, table_name, table_meta):
+        """
+        Метод для получения признака версии данных таблицы, он меняется
+        при каждой записи, в том числе другим процессом
+
+        Параметры:
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Метод для освобождения ресурсов хранилища
+        """
+
+
+class FileBackend(StorageBackend):
+    """
+    Класс хранилища таблиц в файлах каталога TABLES_DATAPATH
+
+    Каждая таблица хранится снимком в формате json, columnar или mapped
+    и журналом изменений, который сворачивается в снимок нового поколения
+    """
+    kind = "files"
+
+    def load(self, table_name, table_meta):
+        table_data = load_table_data(table_name, table_meta)
+        return table_data if table_data is not None else []
+
+    def write(self, table_name, table_meta, entries, txn=None):
+        log_size = append_table_log(table_name, entries, table_meta, txn)
+        return needs_compaction(table_name, log_size, table_meta)
+
+    def compact(self, table_name, table_meta, table_data):
+        generation = table_generation(table_meta) + 1
+        if save_table_data(table_name, table_data, table_meta,
+            generation) is None:
+            return None
+        return {'generation': generation}
+
+    def cleanup(self, table_name, table_meta):
+        remove_table_files(table_name, table_meta)
+
+    def drop(self, table_name):
+        remove_table_files(table_name)
+
+    def signature(self, table_name, table_meta):
+        return table_signature(table_name, table_meta)
+
+
+_SQLITE_TYPES = {"int": "INTEGER", "str": "TEXT", "bool": "INTEGER"}
+
+
+def _quote(name):
+    """
+    Функция для экранирования имени таблицы или столбца SQLite
+
+    Параметры:
+        name - строка, содержит имя
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+def _sql_table(table_name):
+    """
+    Функция для получения имени таблицы SQLite, имена таблиц базы
+    получают префикс, чтобы не совпадать со служебными таблицами
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+    """
+    return f"t_{table_name}"
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Класс хранилища всех таблиц в одном файле SQLite
+
+    Каждая таблица хранится таблицей SQLite t_<имя> со столбцами по метаданным,
+    столбец ID - первичный ключ. Операции журнала выполняются запросами
+    insert, update и delete в одной транзакции, поэтому изменения пишутся
+    постранично и не требуют перезаписи таблицы и свертки. Версии таблиц
+    для обнаружения изменений другими процессами хранятся в служебной
+    таблице _versions
+    """
+    kind = "sqlite"
+    in_place = True
+
+    # Количество записей, читаемых из курсора за раз
+    FETCH_SIZE = 10000
+
+    def __init__(self, filepath=SQLITE_DATAPATH):
+        """
+        Параметры:
+            filepath - строка, путь к файлу базы SQLite
+        """
+        self.filepath = filepath
+        self._connection = None
+        # Соединение используется и рабочими потоками сервера
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Метод для получения соединения, открывает его при первом обращении
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            connection = sqlite3.connect(self.filepath,
+                timeout=LOCK_TIMEOUT_MS / 1000, isolation_level=None,
+                check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous="
+                + ("FULL" if DURABLE_WRITES else "OFF"))
+            connection.execute("CREATE TABLE IF NOT EXISTS _versions "
+                "(name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._connection = connection
+        return self._connection
+
+    def _exists(self, connection, table_name):
+        """
+        Метод для проверки наличия таблицы SQLite
+
+        Параметры:
+            connection - соединение SQLite
+            table_name - строка, содержит название таблицы
+        """
+        row = connection.execute("SELECT 1 FROM sqlite_master "
+            "WHERE type = 'table' AND name = ?", (_sql_table(table_name),))
+        return row.fetchone() is not None
+
+    def _create(self, connection, table_name, table_meta):
+        """
+        Метод для создания таблицы SQLite по метаданным, если ее нет
+
+        Параметры:
+            connection - соединение SQLite
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+        """
+        columns = ', '.join(f"{_quote(col['name'])} "
+            f"{_SQLITE_TYPES[col['type']]}"
+            + (" PRIMARY KEY" if col['name'] == 'ID' else "")
+            for col in table_meta['columns'])
+        connection.execute("CREATE TABLE IF NOT EXISTS "
+            f"{_quote(_sql_table(table_name))} "
+            f"({columns})")
+
+    def scan(self, table_name, table_meta):
+        row_cls = schema_row_type(table_meta['columns'])
+        names = row_cls.fields
+        bool_columns = [i for i, col in enumerate(table_meta['columns'])
+            if col['type'] == 'bool']
+        query = (f"SELECT {', '.join(_quote(name) for name in names)} "
+            f"FROM {_quote(_sql_table(table_name))} ORDER BY {_quote('ID')}")
+
+        with self._lock:
+            connection = self._connect()
+            if not self._exists(connection, table_name):
+                return
+            cursor = connection.execute(query)
+
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.FETCH_SIZE)
+            if not rows:
+                break
+            if not bool_columns:
+                yield from map(row_cls, rows)
+                continue
+            for row in rows:
+                values = list(row)
+                for i in bool_columns:
+                    if values[i] is not None:
+                        values[i] = bool(values[i])
+                yield row_cls(values)
+
+    def load(self, table_name, table_meta):
+        return list(self.scan(table_name, table_meta))
+
+    def write(self, table_name, table_meta, entries, txn=None):
+        self.write_tables([(table_name, table_meta, entries, txn)])
+        return False
+
+    def write_tables(self, tables):
+        # Все таблицы хранятся в одном файле, поэтому изменения нескольких
+        # таблиц фиксируются одной транзакцией SQLite, номер фиксации
+        # не нужен
+        start = time.perf_counter()
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table_name, table_meta, entries, _ in tables:
+                    self._create(connection, table_name, table_meta)
+                    self._apply(connection, table_name, table_meta, entries)
+                    self._bump_version(connection, table_name)
+                commit_start = time.perf_counter()
+                connection.execute("COMMIT")
+                commit_elapsed = time.perf_counter() - commit_start
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        record_write('sqlite', 0, time.perf_counter() - start, commit_elapsed)
+        return []
+
+    def _apply(self, connection, table_name, table_meta, entries):
+        """
+        Метод для выполнения операций журнала запросами SQLite внутри
+        начатой транзакции
+
+        Параметры:
+            connection - соединение SQLite
+            table_name - строка, содержит название таблицы
+            table_meta - словарь, содержит метаданные таблицы
+            entries - список, содержит операции журнала
+        """
+        names = [col['name'] for col in table_meta['columns']]
+        table = _quote(_sql_table(table_name))
+        id_column = _quote('ID')
+
+        for entry in entries:
+            op = entry['op']
+            if op == 'insert':
+                connection.executemany(f"INSERT INTO {table} "
+                    f"({', '.join(_quote(name) for name in names)}) "
+                    f"VALUES ({', '.join('?' for _ in names)})",
+                    ([record.get(name) for name in names]
+                        for record in entry['records']))
+            elif op == 'update':
+                columns = list(entry['set'])
+                values = [entry['set'][column] for column in columns]
+                assignments = ', '.join(f"{_quote(column)} = ?"
+                    for column in columns)
+                connection.executemany(f"UPDATE {table} SET "
+                    f"{assignments} WHERE {id_column} = ?",
+                    ([*values, record_id] for record_id in entry['ids']))
+            elif op == 'delete':
+                connection.executemany(f"DELETE FROM {table} "
+                    f"WHERE {id_column} = ?",
+                    ((record_id,) for record_id in entry['ids']))
+            else:
+                raise ValueError(f"Неизвестная операция журнала: {op}")
+
+    def _bump_version(self, connection, table_name):
+        """
+        Метод для смены версии таблицы, версии не повторяются и после
+        удаления таблицы
+
+        Параметры:
+            connection - соединение SQLite
+            table_name - строка, содержит название таблицы
+        """
+        connection.execute("INSERT INTO _versions (name, version) VALUES "
+            "(?, (SELECT COALESCE(MAX(version), 0) + 1 FROM _versions)) "
+            "ON CONFLICT (name) DO UPDATE SET version = excluded.version",
+            (table_name,))
+
+    def drop(self, table_name):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DROP TABLE IF EXISTS "
+                    f"{_quote(_sql_table(table_name))}")
+                self._bump_version(connection, table_name)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def signature(self, table_name, table_meta):
+        with self._lock:
+            row = self._connect().execute("SELECT version FROM _versions "
+                "WHERE name = ?", (table_name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+STORAGE_BACKEND_TYPES = {
+    FileBackend.kind: FileBackend,
+    SqliteBackend.kind: SqliteBackend,
+}
+
+_backends = {}
+
+
+def table_backend(table_meta):
+    """
+    Функция для получения хранилища таблицы по ее метаданным, таблицы
+    без указанного хранилища хранятся в файлах
+
+    Параметры:
+        table_meta - словарь, содержит метаданные таблицы или None
+    """
+    kind = (table_meta or {}).get('backend', FileBackend.kind)
+    if kind not in _backends:
+        if kind not in STORAGE_BACKEND_TYPES:
+            raise ValueError(f"Неизвестное хранилище: {kind}")
+        _backends[kind] = STORAGE_BACKEND_TYPES[kind]()
+    return _backends[kind]
+
+def close_backends():
+    """
+    Функция для закрытия всех открытых хранилищ
+    """
+    for backend in _backends.values():
+        backend.close()
\ No newline at end of file
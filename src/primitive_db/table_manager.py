@@ -0,0 +1,879 @@
+# src/primitive_db/table_manager.py
+
+import copy
+import time
+from contextlib import ExitStack, contextmanager
+from itertools import count
+
+from .constrants import (
+    DB_INFO_DATAPATH,
+    FLUSH_INTERVAL_MS,
+    FLUSH_POLICIES,
+    FLUSH_POLICY,
+    INDEX_UPDATE_BATCH,
+    STATS_REFRESH_RATIO,
+    STORAGE_BACKEND,
+    STORAGE_BACKENDS,
+)
+from .indexes import build_indexes
+from .instrument import span
+from .locks import metadata_lock, remove_table_lock, table_lock
+from .parallel import shutdown_parallel
+from .planner import collect_stats, plan_query
+from .predicates import as_predicate
+from .rows import to_rows
+from .storage import close_backends, table_backend
+from .utils import file_signature, load_metadata, save_metadata
+
+# Номера сессий, версии таблиц разных сессий не совпадают
+_sessions = count(1)
+
+
+def _shared_meta(table_meta):
+    """
+    Функция для получения метаданных таблицы без статистики, по ним
+    сравниваются версии метаданных разных процессов
+
+    Параметры:
+        table_meta - словарь, содержит метаданные таблицы или None
+    """
+    if table_meta is None:
+        return None
+    return {key: value for key, value in table_meta.items() if key != 'stats'}
+
+def _stats_stale(stats, rows):
+    """
+    Функция для проверки, нужно ли собрать статистику таблицы заново:
+    ее нет или количество записей изменилось больше, чем на долю
+    STATS_REFRESH_RATIO
+
+    Параметры:
+        stats - словарь, содержит статистику таблицы или None
+        rows - целое число, текущее количество записей таблицы
+    """
+    if stats is None:
+        return True
+    return abs(rows - stats['rows']) > STATS_REFRESH_RATIO * max(stats['rows'], 1)
+
+
+class TableManager:
+    """
+    Класс для хранения метаданных и таблиц в памяти в течение сессии
+
+    Таблица загружается с диска один раз при первом обращении, далее все
+    команды работают с копией в памяти. Изменения копятся в виде операций
+    журнала и сбрасываются на диск согласно политике:
+        command - после каждой команды
+        interval - не чаще, чем раз в flush_interval_ms миллисекунд
+        exit - только при выходе из программы
+
+    Внутри транзакции изменения не сбрасываются на диск до commit
+
+    Несколько процессов могут работать с одними файлами: чтение выполняется
+    под разделяемой блокировкой, запись - под исключительной. Перед каждой
+    командой таблицы, измененные на диске другим процессом, загружаются
+    заново. Если другой процесс изменил те же таблицы, что и несохраненные
+    изменения сессии, изменения сессии отменяются при сбросе на диск
+    """
+
+    def __init__(self, flush_policy=FLUSH_POLICY,
+        flush_interval_ms=FLUSH_INTERVAL_MS, storage_backend=STORAGE_BACKEND):
+        """
+        Параметры:
+            flush_policy - строка, политика сброса изменений на диск
+            flush_interval_ms - целое число, интервал сброса в миллисекундах
+            storage_backend - строка, хранилище новых таблиц
+        """
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"Неизвестная политика сброса: {flush_policy}. "
+                f"Допустимые политики: {', '.join(FLUSH_POLICIES)}")
+        if storage_backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Неизвестное хранилище: {storage_backend}. "
+                f"Допустимые хранилища: {', '.join(STORAGE_BACKENDS)}")
+
+        self.flush_policy = flush_policy
+        self.flush_interval_ms = flush_interval_ms
+        self.storage_backend = storage_backend
+
+        self._tables = {}
+        self._indexes = {}
+        self._pending = {}
+        self._synced_sequences = set()
+        self._versions = {}
+        self._session = next(_sessions)
+        self._dirty_metadata = set()
+        self._signatures = {}
+        self._metadata_locked = False
+
+        with self._lock_metadata():
+            self.metadata = self._read_metadata()
+        self._base_metadata = copy.deepcopy(self.metadata)
+        self._last_flush = time.monotonic()
+        self._transaction_metadata = None
+
+    def get_table(self, table_name):
+        """
+        Метод для получения данных таблицы, загружает их при первом обращении
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+
+        Возвращает:
+            table_data - список, содержит словари с данными таблицы
+        """
+        if table_name not in self._tables:
+            table_meta = self.metadata.get(table_name)
+            backend = table_backend(table_meta)
+            with span("load"), self._lock_metadata(), table_lock(table_name):
+                self._tables[table_name] = backend.load(table_name, table_meta)
+                self._signatures[table_name] = backend.signature(table_name,
+                    table_meta)
+        return self._tables[table_name]
+
+    def get_indexes(self, table_name):
+        """
+        Метод для получения индексов таблицы, строит их при первом обращении
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+
+        Возвращает:
+            indexes - словарь, содержит индексы по именам столбцов
+        """
+        if table_name not in self._indexes:
+            table_data = self.get_table(table_name)
+            with span("load"):
+                self._indexes[table_name] = build_indexes(
+                    self.metadata.get(table_name, {}), table_data)
+        return self._indexes[table_name]
+
+    def reset_indexes(self, table_name):
+        """
+        Метод для сброса индексов таблицы, они будут построены заново
+        по метаданным при следующем обращении
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        self._indexes.pop(table_name, None)
+
+    def set_table(self, table_name, table_data, keep_indexes=False):
+        """
+        Метод для замены данных таблицы в памяти
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            table_data - список, содержит словари с данными таблицы
+            keep_indexes - логическое значение, индексы уже обновлены
+                под новые данные, иначе они строятся заново
+        """
+        self._tables[table_name] = table_data
+        if not keep_indexes:
+            self.reset_indexes(table_name)
+        self._bump_version(table_name)
+
+    def table_stats(self, table_name, refresh=False):
+        """
+        Метод для получения статистики таблицы из метаданных
+
+        Статистика собирается заново, если ее нет или количество записей
+        изменилось больше, чем на долю STATS_REFRESH_RATIO
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            refresh - логическое значение, собрать статистику заново
+
+        Возвращает:
+            stats - словарь, содержит статистику таблицы
+        """
+        table_meta = self.metadata[table_name]
+        table_data = self.get_table(table_name)
+        stats = table_meta.get('stats')
+
+        if refresh or _stats_stale(stats, len(table_data)):
+            stats = collect_stats(table_meta['columns'], table_data)
+            table_meta['stats'] = stats
+            self.mark_metadata_dirty(table_name)
+        return stats
+
+    def prepare_read(self, table_names):
+        """
+        Метод для загрузки таблиц, их индексов и статистики до выполнения
+        команды чтения, чтобы одновременные чтения не изменяли состояние
+        менеджера
+
+        Параметры:
+            table_names - список, содержит имена таблиц, неизвестные
+                имена пропускаются
+        """
+        for table_name in table_names:
+            if table_name in self.metadata:
+                self.get_indexes(table_name)
+                self.table_stats(table_name)
+
+    def read_ready(self, table_names):
+        """
+        Метод для проверки, что команда чтения таблиц не будет загружать
+        таблицы, строить индексы или собирать статистику, состояние
+        менеджера не меняется
+
+        Параметры:
+            table_names - список, содержит имена таблиц
+        """
+        for table_name in table_names:
+            table_meta = self.metadata.get(table_name)
+            if table_meta is None:
+                continue
+            if table_name not in self._tables or table_name not in self._indexes:
+                return False
+            if _stats_stale(table_meta.get('stats'),
+                len(self._tables[table_name])):
+                return False
+        return True
+
+    def plan(self, table_name, where_clause):
+        """
+        Метод для построения плана выполнения запроса к таблице
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            where_clause - Predicate, словарь или None, содержит условие
+
+        Возвращает:
+            plan - Plan, выбранный план
+        """
+        # Снимок для параллельного просмотра определяется сессией
+        # и версией таблицы, пока они не изменились, он переиспользуется
+        source = (self.version_key(table_name),
+            self.metadata[table_name]['columns'])
+        return plan_query(as_predicate(where_clause),
+            self.get_indexes(table_name), self.table_stats(table_name),
+            len(self.get_table(table_name)), source)
+
+    def allocate_ids(self, table_name, count=1):
+        """
+        Метод для выделения непрерывного диапазона ID из последовательности
+        таблицы, хранящейся в метаданных
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            count - целое число, количество выделяемых ID
+
+        Возвращает:
+            first_id - целое число, первый ID диапазона
+        """
+        table_meta = self.metadata[table_name]
+
+        # Один раз за сессию последовательность сверяется с данными: она может
+        # отсутствовать у старых таблиц или отстать после сбоя
+        if table_name not in self._synced_sequences:
+            max_id = self.get_indexes(table_name)['ID'].max_key()
+            table_meta['next_id'] = max(table_meta.get('next_id', 1), max_id + 1)
+            self._synced_sequences.add(table_name)
+
+        first_id = table_meta['next_id']
+        table_meta['next_id'] = first_id + count
+        self.mark_metadata_dirty(table_name)
+        return first_id
+
+    def insert_record(self, table_name, record):
+        """
+        Метод для добавления записи в таблицу с обновлением индексов
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            record - словарь, содержит новую запись
+        """
+        self.insert_records(table_name, [record])
+
+    def insert_records(self, table_name, records):
+        """
+        Метод для добавления пачки записей в таблицу одной операцией журнала
+
+        Небольшая пачка добавляется в индексы по месту, при загрузке большой
+        пачки индексы сбрасываются и строятся заново при следующем обращении
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            records - список, содержит словари новых записей, в журнал
+                они пишутся словарями, а в таблицу - записями схемы
+        """
+        table_data = self.get_table(table_name)
+        rows = to_rows(records, self.metadata[table_name]['columns'])
+
+        if len(rows) <= INDEX_UPDATE_BATCH:
+            indexes = self.get_indexes(table_name)
+            for row in rows:
+                table_data.append(row)
+                position = len(table_data) - 1
+                for column, index in indexes.items():
+                    index.add(row.get(column), position)
+        else:
+            table_data.extend(rows)
+            self.reset_indexes(table_name)
+
+        self.log_mutation(table_name, {'op': 'insert', 'records': records})
+
+    def log_mutation(self, table_name, entry):
+        """
+        Метод для регистрации изменения таблицы, помечает ее как измененную
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            entry - словарь, содержит операцию журнала
+        """
+        self._pending.setdefault(table_name, []).append(entry)
+        self._bump_version(table_name)
+
+    def table_version(self, table_name):
+        """
+        Метод для получения версии данных таблицы, версия увеличивается
+        при каждом изменении
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        return self._versions.get(table_name, 0)
+
+    def version_key(self, table_name):
+        """
+        Метод для получения ключа версии данных таблицы для кэшей,
+        общих для всех сессий процесса: версии разных сессий начинаются
+        с нуля, поэтому ключ содержит номер сессии
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        return (self._session, table_name, self.table_version(table_name))
+
+    def _bump_version(self, table_name):
+        """
+        Метод для увеличения версии данных таблицы
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        self._versions[table_name] = self._versions.get(table_name, 0) + 1
+
+    def mark_metadata_dirty(self, table_name):
+        """
+        Метод для пометки метаданных таблицы как измененных
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        self._dirty_metadata.add(table_name)
+
+    def forget_table(self, table_name):
+        """
+        Метод для удаления таблицы из памяти вместе с несохраненными изменениями
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        self._tables.pop(table_name, None)
+        self._indexes.pop(table_name, None)
+        self._pending.pop(table_name, None)
+        self._signatures.pop(table_name, None)
+        self._synced_sequences.discard(table_name)
+        self._bump_version(table_name)
+
+    def drop_table_data(self, table_name, table_meta):
+        """
+        Метод для удаления данных таблицы, уже удаленной из метаданных
+
+        Сначала на диск записываются метаданные без таблицы, и только после
+        этого удаляются ее данные: при конфликте с другим процессом или
+        ошибке записи метаданные на диске не указывают на удаленные файлы
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            table_meta - словарь, содержит метаданные удаленной таблицы
+        """
+        self.forget_table(table_name)
+        self.mark_metadata_dirty(table_name)
+
+        with self._lock_metadata(exclusive=True):
+            self.flush()
+            if table_name in self._dirty_metadata:
+                raise ValueError(f'Не удалось записать метаданные, данные '
+                    f'таблицы "{table_name}" не удалены.')
+
+            with table_lock(table_name, exclusive=True):
+                table_backend(table_meta).drop(table_name)
+                # Файл блокировки удаляется под блокировкой, ожидающие ее
+                # процессы откроют новый файл
+                remove_table_lock(table_name)
+
+    def is_dirty(self):
+        """
+        Метод для проверки наличия несохраненных изменений
+        """
+        return bool(self._dirty_metadata) or bool(self._pending)
+
+    def has_disk_changes(self):
+        """
+        Метод для проверки, изменились ли на диске метаданные или
+        загруженные таблицы, состояние сессии не меняется
+        """
+        if file_signature(DB_INFO_DATAPATH) != self._metadata_signature:
+            return True
+        local = self._local_tables()
+        return any(self._table_signature(table_name)
+            != self._signatures.get(table_name) for table_name in list(self._tables)
+            if table_name not in local)
+
+    def _local_tables(self):
+        """
+        Метод для получения имен таблиц с несохраненными изменениями данных
+        или метаданных сессии
+        """
+        return self._dirty_metadata | set(self._pending)
+
+    def refresh(self):
+        """
+        Метод для проверки изменений на диске перед командой
+
+        Метаданные перечитываются, только если изменился их файл, а таблица
+        загружается заново, только если изменились ее файлы. Таблицы
+        с несохраненными изменениями сессии не обновляются, изменения
+        других процессов в них обнаруживаются при сбросе на диск
+        """
+        with self._lock_metadata():
+            if file_signature(DB_INFO_DATAPATH) != self._metadata_signature:
+                self._adopt_metadata(self._read_metadata())
+            local = self._local_tables()
+            for table_name in list(self._tables):
+                if table_name in local:
+                    continue
+                signature = self._table_signature(table_name)
+                if signature != self._signatures.get(table_name):
+                    self.forget_table(table_name)
+
+    @contextmanager
+    def _lock_metadata(self, exclusive=False):
+        """
+        Контекстный менеджер блокировки метаданных, внутри уже полученной
+        блокировки повторно не блокирует
+
+        Параметры:
+            exclusive - логическое значение, блокировка для записи
+        """
+        if self._metadata_locked:
+            yield
+            return
+
+        with metadata_lock(exclusive):
+            self._metadata_locked = True
+            try:
+                yield
+            finally:
+                self._metadata_locked = False
+
+    def _read_metadata(self):
+        """
+        Метод для чтения метаданных с диска под блокировкой метаданных
+
+        Возвращает:
+            metadata - словарь, содержит метаданные с диска
+        """
+        metadata = load_metadata()
+        self._metadata_signature = file_signature(DB_INFO_DATAPATH)
+        if not self.is_dirty():
+            self._base_signature = self._metadata_signature
+        return metadata if metadata is not None else {}
+
+    def _adopt_metadata(self, disk_metadata):
+        """
+        Метод для принятия метаданных, записанных другим процессом
+
+        Метаданные таблиц без несохраненных изменений заменяются данными
+        с диска. Если изменилось что-то, кроме статистики, таблица будет
+        загружена заново при следующем обращении
+
+        Параметры:
+            disk_metadata - словарь, содержит метаданные с диска
+        """
+        local = self._local_tables()
+
+        for table_name in [*self.metadata, *disk_metadata]:
+            if table_name in local:
+                continue
+            table_meta = disk_metadata.get(table_name)
+            if _shared_meta(table_meta) != \
+                _shared_meta(self.metadata.get(table_name)):
+                self.forget_table(table_name)
+
+            if table_meta is None:
+                self.metadata.pop(table_name, None)
+                self._base_metadata.pop(table_name, None)
+            else:
+                self.metadata[table_name] = table_meta
+                self._base_metadata[table_name] = copy.deepcopy(table_meta)
+
+    def _check_conflicts(self, table_names):
+        """
+        Метод для проверки, не изменил ли другой процесс таблицы
+        с несохраненными изменениями сессии, вызывается под исключительной
+        блокировкой метаданных. При конфликте все несохраненные изменения
+        сессии отменяются
+
+        Параметры:
+            table_names - список, содержит имена сбрасываемых таблиц
+        """
+        # Метаданные могли быть перечитаны при несохраненных изменениях,
+        # тогда исходные метаданные измененных таблиц старше прочитанных
+        disk_metadata = None
+        if file_signature(DB_INFO_DATAPATH) != self._base_signature:
+            disk_metadata = self._read_metadata()
+            self._adopt_metadata(disk_metadata)
+
+        conflicts = []
+        for table_name in sorted(self._dirty_metadata | set(table_names)):
+            base_meta = _shared_meta(self._base_metadata.get(table_name))
+
+            if disk_metadata is not None and \
+                _shared_meta(disk_metadata.get(table_name)) != base_meta:
+                if table_name in table_names or table_name in self._pending or \
+                    _shared_meta(self.metadata.get(table_name)) != base_meta:
+                    conflicts.append(table_name)
+                    continue
+                # Сессия изменила только статистику, она уступает данным с диска
+                self._dirty_metadata.discard(table_name)
+                self._adopt_metadata({**self.metadata,
+                    table_name: disk_metadata.get(table_name)})
+                continue
+
+            if table_name in table_names and table_name in self._signatures:
+                signature = self._table_signature(table_name)
+                if signature != self._signatures[table_name]:
+                    conflicts.append(table_name)
+
+        if conflicts:
+            self._discard_changes()
+            raise ValueError(f"Таблицы {', '.join(conflicts)} изменены другим "
+                "процессом, несохраненные изменения сессии отменены.")
+
+    def _discard_changes(self):
+        """
+        Метод для отмены всех несохраненных изменений сессии, метаданные
+        перечитываются с диска
+        """
+        for table_name in set(self._pending) | self._dirty_metadata:
+            self.forget_table(table_name)
+        self._dirty_metadata.clear()
+
+        disk_metadata = self._read_metadata()
+        self.metadata.clear()
+        self.metadata.update(disk_metadata)
+        self._base_metadata = copy.deepcopy(disk_metadata)
+
+        self._indexes.clear()
+        for table_name in list(self._tables):
+            if table_name not in self.metadata:
+                self.forget_table(table_name)
+
+    def _save_metadata(self):
+        """
+        Метод для записи метаданных под исключительной блокировкой
+
+        После проверки конфликтов метаданные таблиц без изменений сессии
+        совпадают с диском, поэтому метаданные записываются целиком
+
+        Возвращает:
+            saved - логическое значение, метаданные записаны
+        """
+        if save_metadata(self.metadata) is None:
+            return False
+
+        self._metadata_signature = file_signature(DB_INFO_DATAPATH)
+        self._base_signature = self._metadata_signature
+        self._base_metadata = copy.deepcopy(self.metadata)
+        self._dirty_metadata.clear()
+        return True
+
+    def _table_signature(self, table_name):
+        """
+        Метод для получения признака версии данных таблицы в хранилище
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+        """
+        table_meta = self.metadata.get(table_name)
+        return table_backend(table_meta).signature(table_name, table_meta)
+
+    def _append_log(self, table_name, entries):
+        """
+        Метод для записи операций журнала в хранилище под исключительной
+        блокировкой таблицы
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            entries - список, содержит операции журнала
+
+        Возвращает:
+            compact - логическое значение, изменения пора свернуть
+        """
+        table_meta = self.metadata.get(table_name)
+        backend = table_backend(table_meta)
+        with table_lock(table_name, exclusive=True):
+            compact = backend.write(table_name, table_meta, entries)
+            self._signatures[table_name] = backend.signature(table_name,
+                table_meta)
+        return compact
+
+    def _write_table(self, table_name, compact=False, defer_compact=False):
+        """
+        Метод для записи изменений одной таблицы на диск, вызывается
+        под исключительной блокировкой метаданных
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            compact - логическое значение, свернуть журнал в снимок
+            defer_compact - логическое значение, не сворачивать журнал,
+                даже если он вырос, а вернуть признак
+
+        Возвращает:
+            due - логическое значение, журнал пора свернуть, только
+                при defer_compact
+        """
+        entries = self._pending.pop(table_name, None)
+
+        # Снимок из памяти уже содержит несохраненные изменения, но
+        # хранилище с изменением на месте снимков не пишет
+        logged = False
+        if entries and (not compact
+            or table_backend(self.metadata.get(table_name)).in_place):
+            due = self._append_log(table_name, entries)
+            if defer_compact:
+                return due
+            compact = due or compact
+            logged = True
+
+        if compact and not self.compact_table(table_name) and entries \
+            and not logged:
+            # Свертка не удалась, изменения сохраняются в журнал
+            self._append_log(table_name, entries)
+
+    def _write_tables(self, table_names):
+        """
+        Метод для записи изменений нескольких таблиц одной фиксацией,
+        вызывается под исключительной блокировкой метаданных
+
+        Изменения таблиц в файлах дописываются в журналы пачками с новым
+        номером фиксации таблицы, а номера записываются в метаданные
+        последними. Запись метаданных является точкой фиксации: пачки
+        с номером больше записанного при загрузке отбрасываются, поэтому
+        после сбоя действуют изменения либо всех таблиц, либо ни одной.
+        Таблицы SQLite фиксируются одной транзакцией SQLite до записи
+        метаданных. Свертка журналов выполняется после фиксации
+
+        Параметры:
+            table_names - список, содержит имена таблиц с изменениями
+        """
+        groups = {}
+        for table_name in sorted(table_names):
+            table_meta = self.metadata[table_name]
+            backend = table_backend(table_meta)
+            txn = None
+            if not backend.in_place:
+                txn = table_meta['txn'] = table_meta.get('txn', 0) + 1
+                self.mark_metadata_dirty(table_name)
+            groups.setdefault(backend, []).append((table_name, table_meta,
+                self._pending.pop(table_name), txn))
+
+        compact = []
+        # Таблицы SQLite фиксируются последними, ближе к записи метаданных
+        for backend, tables in sorted(groups.items(),
+            key=lambda item: item[0].in_place):
+            with ExitStack() as stack:
+                for table_name, *_ in tables:
+                    stack.enter_context(table_lock(table_name, exclusive=True))
+                compact += backend.write_tables(tables)
+                for table_name, table_meta, *_ in tables:
+                    self._signatures[table_name] = backend.signature(
+                        table_name, table_meta)
+
+        if self._save_metadata():
+            for table_name in compact:
+                self.compact_table(table_name)
+
+    def flush_table(self, table_name, compact=False, defer_compact=False):
+        """
+        Метод для сброса изменений одной таблицы на диск
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+            compact - логическое значение, свернуть журнал в снимок
+            defer_compact - логическое значение, отложить свертку выросшего
+                журнала, например до конца массовой загрузки
+
+        Возвращает:
+            due - логическое значение, журнал пора свернуть, только
+                при defer_compact
+        """
+        with span("save"), self._lock_metadata(exclusive=True):
+            self._check_conflicts([table_name])
+            return self._write_table(table_name, compact, defer_compact)
+
+    def compact_table(self, table_name):
+        """
+        Метод для свертки журнала изменений в снимок нового поколения
+
+        Хранилище пишет снимок нового поколения рядом со старыми данными,
+        затем номер поколения записывается в метаданные. Запись метаданных
+        является точкой фиксации: до нее при загрузке используется старый
+        снимок с журналом, после - новый снимок, поэтому сбой на любом шаге
+        не приводит к потере или повторному применению изменений.
+        Хранилища с изменением на месте свертки не требуют
+
+        Параметры:
+            table_name - строка, содержит имя таблицы
+
+        Возвращает:
+            compacted - логическое значение, снимок нового поколения
+                зафиксирован
+        """
+        table_data = self.get_table(table_name)
+        table_meta = self.metadata[table_name]
+        backend = table_backend(table_meta)
+
+        with self._lock_metadata(exclusive=True), \
+            table_lock(table_name, exclusive=True):
+            # Данные других поколений остаются после сбоя во время свертки
+            backend.cleanup(table_name, table_meta)
+
+            changes = backend.compact(table_name, table_meta, table_data)
+            if changes is None:
+                return False
+
+            if changes:
+                previous = {key: table_meta.get(key) for key in changes}
+                table_meta.update(changes)
+                self.mark_metadata_dirty(table_name)
+                if not self._save_metadata():
+                    table_meta.update(previous)
+                    return False
+
+            backend.cleanup(table_name, table_meta)
+            self._signatures[table_name] = backend.signature(table_name,
+                table_meta)
+        return True
+
+    def flush(self):
+        """
+        Метод для сброса всех изменений на диск одной операцией
+        под исключительной блокировкой метаданных
+        """
+        if self.is_dirty():
+            with span("save"), self._lock_metadata(exclusive=True):
+                self._check_conflicts(list(self._pending))
+                if len(self._pending) > 1:
+                    self._write_tables(list(self._pending))
+                for table_name in list(self._pending):
+                    self._write_table(table_name)
+                if self._dirty_metadata:
+                    self._save_metadata()
+
+        self._last_flush = time.monotonic()
+
+    @property
+    def in_transaction(self):
+        return self._transaction_metadata is not None
+
+    def begin(self):
+        """
+        Метод для начала транзакции
+
+        Перед началом все изменения сбрасываются на диск, так что файлы
+        таблиц соответствуют состоянию на начало транзакции, а метаданные
+        запоминаются копией. Изменения транзакции копятся в памяти
+        в виде операций журнала
+        """
+        if self.in_transaction:
+            raise ValueError("Транзакция уже начата.")
+
+        self.flush()
+        self._transaction_metadata = copy.deepcopy(self.metadata)
+
+    def commit(self):
+        """
+        Метод для фиксации транзакции, изменения каждой таблицы
+        дописываются в ее журнал одной строкой-пачкой, а изменения
+        нескольких таблиц фиксируются записью метаданных
+
+        Возвращает:
+            tables - список, содержит имена измененных таблиц
+        """
+        if not self.in_transaction:
+            raise ValueError("Нет активной транзакции.")
+
+        tables = sorted(self._pending)
+        self._transaction_metadata = None
+        self.flush()
+        return tables
+
+    def rollback(self):
+        """
+        Метод для отмены транзакции
+
+        Несохраненные изменения отбрасываются, измененные таблицы будут
+        загружены с диска заново при следующем обращении, метаданные
+        восстанавливаются из копии на начало транзакции
+
+        Возвращает:
+            tables - список, содержит имена измененных таблиц
+        """
+        if not self.in_transaction:
+            raise ValueError("Нет активной транзакции.")
+
+        tables = sorted(self._pending)
+        for table_name in tables:
+            self.forget_table(table_name)
+
+        # Словарь метаданных используется командами по ссылке,
+        # поэтому восстанавливается на месте
+        self.metadata.clear()
+        self.metadata.update(self._transaction_metadata)
+        self._transaction_metadata = None
+        self._dirty_metadata.clear()
+        # Метаданные других таблиц могли быть перечитаны в транзакции,
+        # при следующей проверке они перечитываются с диска заново
+        self._metadata_signature = None
+
+        # Индексы могли быть созданы или удалены в транзакции, а
+        # последовательности ID сверены с данными после ее начала
+        self._indexes.clear()
+        self._synced_sequences.clear()
+        for table_name in list(self._tables):
+            if table_name not in self.metadata:
+                self.forget_table(table_name)
+        return tables
+
+    def after_command(self):
+        """
+        Метод, вызываемый после каждой команды, сбрасывает изменения
+        на диск, если этого требует политика
+        """
+        if not self.is_dirty() or self.in_transaction:
+            return
+
+        if self.flush_policy == "command":
+            self.flush()
+        elif self.flush_policy == "interval":
+            elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+            if elapsed_ms >= self.flush_interval_ms:
+                self.flush()
+
+    def close(self):
+        """
+        Метод для завершения сессии, сбрасывает все изменения на диск,
+        незавершенная транзакция отменяется
+        """
+        if self.in_transaction:
+            self.rollback()
+        try:
+            self.flush()
+        finally:
+            close_backends()
+            shutdown_parallel()
\ No newline at end of file
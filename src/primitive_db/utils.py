@@ -1,11 +1,119 @@
 # src/primitive_db/utils.py
 
+import io
 import json
 import os
+import re
+import time
 
-from .constrants import DB_INFO_DATAPATH, TABLES_DATAPATH
+from .columnar import decode_table, encode_table
+from .constrants import (
+    DB_INFO_DATAPATH,
+    DEFAULT_STORAGE_FORMAT,
+    DURABLE_WRITES,
+    LOG_COMPACT_SIZE,
+    STORAGE_FORMATS,
+    TABLES_DATAPATH,
+)
 from .decorators import handle_db_errors
+from .mapped import MappedTable, write_mapped_table
+from .rows import (
+    Row,
+    as_dict,
+    column_getter,
+    dicts_to_rows,
+    schema_row_type,
+    table_row_type,
+)
 
+# Конец строки-пачки журнала с номером фиксации
+_TXN_TAIL = re.compile(rb'"txn": (\d+)}\n$')
+# Счетчики записи на диск по видам: snapshot, metadata, log
+_write_stats = {}
+
+
+def record_write(kind, size, elapsed, fsync_elapsed):
+    """
+    Функция для учета одной записи на диск в статистике
+
+    Параметры:
+        kind - строка, вид записи: snapshot, metadata или log
+        size - целое число, количество записанных байт
+        elapsed - число, полное время записи в секундах
+        fsync_elapsed - число, время fsync в секундах
+    """
+    stats = _write_stats.setdefault(kind, {'count': 0, 'bytes': 0,
+        'total_ms': 0.0, 'max_ms': 0.0, 'fsync_ms': 0.0})
+    stats['count'] += 1
+    stats['bytes'] += size
+    stats['total_ms'] += elapsed * 1000
+    stats['max_ms'] = max(stats['max_ms'], elapsed * 1000)
+    stats['fsync_ms'] += fsync_elapsed * 1000
+
+def write_stats():
+    """
+    Функция для получения статистики записи на диск за сессию
+
+    Возвращает:
+        stats - словарь, для каждого вида записи содержит количество
+            (count), байты (bytes), суммарное и максимальное время
+            (total_ms, max_ms) и время fsync (fsync_ms)
+    """
+    return {kind: dict(stats) for kind, stats in _write_stats.items()}
+
+def _fsync_path(path):
+    """
+    Функция для сброса файла или каталога на устройство
+
+    Параметры:
+        path - строка, путь к файлу или каталогу
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(filepath, write_file, kind):
+    """
+    Функция для атомарной замены файла
+
+    Содержимое пишется во временный файл рядом с целевым, сбрасывается
+    на диск и заменяет целевой файл через os.replace, поэтому после сбоя
+    на месте файла остается либо старая, либо новая версия целиком
+
+    Параметры:
+        filepath - строка, путь к целевому файлу
+        write_file - функция, записывает содержимое в файл по переданному пути
+        kind - строка, вид записи для статистики
+
+    Возвращает:
+        filepath - строка, путь к записанному файлу
+    """
+    start = time.perf_counter()
+    tmp_path = f"{filepath}.tmp"
+    fsync_elapsed = 0.0
+    try:
+        write_file(tmp_path)
+        if DURABLE_WRITES:
+            fsync_start = time.perf_counter()
+            _fsync_path(tmp_path)
+            fsync_elapsed += time.perf_counter() - fsync_start
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Переименование сохраняется на диске вместе с записью каталога
+    if DURABLE_WRITES:
+        fsync_start = time.perf_counter()
+        _fsync_path(os.path.dirname(filepath) or '.')
+        fsync_elapsed += time.perf_counter() - fsync_start
+
+    record_write(kind, os.path.getsize(filepath), time.perf_counter() - start,
+        fsync_elapsed)
+    return filepath
 
 @handle_db_errors
 def load_metadata(filepath=DB_INFO_DATAPATH):
@@ -24,41 +132,449 @@ def load_metadata(filepath=DB_INFO_DATAPATH):
 @handle_db_errors
 def save_metadata(data, filepath=DB_INFO_DATAPATH):
     """
-    Функция для сохранения данных в JSON файл
+    Функция для атомарного сохранения данных в JSON файл
 
     Параметры:
         data - словарь, данные для записи
         filepath - строка, путь к json файлу
+
+    Возвращает:
+        filepath - строка, путь к записанному файлу
+    """
+    def write_file(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return atomic_write(filepath, write_file, 'metadata')
+
+def table_format(table_meta):
+    """
+    Функция для получения формата хранения таблицы из ее метаданных
+
+    Параметры:
+        table_meta - словарь, содержит метаданные таблицы или None
+    """
+    return (table_meta or {}).get('format', DEFAULT_STORAGE_FORMAT)
+
+def table_generation(table_meta):
+    """
+    Функция для получения поколения файлов таблицы из ее метаданных
+
+    Каждая свертка журнала записывает снимок нового поколения, а метаданные
+    указывают на действующее поколение, поэтому снимок, журнал и метаданные
+    всегда согласованы между собой
+
+    Параметры:
+        table_meta - словарь, содержит метаданные таблицы или None
+    """
+    return (table_meta or {}).get('generation', 0)
+
+def _table_filename(table_name, suffix, generation=0):
+    """
+    Функция для получения имени файла таблицы, поколение 0 хранится
+    в файлах без номера
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        suffix - строка, расширение файла
+        generation - целое число, поколение файлов таблицы
+    """
+    if generation:
+        return f"{table_name}.{generation}{suffix}"
+    return f"{table_name}{suffix}"
+
+def table_filepath(table_name, storage_format=DEFAULT_STORAGE_FORMAT,
+    generation=0):
+    """
+    Функция для получения пути к файлу снимка таблицы
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        storage_format - строка, формат хранения: json, columnar или mapped
+        generation - целое число, поколение файлов таблицы
+    """
+    extension = STORAGE_FORMATS[storage_format]
+    return os.path.join(TABLES_DATAPATH,
+        _table_filename(table_name, extension, generation))
+
+def table_logpath(table_name, generation=0):
+    """
+    Функция для получения пути к журналу изменений таблицы
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        generation - целое число, поколение файлов таблицы
+    """
+    return os.path.join(TABLES_DATAPATH,
+        _table_filename(table_name, ".log", generation))
+
+def remove_table_files(table_name, table_meta=None):
+    """
+    Функция для удаления файлов таблицы
+
+    Если переданы метаданные, файлы действующего поколения сохраняются,
+    а удаляются только устаревшие поколения и временные файлы, оставшиеся
+    после сбоя. Без метаданных удаляются все файлы таблицы
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        table_meta - словарь, содержит метаданные таблицы или None
+    """
+    keep = set()
+    if table_meta is not None:
+        generation = table_generation(table_meta)
+        keep.add(os.path.basename(table_filepath(table_name,
+            table_format(table_meta), generation)))
+        keep.add(os.path.basename(table_logpath(table_name, generation)))
+
+    extensions = '|'.join(re.escape(extension)
+        for extension in [*STORAGE_FORMATS.values(), '.log'])
+    pattern = re.compile(rf"{re.escape(table_name)}(\.\d+)?({extensions})"
+        r"(\.tmp)?")
+
+    try:
+        filenames = os.listdir(TABLES_DATAPATH)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        if pattern.fullmatch(filename) and filename not in keep:
+            os.remove(os.path.join(TABLES_DATAPATH, filename))
+
+def file_signature(filepath):
+    """
+    Функция для получения признака версии файла: при замене файла меняется
+    inode, при дозаписи - размер и время изменения
+
+    Параметры:
+        filepath - строка, путь к файлу
+
+    Возвращает:
+        signature - кортеж (inode, время изменения, размер) или None,
+            если файла нет
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def table_signature(table_name, table_meta=None):
+    """
+    Функция для получения признака версии файлов таблицы на диске
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        table_meta - словарь, содержит метаданные таблицы
+
+    Возвращает:
+        signature - кортеж признаков снимка и журнала действующего поколения
     """
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    generation = table_generation(table_meta)
+    return (file_signature(table_filepath(table_name, table_format(table_meta),
+        generation)), file_signature(table_logpath(table_name, generation)))
+
+def replay_log_entry(table_data, entry, row_cls=None):
+    """
+    Функция для применения одной записи журнала к данным таблицы
+
+    Параметры:
+        table_data - список, содержит записи таблицы
+        entry - словарь, содержит операцию журнала
+        row_cls - класс записей схемы, в который преобразуются словари
+            из журнала, None - записи остаются словарями
+
+    Возвращает:
+        table_data - список, содержит данные после применения операции
+    """
+    op = entry['op']
+
+    if op == 'insert':
+        records = entry['records']
+        if row_cls is not None:
+            records = dicts_to_rows(records, row_cls)
+        table_data.extend(records)
+    elif op == 'update':
+        changes = entry['set']
+        position_of_id = getattr(table_data, 'position_of_id', None)
+        if position_of_id is not None:
+            # Отображенная таблица находит записи по ID без декодирования
+            positions = (position_of_id(record_id)
+                for record_id in entry['ids'])
+        else:
+            ids = set(entry['ids'])
+            get_id = column_getter(table_row_type(table_data), 'ID')
+            positions = [position for position, record in enumerate(table_data)
+                if get_id(record) in ids]
+        for position in positions:
+            if position is None:
+                continue
+            record = table_data[position]
+            if isinstance(record, Row):
+                table_data[position] = record.replace(changes)
+            else:
+                record.update(changes)
+    elif op == 'delete':
+        ids = set(entry['ids'])
+        if hasattr(table_data, 'delete_positions'):
+            positions = (table_data.position_of_id(record_id)
+                for record_id in ids)
+            table_data.delete_positions({position for position in positions
+                if position is not None})
+        else:
+            get_id = column_getter(table_row_type(table_data), 'ID')
+            table_data = [record for record in table_data
+                if get_id(record) not in ids]
+    elif op == 'batch':
+        for batch_entry in entry['entries']:
+            table_data = replay_log_entry(table_data, batch_entry, row_cls)
+    else:
+        raise ValueError(f"Неизвестная операция журнала: {op}")
+
+    return table_data
+
+def _committed_txn(table_name):
+    """
+    Функция для чтения номера последней фиксации таблицы из метаданных
+    на диске, вызывается под блокировкой метаданных: номер в метаданных
+    сессии мог устареть, если фиксацию выполнил другой процесс
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+    """
+    metadata = load_metadata() or {}
+    return metadata.get(table_name, {}).get('txn', 0)
 
 @handle_db_errors
-def load_table_data(table_name):
+def load_table_data(table_name, table_meta=None):
     """
-    Функция для загрузки таблицы из JSON файла
+    Функция для загрузки таблицы из снимка и журнала изменений
+
+    Недописанная после сбоя последняя строка журнала отбрасывается. Так же
+    отбрасываются пачки с номером фиксации больше записанного в метаданных
+    на диске: сбой случился до записи метаданных, и изменения других таблиц
+    той же фиксации тоже не действуют. Журнал при чтении не изменяется,
+    его конец исправляет запись под исключительной блокировкой
 
     Параметры:
         table_name - строка, содержит название таблицы
+        table_meta - словарь, содержит метаданные таблицы, по ним
+            выбираются формат и поколение снимка, по умолчанию JSON
     """
-    filepath = os.path.join(TABLES_DATAPATH, f"{table_name}.json")
+    storage_format = table_format(table_meta)
+    generation = table_generation(table_meta)
+    filepath = table_filepath(table_name, storage_format, generation)
+    row_cls = schema_row_type(table_meta['columns']) if table_meta else None
+    committed = (table_meta or {}).get('txn', 0)
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if storage_format == 'columnar':
+            with open(filepath, 'rb') as f:
+                table_data = decode_table(f.read())
+        elif storage_format == 'mapped':
+            table_data = MappedTable(filepath)
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                table_data = json.load(f)
+            if row_cls is not None:
+                table_data = dicts_to_rows(table_data, row_cls)
+    except FileNotFoundError:
+        table_data = []
+
+    try:
+        with open(table_logpath(table_name, generation), 'rb') as f:
+            reread = False
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("Строка журнала не завершена")
+                    entry = json.loads(line) if line.strip() else None
+                except ValueError:
+                    # Недописанная последняя строка после сбоя
+                    break
+                if entry is None:
+                    continue
+                if entry.get('txn', 0) > committed and not reread:
+                    committed = _committed_txn(table_name)
+                    reread = True
+                if entry.get('txn', 0) > committed:
+                    # Незафиксированная пачка после сбоя
+                    continue
+                table_data = replay_log_entry(table_data, entry, row_cls)
     except FileNotFoundError:
-        return []
+        pass
+
+    return table_data
+
+def _line_start(f, end):
+    """
+    Функция для поиска начала последней строки файла перед позицией end
+
+    Параметры:
+        f - двоичный файл, открытый для чтения
+        end - целое число, позиция конца строки
+
+    Возвращает:
+        start - целое число, позиция начала строки
+    """
+    # Перевод строки в конце относится к самой строке
+    position = end - 1
+    while position > 0:
+        step = min(io.DEFAULT_BUFFER_SIZE, position)
+        f.seek(position - step)
+        newline = f.read(step).rfind(b'\n')
+        if newline >= 0:
+            return position - step + newline + 1
+        position -= step
+    return 0
+
+def repair_table_log(table_name, table_meta=None):
+    """
+    Функция для исправления конца журнала перед дозаписью, вызывается
+    под исключительными блокировками метаданных и таблицы
+
+    Отрезаются недописанная строка и пачки с номером фиксации больше
+    записанного в метаданных на диске, оставшиеся после сбоя: иначе новая
+    строка продолжила бы обрывок, а следующая фиксация с тем же номером
+    сделала бы отброшенную пачку действующей
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        table_meta - словарь, содержит метаданные таблицы, по ним
+            выбирается поколение журнала
+    """
+    try:
+        f = open(table_logpath(table_name, table_generation(table_meta)), 'rb+')
+    except FileNotFoundError:
+        return
+
+    with f:
+        size = valid_size = f.seek(0, os.SEEK_END)
+        committed = None
+        while valid_size:
+            # Номер фиксации пишется последним ключом пачки
+            f.seek(max(valid_size - 64, 0))
+            tail = f.read(min(valid_size, 64))
+            if tail.endswith(b'\n'):
+                match = _TXN_TAIL.search(tail)
+                if match is None:
+                    break
+                if committed is None:
+                    committed = _committed_txn(table_name)
+                if int(match[1]) <= committed:
+                    break
+            valid_size = _line_start(f, valid_size)
+
+        if valid_size < size:
+            f.truncate(valid_size)
+
+@handle_db_errors
+def append_table_log(table_name, entries, table_meta=None, txn=None):
+    """
+    Функция для дозаписи операций в журнал изменений таблицы
+
+    Несколько операций пишутся одной строкой-пачкой, поэтому сбой во время
+    записи не оставляет в журнале часть изменений: недописанная строка
+    отбрасывается при загрузке целиком
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        entries - список, содержит операции журнала
+        table_meta - словарь, содержит метаданные таблицы, по ним
+            выбирается поколение журнала
+        txn - целое число, номер фиксации нескольких таблиц, пачка
+            действует только после записи этого номера в метаданные
+
+    Возвращает:
+        size - целое число, размер журнала в байтах после записи
+    """
+    os.makedirs(TABLES_DATAPATH, exist_ok=True)
+
+    start = time.perf_counter()
+    fsync_elapsed = 0.0
+    if len(entries) == 1 and txn is None:
+        entry = entries[0]
+    else:
+        entry = {'op': 'batch', 'entries': entries}
+        if txn is not None:
+            entry['txn'] = txn
+    data = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+    repair_table_log(table_name, table_meta)
+    with open(table_logpath(table_name, table_generation(table_meta)),
+        'ab') as f:
+        f.write(data)
+        f.flush()
+        if DURABLE_WRITES:
+            fsync_start = time.perf_counter()
+            os.fsync(f.fileno())
+            fsync_elapsed = time.perf_counter() - fsync_start
+        size = f.tell()
+
+    record_write('log', len(data), time.perf_counter() - start, fsync_elapsed)
+    return size
+
+def needs_compaction(table_name, log_size, table_meta=None):
+    """
+    Функция для проверки, пора ли свернуть журнал изменений
+
+    Журнал сворачивается, когда он больше LOG_COMPACT_SIZE и больше
+    снимка таблицы, так что стоимость свертки распределяется между
+    записями журнала и не растет квадратично при массовой загрузке
+
+    Параметры:
+        table_name - строка, содержит название таблицы
+        log_size - целое число, размер журнала в байтах
+        table_meta - словарь, содержит метаданные таблицы
+    """
+    if log_size is None or log_size < LOG_COMPACT_SIZE:
+        return False
+    try:
+        filepath = table_filepath(table_name, table_format(table_meta),
+            table_generation(table_meta))
+        return log_size >= os.path.getsize(filepath)
+    except OSError:
+        return True
 
 @handle_db_errors
-def save_table_data(table_name, data):
+def save_table_data(table_name, data, table_meta=None, generation=None):
     """
-    Функция для сохранения таблицы в JSON файл
+    Функция для атомарного сохранения снимка таблицы
+
+    Снимок пишется во временный файл и заменяет файл поколения целиком.
+    Журнал не удаляется: снимок нового поколения становится действующим
+    только после записи метаданных с номером этого поколения
 
     Параметры:
         table_name - строка, содержит название таблицы
-        data - словарь, содержит метадату таблицы
+        data - список, содержит записи или словари с данными таблицы
+        table_meta - словарь, содержит метаданные таблицы, по ним
+            выбирается формат снимка, по умолчанию JSON
+        generation - целое число, поколение снимка, по умолчанию
+            действующее поколение из метаданных
+
+    Возвращает:
+        filepath - строка, путь к записанному снимку
     """
     os.makedirs(TABLES_DATAPATH, exist_ok=True)
-    
-    filepath = os.path.join(TABLES_DATAPATH, f"{table_name}.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+
+    storage_format = table_format(table_meta)
+    if generation is None:
+        generation = table_generation(table_meta)
+    filepath = table_filepath(table_name, storage_format, generation)
+
+    def write_file(path):
+        if storage_format == 'columnar':
+            with open(path, 'wb') as f:
+                f.write(encode_table(table_meta['columns'], data))
+        elif storage_format == 'mapped':
+            # Данные могут читаться из отображения старого файла, поэтому
+            # он заменяется только после записи нового целиком
+            write_mapped_table(path, table_meta['columns'], data)
+        else:
+            # Записи преобразуются в словари по одной, а не все сразу
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                for i, record in enumerate(data):
+                    f.write(',\n  ' if i else '\n  ')
+                    f.write(json.dumps(as_dict(record), ensure_ascii=False))
+                f.write('\n]' if len(data) else ']')
+
+    return atomic_write(filepath, write_file, 'snapshot')
\ No newline at end of file
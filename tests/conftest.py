@@ -0,0 +1,27 @@
+# tests/conftest.py
+
+import pytest
+
+from src.primitive_db.constrants import (
+    INSTRUMENTATION,
+    PARALLEL_SCAN_ROWS,
+    PARALLEL_SCAN_WORKERS,
+)
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.instrument import set_instrumentation
+from src.primitive_db.parallel import set_parallel_scan
+from src.primitive_db.storage import close_backends
+
+
+@pytest.fixture(autouse=True)
+def database_dir(tmp_path, monkeypatch):
+    """
+    Фикстура для запуска теста в пустом каталоге: метаданные и файлы
+    таблиц создаются по относительным путям
+    """
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    close_backends()
+    set_parallel_scan(rows=PARALLEL_SCAN_ROWS, workers=PARALLEL_SCAN_WORKERS)
+    set_auto_confirm(None)
+    set_instrumentation(INSTRUMENTATION)
\ No newline at end of file
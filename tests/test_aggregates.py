@@ -0,0 +1,86 @@
+# tests/test_aggregates.py
+
+import pytest
+
+from src.primitive_db.aggregates import aggregate, parse_aggregates
+from src.primitive_db.engine import run_batch
+from src.primitive_db.rows import to_rows
+
+COLUMNS = [{'name': 'ID', 'type': 'int'}, {'name': 'city', 'type': 'str'},
+    {'name': 'age', 'type': 'int'}]
+DICTS = [
+    {'ID': 1, 'city': 'Tver', 'age': 20},
+    {'ID': 2, 'city': 'Omsk', 'age': 35},
+    {'ID': 3, 'city': 'Tver', 'age': None},
+    {'ID': 4, 'city': 'Tver', 'age': 41},
+    {'ID': 5, 'city': None, 'age': 7},
+]
+
+
+@pytest.mark.parametrize('records', [DICTS, to_rows(DICTS, COLUMNS)])
+def test_aggregate(records):
+    specs, _ = parse_aggregates(
+        'count(*), count(age), sum(age), min(age), max(city), avg(age)', COLUMNS)
+    columns, rows = aggregate(iter(records), specs)
+
+    assert [col['name'] for col in columns] == ['count(*)', 'count(age)',
+        'sum(age)', 'min(age)', 'max(city)', 'avg(age)']
+    assert rows == [{'count(*)': 5, 'count(age)': 4, 'sum(age)': 103,
+        'min(age)': 7, 'max(city)': 'Tver', 'avg(age)': 25.75}]
+
+
+@pytest.mark.parametrize('records', [DICTS, to_rows(DICTS, COLUMNS)])
+def test_group_by(records):
+    specs, group_by = parse_aggregates('city, count(*), avg(age)', COLUMNS,
+        'city')
+    _, rows = aggregate(records, specs, group_by)
+
+    assert rows == [
+        {'city': 'Tver', 'count(*)': 3, 'avg(age)': 30.5},
+        {'city': 'Omsk', 'count(*)': 1, 'avg(age)': 35.0},
+        {'city': None, 'count(*)': 1, 'avg(age)': 7.0},
+    ]
+
+
+def test_empty_input():
+    specs, _ = parse_aggregates('count(*), sum(age), min(age), avg(age)', COLUMNS)
+
+    assert aggregate([], specs)[1] == [{'count(*)': 0, 'sum(age)': 0,
+        'min(age)': None, 'avg(age)': None}]
+    specs, group_by = parse_aggregates('count(*)', COLUMNS, 'city')
+    assert aggregate([], specs, group_by)[1] == []
+
+
+@pytest.mark.parametrize('select_list, group_by', [
+    ('sum(*)', None),
+    ('avg(city)', None),
+    ('median(age)', None),
+    ('count(height)', None),
+    ('age', None),
+    ('city, count(*)', 'height'),
+    ('count(*),', None),
+])
+def test_invalid_aggregate(select_list, group_by):
+    with pytest.raises(ValueError):
+        parse_aggregates(select_list, COLUMNS, group_by)
+
+
+def shown_rows(capsys, command):
+    run_batch([command])
+    lines = capsys.readouterr().out.splitlines()
+    cells = [[cell.strip() for cell in line.split('|')[1:-1]]
+        for line in lines if line.startswith('|')]
+    return cells[1:]
+
+
+def test_group_by_in_select(capsys):
+    run_batch([
+        'create_table users city:str age:int',
+        'insert into users values ("Tver", 20), ("Omsk", 35), ("Tver", 41), '
+            '("Kursk", 50)',
+    ])
+
+    assert shown_rows(capsys, 'select count(*), max(age) from users '
+        'where age > 30') == [['3', '50']]
+    assert shown_rows(capsys, 'select city, sum(age) from users group by city '
+        'order by sum(age) desc limit 2') == [['Tver', '61'], ['Kursk', '50']]
\ No newline at end of file
@@ -0,0 +1,126 @@
+# tests/test_bulk.py
+
+import json
+import os
+
+import pytest
+
+from src.primitive_db import table_manager
+from src.primitive_db.bulk import import_table
+from src.primitive_db.constrants import TABLES_DATAPATH
+from src.primitive_db.core import build_record
+from src.primitive_db.engine import run_batch
+from src.primitive_db.table_manager import TableManager
+
+from .test_engine import load_rows
+
+COLUMNS = [
+    {'name': 'ID', 'type': 'int'},
+    {'name': 'name', 'type': 'str'},
+    {'name': 'age', 'type': 'int'},
+    {'name': 'ok', 'type': 'bool'},
+]
+
+
+def write_jsonl(filepath, rows):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def test_build_record_coerces_json_values():
+    assert build_record(COLUMNS, ['a', 3.0, True]) == \
+        {'name': 'a', 'age': 3, 'ok': True}
+    assert build_record(COLUMNS, [5, '7', 'false']) == \
+        {'name': '5', 'age': 7, 'ok': False}
+
+
+@pytest.mark.parametrize('values', [
+    [None, 1, True],
+    ['a', None, True],
+    ['a', 1, None],
+    ['a', 1.5, True],
+    ['a', True, True],
+    ['a', 1, 1],
+])
+def test_build_record_rejects_json_values(values):
+    with pytest.raises(ValueError):
+        build_record(COLUMNS, values)
+
+
+def test_import_jsonl():
+    write_jsonl('rows.jsonl', [
+        {'name': 'a', 'age': 1, 'ok': True},
+        {'name': 'b', 'age': 2.0, 'ok': False, 'ID': 100},
+    ])
+    run_batch([
+        'create_table users name:str age:int ok:bool',
+        'import users from rows.jsonl',
+    ])
+
+    assert load_rows('users') == [
+        {'ID': 1, 'name': 'a', 'age': 1, 'ok': True},
+        {'ID': 2, 'name': 'b', 'age': 2, 'ok': False},
+    ]
+
+
+def test_import_stops_at_null():
+    write_jsonl('rows.jsonl', [
+        {'name': 'a', 'age': 1, 'ok': True},
+        {'name': None, 'age': 2, 'ok': False},
+    ])
+    run_batch([
+        'create_table users name:str age:int ok:bool',
+        'import users from rows.jsonl',
+    ])
+
+    assert load_rows('users') == []
+
+
+def test_import_compacts_once(monkeypatch):
+    write_jsonl('rows.jsonl', ({'name': f'n{i}', 'age': i, 'ok': True}
+        for i in range(200)))
+    run_batch(['create_table users name:str age:int ok:bool'])
+
+    compactions = []
+    monkeypatch.setattr(table_manager.TableManager, 'compact_table',
+        lambda self, table_name: compactions.append(table_name) or True)
+    # Журнал каждой пачки больше порога свертки
+    monkeypatch.setattr('src.primitive_db.utils.LOG_COMPACT_SIZE', 1)
+
+    manager = TableManager()
+    try:
+        assert import_table(manager, 'users', 'rows.jsonl', batch_size=10) == 200
+    finally:
+        manager.close()
+
+    assert compactions == ['users']
+    assert os.path.exists(os.path.join(TABLES_DATAPATH, 'users.log'))
+
+
+@pytest.mark.parametrize('filename', ['rows.csv', 'rows.jsonl'])
+def test_export_round_trip(filename):
+    run_batch([
+        'create_table users name:str age:int ok:bool',
+        'insert into users values ("a, \'b\'", 1, true), ("c", 2, false), '
+            '("d", 3, true)',
+        f'export users to {filename} where ok = true',
+        'create_table copy name:str age:int ok:bool',
+        f'import copy from {filename}',
+    ])
+
+    assert load_rows('copy') == [
+        {'ID': 1, 'name': "a, 'b'", 'age': 1, 'ok': True},
+        {'ID': 2, 'name': 'd', 'age': 3, 'ok': True},
+    ]
+
+
+def test_export_rejects_format(capsys):
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("a")',
+        'export users to rows.txt',
+    ])
+
+    assert 'Неподдерживаемый формат' in capsys.readouterr().out
+    assert not os.path.exists('rows.txt')
\ No newline at end of file
@@ -0,0 +1,204 @@
+# tests/test_engine.py
+
+import os
+
+import pytest
+
+from src.primitive_db.constrants import TABLES_DATAPATH
+from src.primitive_db.core import drop_table
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import (
+    parse_set,
+    parse_values,
+    run_batch,
+    run_script,
+    split_raw,
+)
+from src.primitive_db.table_manager import TableManager
+
+from .test_sorting import shown_names
+
+
+def load_rows(table_name):
+    """
+    Функция для чтения таблицы новой сессией, как после перезапуска
+
+    Параметры:
+        table_name - строка, содержит имя таблицы
+
+    Возвращает:
+        rows - список, содержит записи таблицы словарями
+    """
+    manager = TableManager()
+    try:
+        return [record.as_dict() for record in manager.get_table(table_name)]
+    finally:
+        manager.close()
+
+
+def test_update_rejects_id():
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ("a", 1), ("b", 2), ("c", 3)',
+        'update users set ID = 3 where ID = 1',
+        'delete from users where ID = 3',
+    ], auto_confirm=True)
+
+    assert load_rows('users') == [
+        {'ID': 1, 'name': 'a', 'age': 1},
+        {'ID': 2, 'name': 'b', 'age': 2},
+    ]
+
+
+def test_id_sequence_persists():
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("a"), ("b"), ("c")',
+        'delete from users where ID >= 2',
+    ], auto_confirm=True)
+    run_batch(['insert into users values ("d")'])
+
+    # Удаленные ID не выдаются повторно и после перезапуска
+    assert [row['ID'] for row in load_rows('users')] == [1, 4]
+
+
+def test_select_cache_is_per_session(capsys):
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("a"), ("b")',
+    ])
+    run_batch(['select from users where name = "a"'])
+
+    # Изменение другим процессом не сбрасывает кэш выборок этого процесса
+    manager = TableManager()
+    try:
+        manager.insert_record('users', {'name': 'a', 'ID': 3})
+    finally:
+        manager.close()
+    capsys.readouterr()
+
+    # Новая сессия начинает версии таблиц с нуля, но не видит
+    # выборку предыдущей сессии из кэша
+    run_batch(['select from users where name = "a"'])
+    assert '| 3  |' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('backend', ['files', 'sqlite'])
+def test_drop_table_removes_files(backend):
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("a")',
+        'compact users',
+        'insert into users values ("b")',
+        'select from users',
+    ], storage_backend=backend)
+    assert os.path.exists(os.path.join(TABLES_DATAPATH, 'users.lock'))
+
+    run_batch(['drop_table users'], auto_confirm=True)
+
+    assert not [filename for filename in os.listdir(TABLES_DATAPATH)
+        if filename.startswith('users.')]
+
+
+def test_drop_table_conflict_keeps_files():
+    run_batch(['create_table users name:str', 'insert into users values ("a")'])
+    set_auto_confirm(True)
+    dropper = TableManager()
+    writer = TableManager()
+    try:
+        drop_table(dropper.metadata, 'users')
+        # Другой процесс меняет таблицу до записи метаданных без нее
+        run_script(writer, writer.metadata, ['insert into users values ("b")'])
+
+        with pytest.raises(ValueError):
+            dropper.drop_table_data('users', writer.metadata['users'])
+        assert 'users' in dropper.metadata
+    finally:
+        writer.close()
+        dropper.close()
+
+    assert [row['name'] for row in load_rows('users')] == ['a', 'b']
+
+
+def test_parse_values():
+    assert parse_values('("a, b", 1, true), (\'c\', 2, false)') == [
+        ['a, b', '1', 'true'],
+        ['c', '2', 'false'],
+    ]
+    assert parse_values('(new york, "x")') == [['new york', 'x']]
+
+    for values_str in ['"a", 1', '("a", 1', '("a") ("b")']:
+        with pytest.raises(ValueError):
+            parse_values(values_str)
+
+
+def test_parse_set():
+    columns = [{'name': 'ID', 'type': 'int'}, {'name': 'name', 'type': 'str'},
+        {'name': 'age', 'type': 'int'}]
+
+    assert parse_set('age = 31, name = "A, B"', columns) == \
+        {'age': 31, 'name': 'A, B'}
+    assert parse_set("name='x = y'", columns) == {'name': 'x = y'}
+
+    for set_clause in ['age 31', 'age = ', 'ID = 2', 'score = 1']:
+        with pytest.raises(ValueError):
+            parse_set(set_clause, columns)
+
+
+def test_split_raw():
+    assert split_raw('''insert into t values ("a  b", 'c "d"'), ("e, 'f'")''') == [
+        'insert', 'into', 't', 'values', '("a  b",', '\'c "d"\'),', '("e, \'f\'")']
+
+
+def test_insert_keeps_quoted_spaces():
+    run_batch([
+        'create_table users name:str',
+        '''insert into users values ("a  b"), ('c "d"'), ("e, 'f'")''',
+        'update users set name = " g  h " where ID = 2',
+    ])
+
+    assert [row['name'] for row in load_rows('users')] == \
+        ['a  b', ' g  h ', "e, 'f'"]
+
+
+def test_update_with_quoted_comma():
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ("a", 30), ("b", 20)',
+        'update users set age = 31, name = "A, B" where ID = 1',
+    ])
+
+    assert load_rows('users') == [
+        {'ID': 1, 'name': 'A, B', 'age': 31},
+        {'ID': 2, 'name': 'b', 'age': 20},
+    ]
+
+
+@pytest.mark.parametrize('suffix, expected', [
+    ('limit 2', ['a', 'b']),
+    ('offset 3', ['d', 'e']),
+    ('limit 2 offset 1', ['b', 'c']),
+    ('offset 1 limit 2', ['b', 'c']),
+    ('limit 10 offset 4', ['e']),
+    ('limit 0', []),
+    ('offset 5', []),
+    ('where ID > 1 limit 2 offset 1', ['c', 'd']),
+    ('order by name desc limit 2 offset 1', ['d', 'c']),
+])
+def test_limit_offset(capsys, suffix, expected):
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("a"), ("b"), ("c"), ("d"), ("e")',
+    ])
+    capsys.readouterr()
+
+    assert shown_names(capsys, f'select from users {suffix}') == expected
+
+
+def test_limit_rejects_negative(capsys):
+    run_batch([
+        'create_table users name:str',
+        'select from users limit -1',
+    ])
+
+    assert 'LIMIT ожидает' in capsys.readouterr().out
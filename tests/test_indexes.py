@@ -0,0 +1,118 @@
+# tests/test_indexes.py
+
+from random import Random
+
+import pytest
+
+from src.primitive_db import indexes as indexes_module
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import run_script
+from src.primitive_db.indexes import build_indexes
+from src.primitive_db.rows import row_type
+from src.primitive_db.table_manager import TableManager
+
+TABLE_META = {'indexes': {'city': 'hash', 'age': 'sorted'}}
+
+
+def assert_same(indexes, table_data):
+    """
+    Функция для сравнения индексов с индексами, построенными заново
+    по данным таблицы
+
+    Параметры:
+        indexes - словарь, содержит проверяемые индексы
+        table_data - список, содержит записи таблицы
+    """
+    expected = build_indexes(TABLE_META, table_data)
+    for column, index in expected.items():
+        values = {record.get(column) for record in table_data} | {-1, 'x'}
+        for value in values:
+            assert indexes[column].lookup(value) == index.lookup(value), \
+                (column, value)
+    assert indexes['age'].range() == list(range(len(table_data)))
+    assert indexes['age'].range(low=20, high=40) == \
+        expected['age'].range(low=20, high=40)
+
+
+@pytest.fixture(params=[('json', 4096), ('mapped', 4096), ('json', 2),
+    ('mapped', 2)])
+def manager(request, monkeypatch):
+    storage_format, max_gaps = request.param
+    # С малым пределом позиции индексов пересчитываются при удалении
+    monkeypatch.setattr(indexes_module, 'INDEX_MAX_GAPS', max_gaps)
+    set_auto_confirm(True)
+    manager = TableManager()
+    run_script(manager, manager.metadata, [
+        f'create_table users city:str age:int format={storage_format}',
+        'create_index users city hash',
+        'create_index users age sorted',
+        *(f'insert into users values ("c{i % 3}", {i * 5})' for i in range(12)),
+        'compact users',
+    ])
+    yield manager
+    manager.close()
+
+
+def test_indexes_follow_update(manager):
+    indexes = manager.get_indexes('users')
+    run_script(manager, manager.metadata, [
+        'update users set city = "c9", age = 33 where age >= 40',
+        'update users set age = 1 where ID = 2',
+    ])
+
+    assert manager.get_indexes('users') is indexes
+    assert_same(indexes, manager.get_table('users'))
+
+
+def test_indexes_follow_delete(manager):
+    indexes = manager.get_indexes('users')
+    run_script(manager, manager.metadata, [
+        'insert into users values ("c7", 7)',
+        'delete from users where city = "c1"',
+        'delete from users where age < 10',
+        'delete from users where ID = 3',
+    ])
+
+    # Удаление обновляет индексы, а не сбрасывает их
+    assert manager.get_indexes('users') is indexes
+    table_data = manager.get_table('users')
+    assert [row.get('ID') for row in table_data] == [4, 6, 7, 9, 10, 12]
+    assert indexes['ID'].lookup(1) == [] and indexes['ID'].lookup(12) == [5]
+    assert_same(indexes, table_data)
+
+
+@pytest.mark.parametrize('max_gaps', [4096, 3])
+def test_random_changes(monkeypatch, max_gaps):
+    monkeypatch.setattr(indexes_module, 'INDEX_MAX_GAPS', max_gaps)
+    rows = row_type(('ID', 'city', 'age'))
+    random = Random(7)
+    table_data = [rows((i, f'c{i % 4}', i % 9)) for i in range(1, 41)]
+    indexes = build_indexes(TABLE_META, table_data)
+    next_id = 41
+
+    for _ in range(60):
+        action = random.random()
+        if action < 0.4 and table_data:
+            positions = sorted(random.sample(range(len(table_data)),
+                random.randint(1, min(4, len(table_data)))))
+            for column, index in indexes.items():
+                index.delete_positions([(position,
+                    table_data[position].get(column)) for position in positions])
+            table_data = [record for position, record in enumerate(table_data)
+                if position not in positions]
+        elif action < 0.7 and table_data:
+            position = random.randrange(len(table_data))
+            record = table_data[position]
+            for column, value in [('city', f'c{random.randrange(5)}'),
+                ('age', random.randrange(12))]:
+                indexes[column].remove(record.get(column), position)
+                indexes[column].add(value, position)
+                record = record.replace({column: value})
+            table_data[position] = record
+        else:
+            table_data.append(rows((next_id, 'c1', next_id % 7)))
+            for column, index in indexes.items():
+                index.add(table_data[-1].get(column), len(table_data) - 1)
+            next_id += 1
+
+        assert_same(indexes, table_data)
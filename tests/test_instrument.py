@@ -0,0 +1,42 @@
+# tests/test_instrument.py
+
+from src.primitive_db.engine import run_batch
+from src.primitive_db.instrument import (
+    recent_spans,
+    reset_spans,
+    set_instrumentation,
+)
+from src.primitive_db.main import main
+
+COMMANDS = [
+    'create_table users name:str',
+    'insert into users values ("a")',
+    'select from users where name = "a"',
+]
+
+
+def test_spans_are_recorded():
+    reset_spans()
+    set_instrumentation(True)
+    run_batch(COMMANDS)
+
+    phases = {(command, phase) for command, phase, _, _ in recent_spans()}
+    assert {('insert', 'total'), ('select', 'parse'), ('select', 'filter'),
+        ('select', 'render')} <= phases
+
+
+def test_no_spans_when_disabled():
+    reset_spans()
+    set_instrumentation(False)
+    run_batch(COMMANDS)
+
+    assert recent_spans() == []
+
+
+def test_no_spans_flag():
+    reset_spans()
+    assert main(['--no-spans', *(f'-c{command}' for command in COMMANDS)]) == 0
+    assert recent_spans() == []
+
+    main(['--no-spans', '--time', '-c', 'list_tables'])
+    assert recent_spans()
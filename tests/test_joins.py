@@ -0,0 +1,86 @@
+# tests/test_joins.py
+
+import pytest
+
+from src.primitive_db import joins
+from src.primitive_db.engine import run_batch
+from src.primitive_db.joins import hash_join, parse_join_where, split_join_where
+from src.primitive_db.rows import to_rows
+
+from .test_aggregates import shown_rows
+
+USER_COLUMNS = [{'name': 'ID', 'type': 'int'}, {'name': 'name', 'type': 'str'}]
+ORDER_COLUMNS = [{'name': 'ID', 'type': 'int'}, {'name': 'user_id', 'type': 'int'},
+    {'name': 'total', 'type': 'int'}]
+USERS = to_rows(({'ID': i, 'name': f'user{i}'} for i in range(1, 41)),
+    USER_COLUMNS)
+# У части заказов нет пользователя или пользователь не существует
+ORDERS = to_rows(({'ID': i, 'user_id': None if i % 9 == 0 else i % 50,
+    'total': i} for i in range(1, 121)), ORDER_COLUMNS)
+
+
+def expected_join():
+    return [{'users.ID': user[0], 'users.name': user[1], 'orders.ID': order[0],
+        'orders.user_id': order[1], 'orders.total': order[2]}
+        for user in USERS for order in ORDERS if user[0] == order[1]]
+
+
+def sort_key(row):
+    return row['users.ID'], row['orders.ID']
+
+
+@pytest.mark.parametrize('build_left', [True, False])
+@pytest.mark.parametrize('memory_rows', [1000, 1])
+def test_hash_join(monkeypatch, build_left, memory_rows):
+    partitioned = []
+    write_partitions = joins._write_partitions
+
+    def spy(records, column, depth):
+        partitioned.append(depth)
+        return write_partitions(records, column, depth)
+
+    monkeypatch.setattr(joins, '_write_partitions', spy)
+    rows = list(hash_join(iter(USERS), iter(ORDERS), 'users', 'ID', 'orders',
+        'user_id', build_left=build_left, memory_rows=memory_rows))
+
+    assert sorted(rows, key=sort_key) == expected_join()
+    # Малый предел памяти разбивает обе стороны, в том числе повторно
+    if memory_rows < len(USERS):
+        assert 0 in partitioned and max(partitioned) > 0
+    else:
+        assert partitioned == []
+
+
+def test_split_join_where():
+    columns = joins.join_columns('users', USER_COLUMNS, 'orders', ORDER_COLUMNS)
+    predicate = parse_join_where('name like "user1%" and total > 10 and '
+        '(users.ID = 3 or orders.ID = 5)', columns)
+    left, right, rest = split_join_where(predicate, 'users', 'orders')
+
+    assert left.ast == ('like', 'name', 'user1%')
+    assert right.ast == ('cmp', '>', 'total', 10)
+    assert rest.ast == ('or', (('cmp', '==', 'users.ID', 3),
+        ('cmp', '==', 'orders.ID', 5)))
+
+    # Имя ID есть в обеих таблицах, без имени таблицы оно неоднозначно
+    with pytest.raises(ValueError):
+        parse_join_where('ID = 3', columns)
+
+
+def test_join_in_select(capsys):
+    run_batch([
+        'create_table users name:str',
+        'insert into users values ("ann"), ("bob"), ("eve")',
+        'create_table orders user_id:int total:int',
+        'insert into orders values (1, 10), (2, 20), (1, 30), (5, 40)',
+    ])
+
+    rows = shown_rows(capsys, 'select from users join orders on '
+        'users.ID = orders.user_id where total > 15')
+    assert sorted(rows) == [['1', 'ann', '3', '1', '30'],
+        ['2', 'bob', '2', '2', '20']]
+
+    run_batch(['select from users join orders on users.name = orders.total'])
+    assert 'разные типы' in capsys.readouterr().out
+    run_batch(['select from users join users on users.ID = users.ID'])
+    assert 'самой собой' in capsys.readouterr().out
\ No newline at end of file
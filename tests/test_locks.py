@@ -0,0 +1,27 @@
+# tests/test_locks.py
+
+import os
+import threading
+import time
+
+from src.primitive_db.locks import file_lock
+
+
+def test_lock_follows_removed_file(tmp_path):
+    path = str(tmp_path / 'users.lock')
+    reopened = []
+
+    def wait_lock():
+        with file_lock(path, exclusive=True):
+            reopened.append(os.path.exists(path))
+
+    with file_lock(path, exclusive=True):
+        waiter = threading.Thread(target=wait_lock)
+        waiter.start()
+        time.sleep(0.05)
+        # Удаление таблицы удаляет файл блокировки под блокировкой
+        os.remove(path)
+    waiter.join()
+
+    # Ожидавший поток получил блокировку нового файла, а не удаленного
+    assert reopened == [True]
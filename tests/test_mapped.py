@@ -0,0 +1,65 @@
+# tests/test_mapped.py
+
+from src.primitive_db.core import delete
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import run_batch
+from src.primitive_db.mapped import MappedTable
+from src.primitive_db.predicates import parse_predicate
+from src.primitive_db.table_manager import TableManager
+
+from .test_engine import load_rows
+
+
+def create_mapped_table(rows):
+    values = ', '.join(f'("n{i}", {i % 10})' for i in range(rows))
+    run_batch([
+        'create_table users name:str age:int format=mapped',
+        f'insert into users values {values}',
+        'compact users',
+        'insert into users values ("x", 1), ("y", 2)',
+    ])
+
+
+def test_delete_keeps_rows_mapped():
+    create_mapped_table(100)
+    set_auto_confirm(True)
+    manager = TableManager()
+    try:
+        table_data = manager.get_table('users')
+        assert isinstance(table_data, MappedTable)
+
+        where_clause = parse_predicate('ID in (5, 50, 101)')
+        new_data, deleted_ids = delete(table_data, where_clause,
+            manager.get_indexes('users'), manager.plan('users', where_clause))
+
+        assert new_data is table_data
+        assert deleted_ids == [5, 50, 101]
+        assert len(table_data) == 99
+        # Декодированы только удаляемые строки, найденные по ID
+        assert len(table_data._rows) <= 2
+        assert table_data.position_of_id(5) is None
+        assert table_data.position_of_id(51) == 48
+        assert table_data[48].get('ID') == 51
+        assert table_data.position_of_id(102) == 98
+        assert table_data.max_id() == 102
+    finally:
+        manager.close()
+
+
+def test_mapped_delete_round_trip():
+    create_mapped_table(100)
+    run_batch([
+        'delete from users where age = 3',
+        'delete from users where ID = 102',
+        'update users set name = "z" where ID = 10',
+    ], auto_confirm=True)
+    expected = [{'ID': i + 1, 'name': f'n{i}', 'age': i % 10}
+        for i in range(100) if i % 10 != 3]
+    expected[8]['name'] = 'z'
+    expected.append({'ID': 101, 'name': 'x', 'age': 1})
+
+    # Журнал воспроизводится поверх отображенного снимка, затем
+    # сворачивается в новый снимок
+    assert load_rows('users') == expected
+    run_batch(['compact users'])
+    assert load_rows('users') == expected
\ No newline at end of file
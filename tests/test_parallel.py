@@ -0,0 +1,86 @@
+# tests/test_parallel.py
+
+import pytest
+
+from src.primitive_db.core import scan
+from src.primitive_db.engine import run_batch, run_script
+from src.primitive_db.parallel import parallel_positions, set_parallel_scan
+from src.primitive_db.planner import FULL_SCAN, PARALLEL_SCAN, plan_query
+from src.primitive_db.predicates import parse_predicate
+from src.primitive_db.table_manager import TableManager
+
+ROWS = 3000
+
+CONDITIONS = [
+    'age = 7',
+    'age >= 90 and ok = true',
+    'name like "n1%" or age in (1, 2, 3)',
+    'city != "c3"',
+]
+
+
+@pytest.fixture
+def manager():
+    values = ', '.join(f'("n{i}", {i % 100}, "c{i % 7}", {str(i % 2 == 0).lower()})'
+        for i in range(ROWS))
+    run_batch([
+        'create_table users name:str age:int city:str ok:bool',
+        f'insert into users values {values}',
+    ])
+    set_parallel_scan(rows=100, workers=2)
+    manager = TableManager()
+    yield manager
+    manager.close()
+
+
+def serial_positions(manager, condition):
+    table_data = manager.get_table('users')
+    predicate = parse_predicate(condition, manager.metadata['users']['columns'])
+    plan = plan_query(predicate, {}, None, len(table_data))
+    return [position for position, _ in scan(table_data, predicate, {}, plan)]
+
+
+def parallel_scan_positions(manager, condition):
+    table_data = manager.get_table('users')
+    columns = manager.metadata['users']['columns']
+    key = (id(manager), 'users', manager.table_version('users'))
+    positions = parallel_positions(table_data,
+        parse_predicate(condition, columns), columns, key)
+    assert positions is not None
+    return list(positions)
+
+
+@pytest.mark.parametrize('condition', CONDITIONS)
+def test_parallel_matches_serial(manager, condition):
+    assert parallel_scan_positions(manager, condition) == \
+        serial_positions(manager, condition)
+
+
+def test_parallel_matches_serial_after_update(manager):
+    for condition in CONDITIONS:
+        parallel_scan_positions(manager, condition)
+
+    run_script(manager, manager.metadata, [
+        'update users set age = 7 where city = "c1"',
+        'insert into users values ("new", 7, "c3", false)',
+    ])
+
+    for condition in CONDITIONS:
+        assert parallel_scan_positions(manager, condition) == \
+            serial_positions(manager, condition)
+
+
+def test_serial_after_mutation(manager):
+    set_parallel_scan(workers=4)
+    plan = manager.plan('users', parse_predicate('age = 7'))
+    assert plan.access == FULL_SCAN
+
+    # Повторный запрос к той же версии окупает запись снимка
+    plan = manager.plan('users', parse_predicate('age = 7'))
+    assert plan.access == PARALLEL_SCAN
+    list(scan(manager.get_table('users'), parse_predicate('age = 7'),
+        manager.get_indexes('users'), plan))
+    assert manager.plan('users', parse_predicate('age = 7')).setup_cost == 0
+
+    run_script(manager, manager.metadata, ['update users set age = 8 where ID = 1'])
+    assert manager.plan('users', parse_predicate('age = 7')).access == FULL_SCAN
\ No newline at end of file
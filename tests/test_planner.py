@@ -0,0 +1,102 @@
+# tests/test_planner.py
+
+import pytest
+
+from src.primitive_db.engine import run_batch
+from src.primitive_db.indexes import build_indexes
+from src.primitive_db.planner import (
+    FULL_SCAN,
+    INDEX_EQ,
+    INDEX_IN,
+    INDEX_RANGE,
+    PK_LOOKUP,
+    collect_stats,
+    estimate_rows,
+    plan_query,
+)
+from src.primitive_db.predicates import parse_predicate
+from src.primitive_db.rows import to_rows
+
+from .test_sorting import shown_names
+
+COLUMNS = [{'name': 'ID', 'type': 'int'}, {'name': 'city', 'type': 'str'},
+    {'name': 'age', 'type': 'int'}]
+RECORDS = to_rows(({'ID': i, 'city': f'city{i % 7}', 'age': i % 100}
+    for i in range(1, 1001)), COLUMNS)
+INDEXES = build_indexes({'indexes': {'city': 'hash', 'age': 'sorted'}}, RECORDS)
+STATS = collect_stats(COLUMNS, RECORDS)
+
+
+def test_collect_stats():
+    assert STATS == {'rows': 1000,
+        'distinct': {'ID': 1000, 'city': 7, 'age': 100},
+        'min': {'ID': 1, 'age': 0}, 'max': {'ID': 1000, 'age': 99}}
+
+    # По выборке уникальный столбец остается уникальным, а повторяющиеся
+    # значения не раздуваются до размера таблицы
+    sampled = collect_stats(COLUMNS, RECORDS, sample_size=100)
+    assert sampled['rows'] == 1000
+    assert sampled['distinct']['ID'] == 1000
+    assert sampled['distinct']['city'] == 7
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ID = 5', 1),
+    ('ID in (1, 2, 3)', 3),
+    ('city = "city1"', 143),
+    ('city in ("city1", "city2")', 286),
+    ('age < 10', 102),
+    ('age >= 90', 91),
+    ('age != 5', 1000),
+])
+def test_estimate_rows(text, expected):
+    node = parse_predicate(text, COLUMNS).ast
+
+    assert estimate_rows(node, STATS, 1000) == expected
+
+
+@pytest.mark.parametrize('text, access', [
+    (None, FULL_SCAN),
+    ('ID = 5', PK_LOOKUP),
+    ('city = "city3"', INDEX_EQ),
+    ('city in ("city3", "city4")', INDEX_IN),
+    ('age > 95', INDEX_RANGE),
+    ('age > 5', FULL_SCAN),
+    ('city != "city3"', FULL_SCAN),
+    ('age > 5 and city = "city3"', INDEX_EQ),
+    ('age > 95 or city = "city3"', FULL_SCAN),
+])
+def test_plan_choice(text, access):
+    predicate = parse_predicate(text, COLUMNS)
+    plan = plan_query(predicate, INDEXES, STATS, len(RECORDS))
+
+    assert plan.access == access
+    assert plan.cost == min(item.cost for item in plan.alternatives)
+    if predicate is not None:
+        positions = plan.positions(INDEXES)
+        if positions is None:
+            positions = range(len(RECORDS))
+        selected = [RECORDS[i] for i in positions
+            if predicate.match(RECORDS[i])]
+        assert selected == [record for record in RECORDS
+            if predicate.match(record)]
+
+
+def test_explain_uses_index(capsys):
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ' + ', '.join(f'("user{i}", {i % 50})'
+            for i in range(500)),
+        'create_index users age sorted',
+        'analyze users',
+    ])
+    capsys.readouterr()
+
+    run_batch(['explain select from users where age = 7'])
+    output = capsys.readouterr().out
+    assert 'index_eq (age = 7)' in output
+    assert 'Фактически просмотрено записей: 10' in output
+    assert 'Найдено записей: 10' in output
+
+    assert shown_names(capsys, 'select from users where age = 7 and ID < 100') == \
+        ['user7', 'user57']
\ No newline at end of file
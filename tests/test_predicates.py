@@ -0,0 +1,87 @@
+# tests/test_predicates.py
+
+import pytest
+
+from src.primitive_db.engine import run_batch
+from src.primitive_db.predicates import parse_predicate
+from src.primitive_db.rows import row_type
+
+from .test_sorting import shown_names
+
+COLUMNS = [{'name': 'ID', 'type': 'int'}, {'name': 'name', 'type': 'str'},
+    {'name': 'age', 'type': 'int'}, {'name': 'ok', 'type': 'bool'}]
+Record = row_type(col['name'] for col in COLUMNS)
+RECORDS = [Record((1, 'ann', 25, True)), Record((2, 'bob', 40, False)),
+    Record((3, 'anna', None, True)), Record((4, 'a_b', 31, False))]
+
+
+def matched(text):
+    """
+    Функция для проверки записей условием по именам и по позициям
+
+    Параметры:
+        text - строка, содержит условие where
+
+    Возвращает:
+        ids - список, содержит ID подходящих записей
+    """
+    predicate = parse_predicate(text, COLUMNS)
+    by_name = [record[0] for record in RECORDS
+        if predicate.match(record.as_dict())]
+    by_position = [record[0] for record in RECORDS
+        if predicate.bind(Record.fields)(record)]
+    assert by_name == by_position
+    return by_name
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('age > 30', [2, 4]),
+    ('age <= 31 and ok = true', [1]),
+    ('age != 40', [1, 3, 4]),
+    ('ok = false or name = "ann"', [1, 2, 4]),
+    ('name = "bob" or age < 30 and ok = true', [1, 2]),
+    ('(name = "bob" or age < 30) and ok = true', [1]),
+    ('ID in (1, 3, 5)', [1, 3]),
+    ('name like "ann%"', [1, 3]),
+    ('name like "a_b"', [4]),
+])
+def test_match(text, expected):
+    assert matched(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'age = "old"',
+    'missing = 1',
+    'ok > true',
+    'age like "1%"',
+    'age in (1, "x")',
+    'name = ',
+    'name = "a" and',
+    '(age > 1',
+])
+def test_invalid_condition(text):
+    with pytest.raises(ValueError):
+        parse_predicate(text, COLUMNS)
+
+
+def test_literals_take_column_type():
+    predicate = parse_predicate('name = 5 or name = true', COLUMNS)
+
+    assert predicate.ast == ('or', (('cmp', '==', 'name', '5'),
+        ('cmp', '==', 'name', 'true')))
+    assert predicate.columns() == {'name'}
+    assert parse_predicate('  ', COLUMNS) is None
+
+
+def test_where_in_select(capsys):
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ("ann", 25), ("bob", 40), ("anna", 31)',
+    ])
+
+    assert shown_names(capsys,
+        'select from users where name like "an%" and age in (25, 31)') == \
+        ['ann', 'anna']
+    assert shown_names(capsys,
+        'select from users where age > 30 or name = "ann"') == \
+        ['ann', 'bob', 'anna']
\ No newline at end of file
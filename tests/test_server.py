@@ -0,0 +1,114 @@
+# tests/test_server.py
+
+import asyncio
+import sys
+import threading
+import time
+
+from src.primitive_db import table_manager
+from src.primitive_db.client import Connection
+from src.primitive_db.engine import run_batch
+from src.primitive_db.server import DatabaseServer, _read_tables
+from src.primitive_db.table_manager import TableManager
+
+
+def test_read_tables():
+    assert _read_tables('select from a join b on a.x = b.y where x = 1') == \
+        ['a', 'b']
+    assert _read_tables('explain select count(*) from a') == ['a']
+    assert _read_tables('export a to a.csv') == ['a']
+    assert _read_tables('list_tables') == []
+
+
+def test_reads_do_not_mutate_manager(monkeypatch):
+    run_batch([
+        'create_table users name:str age:int',
+        'create_index users age',
+        'insert into users values ("a", 1), ("b", 2)',
+    ])
+    manager = TableManager()
+    server = DatabaseServer(manager)
+    monkeypatch.setattr(sys, 'stdout', server.output)
+
+    # Загрузка таблиц и сбор статистики фиксируются вместе с числом
+    # читателей, выполняющихся в этот момент
+    readers = []
+    get_table = TableManager.get_table
+    collect_stats = table_manager.collect_stats
+
+    def spy_get_table(self, table_name):
+        if table_name not in self._tables:
+            readers.append(server.lock._readers)
+        return get_table(self, table_name)
+
+    def spy_collect_stats(*args):
+        readers.append(server.lock._readers)
+        return collect_stats(*args)
+
+    monkeypatch.setattr(TableManager, 'get_table', spy_get_table)
+    monkeypatch.setattr(table_manager, 'collect_stats', spy_collect_stats)
+
+    async def run():
+        session = {'pager_size': None, 'interactive': False, 'refresh': False}
+        results = []
+        for command in ['select from users where age = 2',
+            'select count(*) from users', 'info users']:
+            results.append(await server.execute(command, session))
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        manager.close()
+
+    assert all(ok for _, ok, _ in results)
+    assert '|  b   |' in results[0][2]
+    assert readers and not any(readers)
+
+def test_pipeline_with_large_responses(tmp_path, monkeypatch):
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ' + ', '.join(f'("user{i}", {i})'
+            for i in range(50)),
+    ])
+    manager = TableManager()
+    server = DatabaseServer(manager)
+    monkeypatch.setattr(sys, 'stdout', server.output)
+    socket_path = str(tmp_path / 'db.sock')
+
+    loop = asyncio.new_event_loop()
+    serving = loop.create_task(server.serve(socket_path))
+    server_thread = threading.Thread(target=loop.run_until_complete,
+        args=(asyncio.wait([serving]),))
+    server_thread.start()
+
+    # Большие запросы и ответы не помещаются в буферы сокета вместе
+    command = f'select from users where name != "{"x" * 4000}"'
+    outputs = []
+
+    def pipeline():
+        # Файл сокета появляется раньше, чем сервер начинает принимать
+        # соединения
+        while True:
+            try:
+                connection = Connection(socket_path=socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                time.sleep(0.01)
+        try:
+            outputs.extend(connection.execute_many([command] * 300))
+        finally:
+            connection.close()
+
+    client_thread = threading.Thread(target=pipeline, daemon=True)
+    client_thread.start()
+    client_thread.join(timeout=60)
+    try:
+        assert not client_thread.is_alive()
+        assert len(outputs) == 300 and all('user49' in output
+            for output in outputs)
+    finally:
+        loop.call_soon_threadsafe(serving.cancel)
+        server_thread.join()
+        loop.close()
+        manager.close()
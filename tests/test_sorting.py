@@ -0,0 +1,51 @@
+# tests/test_sorting.py
+
+import pytest
+
+from src.primitive_db.engine import run_batch
+from src.primitive_db.rows import row_type
+from src.primitive_db.sorting import external_sort, order_records
+
+Record = row_type(('ID', 'v'))
+RECORDS = [Record((1, None)), Record((2, 5)), Record((3, 1)), Record((4, 5)),
+    Record((5, None)), Record((6, 3))]
+
+
+def ids(records):
+    return [record.get('ID') for record in records]
+
+
+@pytest.mark.parametrize('limit', [None, 3])
+def test_none_sorts_last(limit):
+    assert ids(order_records(RECORDS, 'v', limit=limit)) == [3, 6, 2, 4, 1, 5][:limit]
+    assert ids(order_records(RECORDS, 'v', True, limit=limit)) == \
+        [2, 4, 6, 3, 1, 5][:limit]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_external_sort_spills(descending):
+    expected = list(external_sort(RECORDS, 'v', descending))
+    spilled = list(external_sort(RECORDS, 'v', descending, run_size=2))
+
+    assert spilled == expected
+    assert all(type(record) is Record for record in spilled)
+
+
+def shown_names(capsys, command):
+    run_batch([command])
+    lines = capsys.readouterr().out.splitlines()
+    cells = [line.split('|')[2].strip() for line in lines if line.startswith('|')]
+    return cells[1:]
+
+
+def test_order_by(capsys):
+    run_batch([
+        'create_table users name:str age:int',
+        'insert into users values ("a", 30), ("b", 10), ("c", 20)',
+    ])
+
+    assert shown_names(capsys, 'select from users order by age') == ['b', 'c', 'a']
+    assert shown_names(capsys, 'select from users order by age desc') == \
+        ['a', 'c', 'b']
+    assert shown_names(capsys, 'select from users order by name desc limit 2') == \
+        ['c', 'b']
@@ -0,0 +1,65 @@
+# tests/test_storage.py
+
+import os
+
+import pytest
+
+from src.primitive_db.constrants import TABLES_DATAPATH
+from src.primitive_db.engine import run_batch
+
+from .test_engine import load_rows
+
+EXPECTED = [
+    {'ID': 1, 'name': 'a', 'age': 10, 'ok': True},
+    {'ID': 3, 'name': 'c', 'age': 99, 'ok': True},
+    {'ID': 4, 'name': 'd', 'age': 4, 'ok': False},
+]
+
+
+def table_files():
+    return sorted(filename for filename in os.listdir(TABLES_DATAPATH)
+        if filename.startswith('users.'))
+
+
+@pytest.mark.parametrize('storage_format', ['json', 'columnar', 'mapped'])
+def test_log_replay_and_compaction(storage_format):
+    run_batch([
+        f'create_table users name:str age:int ok:bool format={storage_format}',
+        'insert into users values ("a", 1, true), ("b", 2, false)',
+        'insert into users values ("c", 3, true)',
+        'update users set age = 99 where name = "c"',
+        'delete from users where ID = 2',
+    ], auto_confirm=True)
+    run_batch([
+        'compact users',
+        'insert into users values ("d", 4, false)',
+        'update users set age = 10 where ID = 1',
+    ])
+
+    # Снимок нового поколения и журнал изменений после свертки
+    extension = {'json': 'json', 'columnar': 'col', 'mapped': 'bin'}
+    assert table_files() == [f'users.1.{extension[storage_format]}',
+        'users.1.log', 'users.lock']
+    assert load_rows('users') == EXPECTED
+
+    run_batch(['compact users'])
+    assert 'users.1.log' not in table_files()
+    assert load_rows('users') == EXPECTED
+
+
+def test_torn_log_line_is_dropped():
+    run_batch([
+        'create_table users name:str age:int ok:bool',
+        'insert into users values ("a", 1, true)',
+    ])
+    run_batch(['insert into users values ("b", 2, false)'])
+    logpath = os.path.join(TABLES_DATAPATH, 'users.log')
+    size = os.path.getsize(logpath)
+    os.truncate(logpath, size - 5)
+
+    assert load_rows('users') == [{'ID': 1, 'name': 'a', 'age': 1, 'ok': True}]
+
+    # Чтение журнал не изменяет, обрывок отрезается перед следующей записью
+    assert os.path.getsize(logpath) == size - 5
+    run_batch(['insert into users values ("c", 3, true)'])
+    assert [row['name'] for row in load_rows('users')] == ['a', 'c']
\ No newline at end of file
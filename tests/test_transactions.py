@@ -0,0 +1,133 @@
+# tests/test_transactions.py
+
+import os
+
+import pytest
+
+from src.primitive_db import table_manager
+from src.primitive_db.constrants import TABLES_DATAPATH
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import run_batch, run_script
+from src.primitive_db.table_manager import TableManager
+
+from .test_engine import load_rows
+
+
+@pytest.fixture
+def tables():
+    run_batch([
+        'create_table a name:str',
+        'create_table b name:str',
+        'insert into a values ("a1")',
+    ])
+
+
+def test_commit_is_durable(tables):
+    run_batch([
+        'begin',
+        'insert into a values ("a2")',
+        'update a set name = "a0" where ID = 1',
+        'insert into b values ("b1")',
+        'commit',
+    ])
+
+    assert load_rows('a') == [{'ID': 1, 'name': 'a0'}, {'ID': 2, 'name': 'a2'}]
+    assert load_rows('b') == [{'ID': 1, 'name': 'b1'}]
+
+
+def test_rollback_discards_changes(tables):
+    set_auto_confirm(True)
+    manager = TableManager()
+    try:
+        run_script(manager, manager.metadata, [
+            'begin',
+            'insert into a values ("a2")',
+            'delete from a where ID = 1',
+            'rollback',
+        ])
+        assert [row.get('name') for row in manager.get_table('a')] == ['a1']
+    finally:
+        manager.close()
+
+    assert load_rows('a') == [{'ID': 1, 'name': 'a1'}]
+
+
+def test_commit_without_metadata_is_ignored(tables, monkeypatch):
+    # Сбой после записи журналов, но до записи метаданных
+    with monkeypatch.context() as patch:
+        patch.setattr(table_manager, 'save_metadata', lambda data: None)
+        run_batch([
+            'begin',
+            'insert into a values ("a2")',
+            'insert into b values ("b1")',
+            'commit',
+        ])
+
+    assert load_rows('a') == [{'ID': 1, 'name': 'a1'}]
+    assert load_rows('b') == []
+
+    # Незафиксированные пачки отброшены и не оживают при следующей фиксации
+    run_batch(['insert into a values ("a3")', 'insert into b values ("b2")'])
+    assert load_rows('a') == [{'ID': 1, 'name': 'a1'}, {'ID': 2, 'name': 'a3'}]
+    assert load_rows('b') == [{'ID': 1, 'name': 'b2'}]
+
+
+def test_torn_batch_is_ignored(tables):
+    run_batch([
+        'begin',
+        'insert into a values ("a2")',
+        'delete from a where ID = 1',
+        'commit',
+    ], auto_confirm=True)
+    logpath = os.path.join(TABLES_DATAPATH, 'a.log')
+    os.truncate(logpath, os.path.getsize(logpath) - 2)
+
+    assert load_rows('a') == [{'ID': 1, 'name': 'a1'}]
+
+def test_commit_of_other_session_is_kept(tables):
+    writer = TableManager()
+    reader = TableManager()
+    try:
+        # Сессия с незавершенной транзакцией, таблица a еще не загружена
+        run_script(reader, reader.metadata, ['begin', 'insert into b values ("r")'])
+        run_script(writer, writer.metadata, [
+            'begin',
+            'insert into a values ("a2")',
+            'insert into b values ("b1")',
+            'commit',
+        ])
+
+        names = [row.get('name') for row in reader.get_table('a')]
+        assert names == ['a1', 'a2']
+    finally:
+        writer.close()
+        with pytest.raises(ValueError):
+            reader.flush()
+        reader.close()
+
+    assert load_rows('a') == [{'ID': 1, 'name': 'a1'}, {'ID': 2, 'name': 'a2'}]
+    assert load_rows('b') == [{'ID': 1, 'name': 'b1'}]
+
+
+def test_refresh_with_unsaved_changes(tables):
+    writer = TableManager()
+    reader = TableManager()
+    try:
+        run_script(reader, reader.metadata, ['begin', 'insert into b values ("r")'])
+        # Свертка меняет поколение файлов таблицы a в метаданных
+        run_script(writer, writer.metadata, [
+            'insert into a values ("a2")',
+            'compact a',
+        ])
+
+        run_script(reader, reader.metadata, ['insert into b values ("s")'])
+        names = [row.get('name') for row in reader.get_table('a')]
+        assert names == ['a1', 'a2']
+        assert [row.get('name') for row in reader.get_table('b')] == ['r', 's']
+
+        run_script(reader, reader.metadata, ['commit'])
+    finally:
+        writer.close()
+        reader.close()
+
+    assert load_rows('b') == [{'ID': 1, 'name': 'r'}, {'ID': 2, 'name': 's'}]